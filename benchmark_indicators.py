@@ -0,0 +1,450 @@
+# benchmark_indicators.py
+"""
+Indicator speed and correctness benchmarks
+Run: python benchmark_indicators.py [--quick] [--output report.json] [--compare baseline.json]
+
+Every indicator and add_all_indicators are timed from 50 bars up to millions
+of bars and across universe sizes, checked against pandas reference
+implementations, and written to a JSON report. --compare diffs two reports
+(timings and output checksums) so a change can be judged against a baseline.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import contextlib
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.append('src')
+
+from src.indicators.technical import TechnicalIndicators
+
+
+def make_bars(periods, freq='B', seed=7):
+    """Random-walk OHLC bars"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2015-01-01 09:15', periods=periods, freq=freq)
+    close = 1000 * np.cumprod(1 + rng.normal(0, 0.01, periods))
+    high = close * (1 + np.abs(rng.normal(0, 0.005, periods)))
+    low = close * (1 - np.abs(rng.normal(0, 0.005, periods)))
+    return pd.DataFrame({'High': high, 'Low': low, 'Close': close}, index=index)
+
+
+def make_ohlcv_bars(periods, freq=None, seed=7):
+    """make_bars plus Open and Volume; minute bars past 10 years of daily ones"""
+    freq = freq or ('B' if periods <= 2520 else 'min')
+    bars = make_bars(periods, freq=freq, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    bars['Open'] = bars['Close'].shift().fillna(bars['Close'].iloc[0]).to_numpy()
+    bars['Volume'] = rng.integers(1_000, 100_000, periods).astype(float)
+    return bars
+
+
+def legacy_supertrend(indicators, high, low, close, atr_period=10, multiplier=3):
+    """The original per-bar .iloc Supertrend loop, kept as the reference"""
+    atr = indicators.atr(high, low, close, atr_period)
+    hl2 = (high + low) / 2
+    
+    upper_band = hl2 + (multiplier * atr)
+    lower_band = hl2 - (multiplier * atr)
+    
+    supertrend = pd.Series(index=close.index, dtype=float)
+    direction = pd.Series(index=close.index, dtype=float)
+    
+    supertrend.iloc[0] = close.iloc[0]
+    direction.iloc[0] = 1
+    
+    for i in range(1, len(close)):
+        if pd.isna(upper_band.iloc[i]) or pd.isna(lower_band.iloc[i]):
+            supertrend.iloc[i] = supertrend.iloc[i-1]
+            direction.iloc[i] = direction.iloc[i-1]
+            continue
+        
+        if i == 1:
+            final_upper = upper_band.iloc[i]
+            final_lower = lower_band.iloc[i]
+        else:
+            prev_final_upper = supertrend.iloc[i-1] if direction.iloc[i-1] == -1 else upper_band.iloc[i-1]
+            prev_final_lower = supertrend.iloc[i-1] if direction.iloc[i-1] == 1 else lower_band.iloc[i-1]
+            
+            final_upper = upper_band.iloc[i] if upper_band.iloc[i] < prev_final_upper or close.iloc[i-1] > prev_final_upper else prev_final_upper
+            final_lower = lower_band.iloc[i] if lower_band.iloc[i] > prev_final_lower or close.iloc[i-1] < prev_final_lower else prev_final_lower
+        
+        if close.iloc[i] <= final_lower:
+            direction.iloc[i] = -1
+        elif close.iloc[i] >= final_upper:
+            direction.iloc[i] = 1
+        else:
+            direction.iloc[i] = direction.iloc[i-1]
+        
+        supertrend.iloc[i] = final_lower if direction.iloc[i] == 1 else final_upper
+    
+    return supertrend, direction
+
+
+def legacy_cci(indicators, high, low, close, window=20):
+    """The original CCI with a rolling().apply lambda, kept as the reference"""
+    typical_price = (high + low + close) / 3
+    sma_tp = indicators.sma(typical_price, window)
+    mad = typical_price.rolling(window=window).apply(lambda x: np.abs(x - x.mean()).mean())
+    return (typical_price - sma_tp) / (0.015 * mad)
+
+
+def time_call(func, repeat=3, setup=None):
+    """Best wall time of `repeat` runs (setup runs untimed before each)"""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+# name -> (kernel(indicators, bars), reference(indicators, bars), largest size the reference is run at)
+# References are plain pandas versions of each formula (the original loops for
+# Supertrend and CCI), so a faster kernel has to reproduce them.
+def _reference_stochastic(ti, b):
+    lowest, highest = b['Low'].rolling(14).min(), b['High'].rolling(14).max()
+    k = 100 * (b['Close'] - lowest) / (highest - lowest)
+    return pd.DataFrame({'Stoch_K': k, 'Stoch_D': k.rolling(3).mean()})
+
+
+def _reference_bollinger(ti, b):
+    middle, std = b['Close'].rolling(20).mean(), b['Close'].rolling(20).std()
+    return pd.DataFrame({'BB_Upper': middle + 2 * std, 'BB_Middle': middle, 'BB_Lower': middle - 2 * std})
+
+
+def _reference_macd(ti, b):
+    line = b['Close'].ewm(span=12).mean() - b['Close'].ewm(span=26).mean()
+    signal = line.ewm(span=9).mean()
+    return pd.DataFrame({'MACD': line, 'MACD_Signal': signal, 'MACD_Histogram': line - signal})
+
+
+def _reference_rsi(ti, b):
+    # The first bar's undefined change counts as zero
+    delta = b['Close'].diff().fillna(0)
+    gain = delta.clip(lower=0).rolling(14).mean()
+    loss = (-delta).clip(lower=0).rolling(14).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+
+def _reference_atr(ti, b):
+    previous = b['Close'].shift()
+    true_range = pd.concat([b['High'] - b['Low'], (b['High'] - previous).abs(), (b['Low'] - previous).abs()],
+                           axis=1).max(axis=1, skipna=False)
+    return true_range.rolling(14).mean()
+
+
+def _reference_williams_r(ti, b):
+    highest, lowest = b['High'].rolling(14).max(), b['Low'].rolling(14).min()
+    return -100 * (highest - b['Close']) / (highest - lowest)
+
+
+def _reference_supertrend(ti, b):
+    band, direction = legacy_supertrend(ti, b['High'], b['Low'], b['Close'])
+    return pd.DataFrame({'Supertrend': band, 'Supertrend_Direction': direction})
+
+
+def _hlc(b):
+    return b['High'], b['Low'], b['Close']
+
+
+INDICATOR_CASES = {
+    'sma_20': (lambda ti, b: ti.sma(b['Close'], 20), lambda ti, b: b['Close'].rolling(20).mean(), None),
+    'ema_20': (lambda ti, b: ti.ema(b['Close'], 20), lambda ti, b: b['Close'].ewm(span=20).mean(), None),
+    'rsi': (lambda ti, b: ti.rsi(b['Close']), _reference_rsi, None),
+    'macd': (lambda ti, b: ti.macd(b['Close']), _reference_macd, None),
+    'bollinger': (lambda ti, b: ti.bollinger_bands(b['Close']), _reference_bollinger, None),
+    'stochastic': (lambda ti, b: ti.stochastic(*_hlc(b)), _reference_stochastic, None),
+    'atr': (lambda ti, b: ti.atr(*_hlc(b)), _reference_atr, None),
+    'supertrend': (lambda ti, b: ti.supertrend(*_hlc(b), return_direction=True), _reference_supertrend, 5_000),
+    'williams_r': (lambda ti, b: ti.williams_r(*_hlc(b)), _reference_williams_r, None),
+    'cci': (lambda ti, b: ti.cci(*_hlc(b)), lambda ti, b: legacy_cci(ti, *_hlc(b)), 20_000),
+    'momentum': (lambda ti, b: ti.momentum(b['Close']), lambda ti, b: b['Close'] - b['Close'].shift(10), None),
+    'roc': (lambda ti, b: ti.roc(b['Close']), lambda ti, b: b['Close'].pct_change(10) * 100, None)
+}
+
+RTOL = 1e-7
+ATOL = 1e-8
+
+
+def _columns(result):
+    if isinstance(result, pd.DataFrame):
+        return {column: result[column].to_numpy(dtype=float) for column in result.columns}
+    return {'value': np.asarray(result, dtype=float)}
+
+
+def compare_outputs(result, reference, rtol=RTOL, atol=ATOL):
+    """(ok, max abs error) of a result against its reference, NaN positions included"""
+    result, reference = _columns(result), _columns(reference)
+    if set(result) != set(reference):
+        return False, float('inf')
+    ok, worst = True, 0.0
+    for column, expected in reference.items():
+        actual = result[column]
+        if actual.shape != expected.shape or not np.array_equal(np.isnan(actual), np.isnan(expected)):
+            return False, float('inf')
+        both = ~np.isnan(expected)
+        if both.any():
+            worst = max(worst, float(np.max(np.abs(actual[both] - expected[both]))))
+            ok &= bool(np.allclose(actual[both], expected[both], rtol=rtol, atol=atol))
+    return ok, worst
+
+
+def checksum(result):
+    """Order-sensitive summary of an output (weighted sum, NaN count) for cross-commit comparison"""
+    summary = {}
+    for column, values in _columns(result).items():
+        finite = np.nan_to_num(values, nan=0.0)
+        weights = np.linspace(1.0, 2.0, len(values)) if len(values) else values
+        summary[column] = [float(np.dot(finite, weights)), int(np.isnan(values).sum())]
+    return summary
+
+
+def _entry(kind, name, bars, symbols, seconds, ok=None, max_error=None, result_checksum=None):
+    return {
+        'benchmark': kind, 'name': name, 'bars': bars, 'symbols': symbols,
+        'seconds': seconds, 'ns_per_bar': seconds * 1e9 / max(bars * symbols, 1),
+        'ok': ok, 'max_abs_error': max_error, 'checksum': result_checksum
+    }
+
+
+def run_indicator_benchmarks(sizes, repeat=3):
+    """Each indicator kernel and add_all_indicators at each series length"""
+    indicators = TechnicalIndicators()
+    results = []
+    for size in sizes:
+        bars = make_ohlcv_bars(size)
+        print(f"📏 {size:,} bars")
+        for name, (kernel, reference, reference_limit) in INDICATOR_CASES.items():
+            output = kernel(indicators, bars)
+            ok = max_error = None
+            if reference_limit is None or size <= reference_limit:
+                ok, max_error = compare_outputs(output, reference(indicators, bars))
+            seconds = time_call(lambda: kernel(indicators, bars), repeat=repeat)
+            results.append(_entry('indicator', name, size, 1, seconds, ok, max_error, checksum(output)))
+            _print_entry(results[-1])
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = indicators.add_all_indicators(bars)
+            seconds = time_call(lambda: indicators.add_all_indicators(bars), repeat=repeat)
+        # Every column equals its own kernel's output
+        ok, max_error = True, 0.0
+        for name, (kernel, _, _) in INDICATOR_CASES.items():
+            output = _columns(kernel(indicators, bars))
+            renamed = {'sma_20': 'SMA_20', 'ema_20': 'EMA_20', 'rsi': 'RSI', 'atr': 'ATR', 'williams_r': 'Williams_R',
+                       'cci': 'CCI', 'momentum': 'Momentum', 'roc': 'ROC'}
+            expected = {renamed.get(name, column): values for column, values in output.items()}
+            column_ok, column_error = compare_outputs(full[list(expected)], pd.DataFrame(expected, index=full.index))
+            ok &= column_ok
+            max_error = max(max_error, column_error)
+        results.append(_entry('add_all_indicators', 'add_all_indicators', size, 1, seconds, ok, max_error,
+                              checksum(full.drop(columns=list(bars.columns)))))
+        _print_entry(results[-1])
+    return results
+
+
+def run_universe_benchmarks(universes, periods=250, repeat=3, loop_limit=50):
+    """Panel add_all_indicators_many vs the per-symbol loop across universe sizes"""
+    indicators = TechnicalIndicators()
+    results = []
+    for universe in universes:
+        stocks_data = {f'S{i}': make_ohlcv_bars(periods, seed=i) for i in range(universe)}
+        print(f"🌐 {universe} symbols x {periods} bars")
+        with contextlib.redirect_stdout(io.StringIO()):
+            frames = indicators.add_all_indicators_many(stocks_data)
+            panel_seconds = time_call(lambda: indicators.add_all_indicators_many(stocks_data),
+                                      repeat=repeat, setup=indicators.cache.clear)
+            
+            # The panel frames must equal the per-symbol frames (checked on a sample)
+            ok, max_error = True, 0.0
+            for symbol in list(stocks_data)[:5]:
+                expected = indicators.add_all_indicators(stocks_data[symbol])
+                symbol_ok, symbol_error = compare_outputs(frames[symbol][expected.columns], expected)
+                ok &= symbol_ok
+                max_error = max(max_error, symbol_error)
+            
+            loop_seconds = None
+            if universe <= loop_limit:
+                loop_seconds = time_call(lambda: [indicators.add_all_indicators(data) for data in stocks_data.values()],
+                                         repeat=1)
+        results.append(_entry('universe', 'add_all_indicators_many', periods, universe, panel_seconds, ok, max_error))
+        _print_entry(results[-1])
+        if loop_seconds is not None:
+            results.append(_entry('universe', 'add_all_indicators_loop', periods, universe, loop_seconds))
+            _print_entry(results[-1])
+    return results
+
+
+def _print_entry(entry):
+    check = {True: '✅', False: '❌', None: '  '}[entry['ok']]
+    print(f"   {check} {entry['name']:<24} {entry['bars']:>9,} bars x {entry['symbols']:>3} | "
+          f"{entry['seconds'] * 1000:9.2f} ms | {entry['ns_per_bar']:8.1f} ns/bar")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_suite(sizes=(50, 1_000, 100_000, 1_000_000), universes=(5, 50, 500), repeat=3):
+    """Full benchmark report (JSON-serializable)"""
+    results = run_indicator_benchmarks(sizes, repeat) + run_universe_benchmarks(universes, repeat=repeat)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'rtol': RTOL,
+            'atol': ATOL
+        },
+        'ok': all(entry['ok'] is not False for entry in results),
+        'results': results
+    }
+
+
+def compare_reports(baseline, current, slowdown=1.25, min_seconds=1e-3):
+    """Differences between two reports: slower timings, changed outputs, failed checks
+    
+    Timings under min_seconds are too noisy to call and are not flagged.
+    """
+    def key(entry):
+        return (entry['benchmark'], entry['name'], entry['bars'], entry['symbols'])
+    
+    before = {key(entry): entry for entry in baseline['results']}
+    findings = []
+    for entry in current['results']:
+        label = f"{entry['name']} {entry['bars']:,} bars x {entry['symbols']}"
+        if entry['ok'] is False:
+            findings.append(('failed', label, None))
+        old = before.get(key(entry))
+        if old is None:
+            continue
+        if old['seconds'] >= min_seconds or entry['seconds'] >= min_seconds:
+            ratio = entry['seconds'] / max(old['seconds'], 1e-12)
+            if ratio >= slowdown:
+                findings.append(('slower', label, round(ratio, 2)))
+            elif ratio <= 1 / slowdown:
+                findings.append(('faster', label, round(ratio, 2)))
+        if old.get('checksum') and entry.get('checksum'):
+            for column, (total, nans) in entry['checksum'].items():
+                old_total, old_nans = old['checksum'].get(column, (None, None))
+                if old_total is None or nans != old_nans or not np.isclose(total, old_total, rtol=RTOL, atol=ATOL):
+                    findings.append(('changed', f"{label} {column}", None))
+    return findings
+
+
+def print_comparison(findings):
+    icons = {'failed': '❌', 'slower': '🐢', 'faster': '🚀', 'changed': '⚠️'}
+    if not findings:
+        print("✅ No timing or output differences")
+    for kind, label, ratio in findings:
+        detail = f" ({ratio}x time)" if ratio is not None else ''
+        print(f"   {icons[kind]} {kind:<8} {label}{detail}")
+
+
+def benchmark_supertrend():
+    """Supertrend on 10 years of daily bars and one month of 1-minute bars"""
+    indicators = TechnicalIndicators()
+    datasets = {
+        '10y daily': make_bars(2520),
+        '1m x 1 month': make_bars(22 * 375, freq='min')
+    }
+    
+    print("⭐ Supertrend: legacy .iloc loop vs array kernel")
+    for name, bars in datasets.items():
+        args = (bars['High'], bars['Low'], bars['Close'])
+        legacy_seconds = time_call(lambda: legacy_supertrend(indicators, *args), repeat=1)
+        kernel_seconds = time_call(lambda: indicators.supertrend(*args, return_direction=True))
+        print(f"   {name:>14} ({len(bars):>5} bars): legacy {legacy_seconds * 1000:8.1f} ms | "
+              f"kernel {kernel_seconds * 1000:6.1f} ms | {legacy_seconds / kernel_seconds:6.1f}x")
+
+
+def benchmark_cci():
+    """CCI on 10 years of daily bars and one month of 1-minute bars"""
+    indicators = TechnicalIndicators()
+    datasets = {
+        '10y daily': make_bars(2520),
+        '1m x 1 month': make_bars(22 * 375, freq='min')
+    }
+    
+    print("📐 CCI: rolling().apply lambda vs sliding-window MAD")
+    for name, bars in datasets.items():
+        args = (bars['High'], bars['Low'], bars['Close'])
+        legacy_seconds = time_call(lambda: legacy_cci(indicators, *args), repeat=1)
+        vectorized_seconds = time_call(lambda: indicators.cci(*args))
+        print(f"   {name:>14} ({len(bars):>5} bars): legacy {legacy_seconds * 1000:8.1f} ms | "
+              f"vectorized {vectorized_seconds * 1000:6.1f} ms | {legacy_seconds / vectorized_seconds:6.1f}x")
+
+
+
+def benchmark_panel():
+    """add_all_indicators per symbol vs one panel pass, 1 year of daily bars"""
+    indicators = TechnicalIndicators()
+    
+    print("🧮 add_all_indicators: per-symbol loop vs panel")
+    for universe in (5, 50, 500):
+        stocks_data = {f'S{i}': make_bars(250, seed=i).assign(Open=1.0, Volume=1.0) for i in range(universe)}
+        with contextlib.redirect_stdout(io.StringIO()):
+            loop_seconds = time_call(lambda: [indicators.add_all_indicators(d) for d in stocks_data.values()], repeat=1)
+            panel_seconds = time_call(lambda: indicators.add_all_indicators_panel(stocks_data))
+        print(f"   {universe:>4} symbols: loop {loop_seconds * 1000:8.1f} ms | "
+              f"panel {panel_seconds * 1000:6.1f} ms | {loop_seconds / panel_seconds:6.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indicator speed and correctness benchmarks")
+    parser.add_argument('--quick', action='store_true', help="small sizes only (50 / 1,000 / 20,000 bars; 5 / 50 symbols)")
+    parser.add_argument('--sizes', help="comma-separated series lengths")
+    parser.add_argument('--universes', help="comma-separated universe sizes")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_indicators.json', help="JSON report path")
+    parser.add_argument('--compare', help="baseline JSON report to diff against")
+    parser.add_argument('--legacy', action='store_true', help="also time the original pandas loops")
+    args = parser.parse_args(argv)
+    
+    sizes = (50, 1_000, 20_000) if args.quick else (50, 1_000, 100_000, 1_000_000)
+    universes = (5, 50) if args.quick else (5, 50, 500)
+    if args.sizes:
+        sizes = tuple(int(size) for size in args.sizes.split(','))
+    if args.universes:
+        universes = tuple(int(universe) for universe in args.universes.split(','))
+    
+    if args.legacy:
+        benchmark_supertrend()
+        benchmark_cci()
+        benchmark_panel()
+    
+    report = run_suite(sizes, universes, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report written to {args.output} ({len(report['results'])} results)")
+    
+    findings = []
+    if args.compare:
+        with open(args.compare) as f:
+            findings = compare_reports(json.load(f), report)
+        print(f"🔍 Compared with {args.compare}")
+        print_comparison(findings)
+    
+    failed = not report['ok'] or any(kind in ('failed', 'changed') for kind, _, _ in findings)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -90,6 +90,11 @@ class Config:
     BACKTEST_DAYS = 30
     COMMISSION = 0.05  # 0.05% per trade
     
+    # Signal generation: worker processes for large watchlists (1 = in-process, 0 = every CPU)
+    SIGNAL_WORKERS = int(os.getenv('SIGNAL_WORKERS', 1))
+    SIGNAL_PARALLEL_MIN_SYMBOLS = int(os.getenv('SIGNAL_PARALLEL_MIN_SYMBOLS', 100))
+    SIGNAL_HISTORY_PATH = os.getenv('SIGNAL_HISTORY_PATH', 'data/signal_history.db')
+    
     # Paper Trading vs Live Trading
     PAPER_TRADING = not ZERODHA_ENABLED or ZERODHA_PAPER_TRADING
     
@@ -28,6 +28,7 @@ from src.data_fetcher import DataFetcher
 from src.indicators.technical import TechnicalIndicators
 from src.engines.paper_trading import PaperTradingEngine
 from src.strategies.signal_generator import SignalGenerator
+from src.strategies.signals import signal_to_dict
 from config.settings import Config
 
 # Initialize configuration
@@ -97,7 +98,12 @@ market_regime_detector = SimpleMarketRegimeDetector(data_fetcher)
 print("✅ Market Regime Detector initialized")
 
 # Signal generator
-signal_generator = SignalGenerator(technical_indicators, market_regime_detector)
+signal_generator = SignalGenerator(technical_indicators, market_regime_detector,
+                                   workers=config.SIGNAL_WORKERS,
+                                   parallel_min_symbols=config.SIGNAL_PARALLEL_MIN_SYMBOLS,
+                                   history_path=config.SIGNAL_HISTORY_PATH)
+# Fork the signal worker pool (if configured) while this process is still single-threaded
+signal_generator.start_workers()
 print("✅ Signal Generator initialized")
 
 # Paper trading engine
@@ -250,18 +256,7 @@ def api_portfolio():
 def api_signals():
     """Signals API"""
     try:
-        signals_data = []
-        for signal in current_signals[-10:]:
-            signals_data.append({
-                'symbol': signal.get('symbol', 'UNKNOWN'),
-                'action': signal.get('action', 'UNKNOWN'),
-                'price': signal.get('price', 0),
-                'confidence': signal.get('confidence', 0),
-                'reasons': signal.get('reasons', []),
-                'timestamp': signal.get('timestamp', datetime.now()).isoformat() if hasattr(signal.get('timestamp', datetime.now()), 'isoformat') else str(signal.get('timestamp', datetime.now())),
-                'stop_loss': signal.get('stop_loss', 0),
-                'target_price': signal.get('target_price', 0)
-            })
+        signals_data = [signal_to_dict(signal) for signal in current_signals[-10:]]
         
         return jsonify({
             'signals': signals_data,
@@ -282,6 +277,10 @@ def api_system_status():
             'trades_today': system_status.get('trades_today', 0),
             'signals_generated': len(current_signals),
             'market_status': data_fetcher._get_market_status(),
+            'data_sources': data_fetcher.get_source_stats(),
+            'indicator_cache': technical_indicators.cache.get_stats(),
+            'indicator_memory': {key: value for key, value in technical_indicators.memory_report().items()
+                                 if key != 'per_symbol'},
             'components': {
                 'data_fetcher': True,
                 'paper_trading': bool(paper_trading_engine),
@@ -483,8 +482,8 @@ def update_system_data():
             except Exception as e:
                 print(f"⚠️ Portfolio update error: {e}")
         
-        # Clear data fetcher cache to get fresh prices
-        data_fetcher.clear_cache()
+        # Invalidate only what market events have made stale (quotes expire on their own)
+        data_fetcher.check_market_events()
         
         system_status['last_update'] = datetime.now()
         print("✅ System data updated")
@@ -546,9 +545,9 @@ def background_update():
             # Update system status every 5 minutes
             system_status['last_update'] = datetime.now()
             
-            # Clear cache periodically
-            if hasattr(data_fetcher, 'clear_cache'):
-                data_fetcher.clear_cache()
+            # Invalidate cached data on session open/close and new bars
+            if hasattr(data_fetcher, 'check_market_events'):
+                data_fetcher.check_market_events()
             
             time.sleep(300)  # 5 minutes
             
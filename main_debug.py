@@ -166,7 +166,7 @@ except Exception as e:
 debug_print("Creating MarketRegimeDetector...")
 start_time = time.time()
 try:
-    market_regime_detector = MarketRegimeDetector(enhanced_data_fetcher)
+    market_regime_detector = MarketRegimeDetector(enhanced_data_fetcher, technical_indicators)
     debug_print(f"MarketRegimeDetector created in {time.time() - start_time:.2f}s")
 except Exception as e:
     debug_print(f"MarketRegimeDetector creation failed: {e}")
@@ -70,26 +70,10 @@ class LightweightEnhancedDataFetcher(DataFetcher):
         super().__init__()
         self.kite = kite_instance
         self.instruments = instruments
-    
-    def get_current_price(self, symbol):
-        """Get current price with Zerodha integration"""
-        try:
-            if self.kite and self.instruments:
-                instrument_token = self.instruments.get_instrument_token(symbol)
-                if instrument_token:
-                    zerodha_rate_limiter.wait_if_needed()
-                    zerodha_rate_limiter.record_call()
-                    
-                    quote = self.kite.quote([f"NSE:{symbol}"])
-                    if f"NSE:{symbol}" in quote:
-                        price = quote[f"NSE:{symbol}"]["last_price"]
-                        print(f"💎 {symbol}: ₹{price:.2f} (Zerodha)")
-                        return price
-        except Exception as e:
-            print(f"⚠️ Zerodha price fetch failed for {symbol}: {e}")
         
-        # Fallback to parent method
-        return super().get_current_price(symbol)
+        # Zerodha first; Yahoo, stored history and simulation take over when it fails
+        if self.kite and self.instruments:
+            self.add_zerodha_source(self.kite, self.instruments, zerodha_rate_limiter)
 
 # Initialize enhanced data fetcher
 if kite and zerodha_instruments:
@@ -0,0 +1,259 @@
+# src/data_cache.py
+"""
+Memory-bounded LRU + TTL cache for market data with superset-aware window lookups
+"""
+import time
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+class CacheEntry:
+    """Single cached value with its expiry, estimated size and namespace generation"""
+    
+    __slots__ = ('value', 'stored_at', 'ttl', 'size', 'days', 'generation')
+    
+    def __init__(self, value, ttl, size, days=None):
+        self.value = value
+        self.stored_at = time.time()
+        self.ttl = ttl
+        self.size = size
+        self.days = days
+        self.generation = 0
+    
+    def age(self):
+        return time.time() - self.stored_at
+    
+    @property
+    def expires_at(self):
+        return self.stored_at + self.ttl
+    
+    def is_expired(self):
+        return self.age() >= self.ttl
+
+class DataCache:
+    """Thread-safe LRU cache with per-entry TTL and a byte budget
+    
+    Historical frames are stored once per symbol under the largest window
+    requested so far; a request for a smaller window is served by slicing
+    the tail of the cached frame.
+    
+    Keys are namespaced by their prefix ("stock_data:TCS" is in the
+    "stock_data" namespace). invalidate(namespace) bumps that namespace's
+    generation, which makes every older entry in it a miss without touching
+    the other namespaces. A stale entry is dropped when a lookup reaches it
+    (or when its TTL comes due), never by a scan on the write path.
+    
+    Expiry times are kept in a min-heap, so an insert only pops the entries
+    that are actually due instead of scanning the whole cache.
+    """
+    
+    def __init__(self, max_bytes=128 * 1024 * 1024, default_ttl=300):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.generations = {}  # namespace -> current generation
+        self.expiry_heap = []  # (expires_at, sequence, key, entry); replaced entries are skipped when popped
+        self.sequence = itertools.count()
+        
+        # Counters
+        self.hits = 0
+        self.superset_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def estimate_size(value):
+        """Rough in-memory size of a cached value in bytes"""
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            usage = value.memory_usage(index=True, deep=False)
+            return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+        if isinstance(value, np.ndarray):
+            return int(value.nbytes)
+        if isinstance(value, dict):
+            return 64 + sum(DataCache.estimate_size(k) + DataCache.estimate_size(v) for k, v in value.items())
+        if isinstance(value, (list, tuple)):
+            return 56 + sum(DataCache.estimate_size(v) for v in value)
+        if isinstance(value, str):
+            return 49 + len(value)
+        return 32
+    
+    @staticmethod
+    def namespace(key):
+        """Namespace (data class) of a cache key"""
+        return key.split(':', 1)[0]
+    
+    def _is_current(self, key, entry):
+        return entry.generation == self.generations.get(self.namespace(key), 0)
+    
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size
+        return entry
+    
+    def _lookup(self, key):
+        """Return a live entry (refreshing its LRU position) or None; caller holds the lock"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_current(key, entry):
+            self._remove(key)
+            self.invalidations += 1
+            return None
+        if entry.is_expired():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+    
+    def _insert(self, key, entry):
+        """Insert an entry and enforce the byte budget; caller holds the lock"""
+        if key in self.entries:
+            self._remove(key)
+        entry.generation = self.generations.get(self.namespace(key), 0)
+        self.entries[key] = entry
+        self.total_bytes += entry.size
+        heapq.heappush(self.expiry_heap, (entry.expires_at, next(self.sequence), key, entry))
+        self._expire_due()
+        
+        # Evict least recently used entries until we are within budget
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            oldest_key = next(iter(self.entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+    
+    def _expire_due(self):
+        """Pop entries whose expiry has passed off the heap; caller holds the lock"""
+        now = time.time()
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            _, _, key, entry = heapq.heappop(heap)
+            if self.entries.get(key) is entry:
+                self._remove(key)
+                self.expirations += 1
+        
+        # Replaced and evicted entries leave dead heap items behind; rebuild once they dominate
+        if len(heap) > 2 * len(self.entries) + 64:
+            self.expiry_heap = [item for item in heap if self.entries.get(item[2]) is item[3]]
+            heapq.heapify(self.expiry_heap)
+    
+    def _purge_expired(self):
+        """Full sweep for expired and stale-generation entries; only purge_expired() calls it"""
+        expired = [key for key, entry in self.entries.items() if entry.is_expired()]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        
+        invalidated = [key for key, entry in self.entries.items() if not self._is_current(key, entry)]
+        for key in invalidated:
+            self._remove(key)
+        self.invalidations += len(invalidated)
+        return len(expired) + len(invalidated)
+    
+    def get(self, key):
+        """Get a cached value, or None on miss/expiry"""
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.value
+    
+    def get_entry(self, key):
+        """Get the live CacheEntry for a key without touching the counters"""
+        with self.lock:
+            return self._lookup(key)
+    
+    def set(self, key, value, ttl=None):
+        """Store a value with an optional TTL override"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self.lock:
+            self._insert(key, CacheEntry(value, ttl, self.estimate_size(value)))
+    
+    def get_window(self, key, days):
+        """Get the last `days` rows of a cached frame stored for at least that many days"""
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is None or entry.days is None or entry.days < days:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            if entry.days == days:
+                return entry.value
+            
+            self.superset_hits += 1
+            return entry.value.tail(days)
+    
+    def set_window(self, key, days, frame, ttl=None):
+        """Store a frame covering `days`, keeping a live larger window if one is cached"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self.lock:
+            current = self._lookup(key)
+            if current is not None and current.days is not None and current.days > days:
+                return
+            self._insert(key, CacheEntry(frame, ttl, self.estimate_size(frame), days=days))
+    
+    def delete(self, key):
+        """Remove a single key"""
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+    
+    def invalidate(self, namespace):
+        """Invalidate every entry in a namespace by bumping its generation; returns the new generation
+        
+        Invalidated entries become misses immediately and are dropped when
+        next looked up or when they expire; purge_expired() sweeps them all.
+        """
+        with self.lock:
+            self.generations[namespace] = self.generations.get(namespace, 0) + 1
+            return self.generations[namespace]
+    
+    def generation(self, namespace):
+        """Current generation of a namespace"""
+        with self.lock:
+            return self.generations.get(namespace, 0)
+    
+    def purge_expired(self):
+        """Drop every expired or invalidated entry; returns how many were removed"""
+        with self.lock:
+            return self._purge_expired()
+    
+    def clear(self):
+        """Remove all entries; returns how many were removed"""
+        with self.lock:
+            count = len(self.entries)
+            self.entries.clear()
+            self.expiry_heap.clear()
+            self.total_bytes = 0
+            return count
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def get_stats(self):
+        """Get real hit/miss/eviction counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'superset_hits': self.superset_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'generations': dict(self.generations)
+            }
@@ -10,23 +10,86 @@ import random
 from functools import lru_cache
 import logging
 import threading
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data_store import OHLCVStore
+from src.data_cache import DataCache
+from src.data_quality import sanitize_ohlcv, sanitize_universe
+from src.synthetic_data import SyntheticMarketData
+from src.single_flight import SingleFlight
+from src.resampler import BarResampler
+from src.data_sources import (
+    DataSourceChain, SourceUnavailable, ZerodhaSource, YahooSource, StoreSource, SyntheticSource
+)
 
 logger = logging.getLogger(__name__)
 
 class DataFetcher:
     """Enhanced Data Fetcher with rate limiting, caching, and robust error handling"""
     
-    def __init__(self):
+    # Cache data classes and the cache key namespace each one lives in
+    DATA_CLASSES = {
+        'history': 'stock_data',
+        'quotes': 'current_price',
+        'overview': 'market_overview'
+    }
+    
+    # Data classes invalidated by each market-hours event
+    MARKET_EVENT_INVALIDATIONS = {
+        'session_open': ['quotes', 'overview'],
+        'session_close': ['history', 'quotes', 'overview'],
+        'new_bar': ['history']
+    }
+    
+    def __init__(self, store_dir='data/ohlcv', cache_max_bytes=128 * 1024 * 1024):
         # Rate limiting to prevent API bans
         self.last_request_time = 0
         self.min_request_interval = 1.2  # 1.2 seconds between requests
         self.max_requests_per_hour = 90   # Conservative limit
         self.request_times = []
+        self.rate_lock = threading.Lock()
+        
+        # Async fetch API (bounded concurrency under the same rate budget)
+        self.max_concurrent_requests = 4
+        self.async_request_timeout = 30  # Per-request deadline in seconds
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='data-fetch')
         
-        # Caching system
-        self.cache = {}
+        # Caching system (LRU + TTL with a byte budget)
         self.cache_timeout = 300  # 5 minutes cache
-        self.cache_lock = threading.Lock()
+        self.price_cache_timeout = 60  # 1 minute for current prices
+        self.history_cache_timeout = 24 * 3600  # Daily bars stay warm until a market event invalidates them
+        
+        # Stale-while-revalidate: serve an expired quote/overview immediately
+        # (up to the max staleness) and refresh it in the background
+        self.stale_while_revalidate = True
+        self.max_price_staleness = 300
+        self.max_overview_staleness = 900
+        self.background_refreshes = 0
+        self.cache = DataCache(max_bytes=cache_max_bytes, default_ttl=self.cache_timeout)
+        
+        # Market-hours state for event-driven cache invalidation
+        self.market_state = None  # (date, market open) at the last check
+        self.market_events = deque(maxlen=50)
+        
+        # Concurrent callers for the same data share one in-flight fetch
+        self.inflight = SingleFlight()
+        
+        # Batched multi-symbol downloads
+        self.batch_size = 20  # Tickers per Yahoo download request
+        self.batch_stats = deque(maxlen=50)  # Timing of recent batches
+        
+        # Latest ingest data-quality report per symbol
+        self.quality_reports = {}
+        
+        # Persistent bar history (survives restarts and cache clears)
+        self.store = None
+        if store_dir:
+            try:
+                self.store = OHLCVStore(store_dir)
+            except Exception as e:
+                print(f"⚠️ OHLCV store unavailable: {e}")
         
         # Enhanced symbol mapping
         self.symbol_mapping = {
@@ -55,30 +118,52 @@ class DataFetcher:
             'MARUTI': 9800.0, 'BAJFINANCE': 7200.0
         }
         
-        print("✅ Enhanced Data Fetcher initialized with rate limiting and caching")
-    
-    def _enforce_rate_limit(self):
-        """Strict rate limiting to prevent API bans"""
-        current_time = time.time()
+        # Intraday timeframes are built from one 1-minute download
+        self.intraday_cache_timeout = 60  # One base bar
+        self.resampler = BarResampler()
         
-        # Clean old request times (older than 1 hour)
-        self.request_times = [t for t in self.request_times if current_time - t < 3600]
+        # Thread-safe simulation used when no real data is available
+        self.synthetic = SyntheticMarketData(self.base_prices)
         
-        # Check hourly limit
-        if len(self.request_times) >= self.max_requests_per_hour:
-            sleep_time = 3600 - (current_time - self.request_times[0]) + 60
-            print(f"⚠️ API rate limit reached. Waiting {sleep_time:.0f} seconds...")
-            time.sleep(sleep_time)
+        # Data sources tried in order, each behind a circuit breaker
+        # (add_zerodha_source puts Zerodha in front when a session exists)
+        self.sources = DataSourceChain([YahooSource(self)])
+        if self.store:
+            self.sources.add(StoreSource(self.store))
+        self.sources.add(SyntheticSource(self.synthetic, self.is_market_open))
         
-        # Enforce minimum interval
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            time.sleep(sleep_time)
+        print("✅ Enhanced Data Fetcher initialized with rate limiting and caching")
+    
+    def _reserve_request_slot(self):
+        """Reserve the next request slot in the rate budget; returns seconds to wait
         
-        # Record this request
-        self.last_request_time = time.time()
-        self.request_times.append(self.last_request_time)
+        Slots are handed out under a lock, so the sync path and the async
+        worker threads share one budget without sleeping while holding it.
+        """
+        with self.rate_lock:
+            current_time = time.time()
+            
+            # Clean old request times (older than 1 hour)
+            self.request_times = [t for t in self.request_times if current_time - t < 3600]
+            
+            # Enforce minimum interval
+            slot = max(current_time, self.last_request_time + self.min_request_interval)
+            
+            # Check hourly limit
+            if len(self.request_times) >= self.max_requests_per_hour:
+                slot = max(slot, self.request_times[0] + 3600 + 60)
+                print(f"⚠️ API rate limit reached. Waiting {slot - current_time:.0f} seconds...")
+            
+            # Record this request
+            self.last_request_time = slot
+            self.request_times.append(slot)
+            return slot - current_time
+    
+    def _enforce_rate_limit(self):
+        """Strict rate limiting to prevent API bans"""
+        wait = self._reserve_request_slot()
+        if wait > 0:
+            time.sleep(wait)
     
     def _get_cache_key(self, operation, *args):
         """Generate cache key"""
@@ -86,49 +171,64 @@ class DataFetcher:
     
     def _get_from_cache(self, cache_key):
         """Get data from cache if valid"""
-        with self.cache_lock:
-            if cache_key in self.cache:
-                data, timestamp = self.cache[cache_key]
-                if time.time() - timestamp < self.cache_timeout:
-                    return data
-                else:
-                    del self.cache[cache_key]
-        return None
+        return self.cache.get(cache_key)
     
-    def _store_in_cache(self, cache_key, data):
+    def _store_in_cache(self, cache_key, data, ttl=None):
         """Store data in cache"""
-        with self.cache_lock:
-            self.cache[cache_key] = (data, time.time())
+        self.cache.set(cache_key, data, ttl=ttl)
+    
+    def _get_history_from_cache(self, symbol, days):
+        """Get a days window from cache, slicing a larger cached window if needed"""
+        return self.cache.get_window(self._get_cache_key('stock_data', symbol), days)
+    
+    def _store_history_in_cache(self, symbol, days, data, ttl=None):
+        """Store a days window of history in cache (kept until the next new bar by default)"""
+        ttl = self.history_cache_timeout if ttl is None else ttl
+        self.cache.set_window(self._get_cache_key('stock_data', symbol), days, data, ttl=ttl)
     
     def get_stock_data(self, symbol, days=30):
         """Get historical stock data with caching and fallback"""
-        cache_key = self._get_cache_key('stock_data', symbol, days)
-        
         # Try cache first
-        cached_data = self._get_from_cache(cache_key)
+        cached_data = self._get_history_from_cache(symbol, days)
         if cached_data is not None:
             print(f"📋 Using cached data for {symbol}")
             return cached_data
         
+        # Then the persistent store, if it is up to date
+        stored_data = self._get_from_store(symbol, days)
+        if stored_data is not None:
+            self._store_history_in_cache(symbol, days, stored_data)
+            print(f"💾 Using stored data for {symbol}")
+            return stored_data
+        
+        # Join an identical fetch already in flight instead of starting another
+        return self.inflight.do(self._get_cache_key('stock_data', symbol, days), self._fetch_stock_data, symbol, days)
+    
+    def _fetch_stock_data(self, symbol, days):
+        """Fetch a days window through the source chain, persist it, and fall back when it fails"""
         print(f"📊 Fetching {days} days data for {symbol}...")
         
         try:
-            # Apply rate limiting
-            self._enforce_rate_limit()
+            # Only fetch bars after the last stored one when we can
+            tail_start = self._get_store_tail_start(symbol, days)
             
-            # Try Yahoo Finance with timeout
-            data = self._fetch_from_yahoo_finance(symbol, days)
+            # Remote sources first, then stale stored history, then simulation
+            data, source = self.sources.get_history(symbol, days, start_date=tail_start)
             
-            if not data.empty and len(data) >= 5:
-                self._store_in_cache(cache_key, data)
-                print(f"✅ Yahoo Finance: {len(data)} days for {symbol}")
+            if not source.remote:
+                print(f"⚠️ Live sources failed for {symbol}, using {source.name} data")
+                self._store_history_in_cache(symbol, days, data, ttl=self.cache_timeout)
                 return data
             
-            # Fallback to realistic generated data
-            print(f"⚠️ Yahoo Finance failed for {symbol}, using realistic simulation")
-            fallback_data = self._generate_realistic_data(symbol, days)
-            self._store_in_cache(cache_key, fallback_data)
-            return fallback_data
+            if self.store:
+                added = self.store.append(symbol, data)
+                if tail_start is not None:
+                    print(f"💾 Appended {added} new bars for {symbol}")
+                data = self.store.get_window(symbol, days)
+            
+            self._store_history_in_cache(symbol, days, data)
+            print(f"✅ {source.name}: {len(data)} days for {symbol}")
+            return data
             
         except Exception as e:
             print(f"❌ Error fetching {symbol}: {e}")
@@ -137,13 +237,60 @@ class DataFetcher:
             # Return generated data as last resort
             return self._generate_realistic_data(symbol, days)
     
-    def _fetch_from_yahoo_finance(self, symbol, days):
-        """Fetch data from Yahoo Finance with enhanced error handling"""
+    def _get_from_store(self, symbol, days):
+        """Serve a window from the persistent store if it covers it and is current"""
+        if not self.store or self.store.count(symbol) < days:
+            return None
+        
+        if not self._is_store_current(self.store.last_timestamp(symbol)):
+            return None
+        
+        return self.store.get_window(symbol, days)
+    
+    def _get_store_tail_start(self, symbol, days):
+        """Start of an incremental tail fetch, or None when a full window is needed"""
+        if not self.store or self.store.count(symbol) < days:
+            return None
+        return self.store.last_timestamp(symbol)
+    
+    def _is_store_current(self, last_ts):
+        """Check whether stored bars include the latest completed session"""
+        if last_ts is None:
+            return False
+        
+        now = datetime.now()
+        expected = now.date()
+        
+        # Before the open (or at weekends) the latest bar is the previous weekday's
+        if now.weekday() >= 5 or now.time() < now.replace(hour=9, minute=15).time():
+            expected -= timedelta(days=1)
+            while expected.weekday() >= 5:
+                expected -= timedelta(days=1)
+        
+        last_date = pd.Timestamp(last_ts).date()
+        if last_date < expected:
+            return False
+        
+        # Today's bar is still forming while the market is open
+        return not (last_date == now.date() and self.is_market_open())
+    
+    def _fetch_from_yahoo_finance(self, symbol, days, start_date=None):
+        """Fetch data from Yahoo Finance with enhanced error handling
+        
+        With start_date set, only bars from that date on are fetched (an
+        incremental tail update) and no minimum length is enforced.
+        """
         try:
             yf_symbol = self.symbol_mapping.get(symbol, f"{symbol}.NS")
             
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days + 10)  # Buffer for weekends
+            if start_date is None:
+                start_date = end_date - timedelta(days=days + 10)  # Buffer for weekends
+                min_rows = 5
+            else:
+                start_date = pd.Timestamp(start_date).tz_localize(None).to_pydatetime()
+                days = None
+                min_rows = 1
             
             # Create ticker with timeout
             ticker = yf.Ticker(yf_symbol)
@@ -160,71 +307,196 @@ class DataFetcher:
             if data.empty:
                 raise ValueError(f"No data returned for {yf_symbol}")
             
-            # Data quality checks
-            if len(data) < 5:
-                raise ValueError(f"Insufficient data: {len(data)} days")
-            
-            if (data['Close'] <= 0).any():
-                raise ValueError("Invalid zero/negative prices found")
-            
-            # Standardize column names
-            data = data.rename(columns={
-                'Open': 'Open', 'High': 'High', 'Low': 'Low',
-                'Close': 'Close', 'Volume': 'Volume'
-            })
-            
-            # Clean data
-            data = data.dropna()
-            
-            # Ensure OHLC integrity
-            for i in range(len(data)):
-                row = data.iloc[i]
-                high_val = max(row['Open'], row['High'], row['Close'])
-                low_val = min(row['Open'], row['Low'], row['Close'])
-                data.iloc[i, data.columns.get_loc('High')] = high_val
-                data.iloc[i, data.columns.get_loc('Low')] = low_val
-            
-            # Return requested number of days
-            result = data[['Open', 'High', 'Low', 'Close', 'Volume']].tail(days)
-            return result
+            data, report = sanitize_ohlcv(data, symbol)
+            self.quality_reports[symbol] = report
             
+            return self._clean_yahoo_data(data, days, min_rows=min_rows, report=report)
+        
         except Exception as e:
             print(f"Yahoo Finance error for {symbol}: {e}")
             return pd.DataFrame()
     
+    def _clean_yahoo_data(self, data, days, min_rows=5, report=None):
+        """Validate and clean a single-symbol Yahoo Finance frame
+        
+        Pass a report from sanitize_universe when the frame was already
+        repaired as part of a batch.
+        """
+        if report is None:
+            data, report = sanitize_ohlcv(data)
+        
+        # Data quality checks
+        if len(data) < min_rows:
+            raise ValueError(f"Insufficient data: {len(data)} days")
+        
+        if report['rows_dropped'] or report['non_positive_fixed']:
+            print(f"🧹 Repaired bad bars: {report}")
+        
+        # Return requested number of days
+        result = data[['Open', 'High', 'Low', 'Close', 'Volume']]
+        return result.tail(days) if days else result
+    
+    def _fetch_batch_from_yahoo(self, symbols, days, start_date=None):
+        """Fetch several symbols in one Yahoo Finance download request"""
+        yf_symbols = {self.symbol_mapping.get(s, f"{s}.NS"): s for s in symbols}
+        
+        end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=days + 10)  # Buffer for weekends
+            min_rows = 5
+        else:
+            start_date = pd.Timestamp(start_date).tz_localize(None).to_pydatetime()
+            days = None
+            min_rows = 1
+        
+        raw = yf.download(
+            list(yf_symbols.keys()),
+            start=start_date,
+            end=end_date,
+            group_by='ticker',
+            auto_adjust=True,
+            prepost=False,
+            threads=True,
+            progress=False,
+            timeout=15
+        )
+        
+        results = {}
+        if raw is None or raw.empty:
+            return results
+        
+        raw_frames = {}
+        for yf_symbol, symbol in yf_symbols.items():
+            # Multi-ticker downloads are column-grouped by ticker
+            if isinstance(raw.columns, pd.MultiIndex):
+                if yf_symbol not in raw.columns.get_level_values(0):
+                    continue
+                data = raw[yf_symbol]
+            else:
+                data = raw
+            
+            data = data.dropna(how='all')
+            if not data.empty:
+                raw_frames[symbol] = data
+        
+        # Repair the whole batch in one vectorized pass
+        clean_frames, reports = sanitize_universe(raw_frames)
+        self.quality_reports.update(reports)
+        
+        for symbol, data in clean_frames.items():
+            try:
+                results[symbol] = self._clean_yahoo_data(data, days, min_rows=min_rows, report=reports[symbol])
+            except Exception as e:
+                logger.debug(f"Batch split error for {symbol}: {e}")
+                continue
+        
+        return results
+    
+    def _stale_ttl(self, fresh_ttl, max_staleness):
+        """How long an entry stays in cache: long enough to be served stale"""
+        return max(fresh_ttl, max_staleness) if self.stale_while_revalidate else fresh_ttl
+    
+    def _get_cached_or_stale(self, cache_key, fresh_ttl, max_staleness, refresh):
+        """Return (value, age) from cache, or (None, None) when a blocking fetch is needed
+        
+        A value older than fresh_ttl but younger than max_staleness is still
+        returned in stale-while-revalidate mode, and `refresh` is scheduled
+        in the background to replace it.
+        """
+        entry = self.cache.get_entry(cache_key)
+        if entry is None:
+            return None, None
+        
+        age = entry.age()
+        if age < fresh_ttl:
+            return entry.value, age
+        
+        if self.stale_while_revalidate and age < max_staleness:
+            self._refresh_in_background(cache_key, refresh)
+            return entry.value, age
+        
+        return None, None
+    
+    def _refresh_in_background(self, cache_key, refresh):
+        """Run `refresh` on the worker pool unless a refresh for this key is already running"""
+        refresh_key = self._get_cache_key('refresh', cache_key)
+        if refresh_key in self.inflight.in_flight():
+            return
+        
+        self.background_refreshes += 1
+        self.executor.submit(self._run_background_refresh, refresh_key, refresh)
+    
+    def _run_background_refresh(self, refresh_key, refresh):
+        try:
+            self.inflight.do(refresh_key, refresh)
+        except Exception as e:
+            logger.error(f"Background refresh error for {refresh_key}: {e}")
+    
     def get_current_price(self, symbol):
         """Get current price with smart caching"""
+        return self.get_quote(symbol)['price']
+    
+    def get_quote(self, symbol, max_age=None):
+        """Get current price with its age in seconds
+        
+        A fresh cached price is returned as is; in stale-while-revalidate mode
+        an expired one is returned immediately while it is refreshed in the
+        background. Pass max_age to force a blocking fetch for anything older,
+        even when that is inside the normal freshness window.
+        """
         cache_key = self._get_cache_key('current_price', symbol)
+        fresh_ttl = self.price_cache_timeout
+        max_staleness = self.max_price_staleness
+        if max_age is not None:
+            fresh_ttl = min(fresh_ttl, max_age)
+            max_staleness = max_age
         
-        # Check cache (1 minute timeout for current prices)
-        with self.cache_lock:
-            if cache_key in self.cache:
-                price, timestamp = self.cache[cache_key]
-                if time.time() - timestamp < 60:  # 1 minute cache
-                    return price
+        price, age = self._get_cached_or_stale(cache_key, fresh_ttl, max_staleness,
+                                               lambda: self._refresh_current_price(symbol))
+        if price is None:
+            price, age = self._refresh_current_price(symbol), 0.0
         
+        return self._make_quote(symbol, price, age)
+    
+    def _make_quote(self, symbol, price, age):
+        return {
+            'symbol': symbol,
+            'price': price,
+            'age_seconds': round(age, 1),
+            'stale': age >= self.price_cache_timeout
+        }
+    
+    def _refresh_current_price(self, symbol):
+        """Blocking price fetch through the source chain with simulated fallback"""
         try:
-            # Apply rate limiting
-            self._enforce_rate_limit()
-            
-            # Try real-time Yahoo Finance
-            price = self._get_yahoo_current_price(symbol)
-            
-            if price and price > 0:
-                self._store_in_cache(cache_key, price)
-                print(f"💰 Live price {symbol}: ₹{price:.2f}")
-                return price
-            
-            # Fallback to realistic simulation
-            simulated_price = self._generate_realistic_current_price(symbol)
-            self._store_in_cache(cache_key, simulated_price)
-            print(f"📊 Simulated price {symbol}: ₹{simulated_price:.2f}")
-            return simulated_price
+            price, source = self.inflight.do(self._get_cache_key('current_price', symbol), self._fetch_live_price, symbol)
+            return self._resolve_current_price(symbol, price, source)
             
         except Exception as e:
             print(f"⚠️ Current price error for {symbol}: {e}")
             return self._generate_realistic_current_price(symbol)
     
+    def _fetch_live_price(self, symbol):
+        """Price from the first healthy source in the chain; returns (price, source name)"""
+        price, source = self.sources.get_price(symbol)
+        return price, source.name
+    
+    def _resolve_current_price(self, symbol, price, source=None):
+        """Cache a fetched price, or fall back to (and cache) a simulated one"""
+        cache_key = self._get_cache_key('current_price', symbol)
+        ttl = self._stale_ttl(self.price_cache_timeout, self.max_price_staleness)
+        
+        if price and price > 0:
+            self._store_in_cache(cache_key, price, ttl=ttl)
+            print(f"💰 Price {symbol}: ₹{price:.2f} ({source})")
+            return price
+        
+        # Fallback to realistic simulation
+        simulated_price = self._generate_realistic_current_price(symbol)
+        self._store_in_cache(cache_key, simulated_price, ttl=ttl)
+        print(f"📊 Simulated price {symbol}: ₹{simulated_price:.2f}")
+        return simulated_price
+    
     def _get_yahoo_current_price(self, symbol):
         """Get current price from Yahoo Finance"""
         try:
@@ -252,125 +524,12 @@ class DataFetcher:
     
     def _generate_realistic_current_price(self, symbol):
         """Generate realistic current price with market simulation"""
-        base_price = self.base_prices.get(symbol, 1000.0)
-        
-        # Time-based factors
-        now = datetime.now()
-        market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
-        market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
-        
-        # Market hours volatility
-        if market_open <= now <= market_close:
-            # Higher volatility during market hours
-            volatility = 0.025  # 2.5%
-            volume_factor = 1.5
-        else:
-            # Lower volatility after hours
-            volatility = 0.008  # 0.8%
-            volume_factor = 0.3
-        
-        # Day-based trend (simulates weekly/monthly trends)
-        day_trend = np.sin(now.day * 0.2) * 0.01  # ±1% monthly cycle
-        
-        # Time-consistent randomness (same price within same minute)
-        minute_seed = int(now.timestamp() // 60)
-        np.random.seed(minute_seed + hash(symbol) % 1000)
-        
-        # Generate price movement
-        random_factor = np.random.normal(0, volatility)
-        trend_factor = day_trend
-        
-        # Apply factors
-        current_price = base_price * (1 + random_factor + trend_factor)
-        
-        # Ensure reasonable bounds (±10% from base)
-        min_price = base_price * 0.90
-        max_price = base_price * 1.10
-        current_price = max(min_price, min(max_price, current_price))
-        
-        return round(current_price, 2)
+        return self.synthetic.current_price(symbol, market_open=self.is_market_open())
     
     def _generate_realistic_data(self, symbol, days):
         """Generate highly realistic historical data"""
         try:
-            base_price = self.base_prices.get(symbol, 1000.0)
-            
-            # Generate trading days only (no weekends)
-            end_date = datetime.now().replace(hour=15, minute=30, second=0, microsecond=0)
-            dates = []
-            current_date = end_date - timedelta(days=days*2)
-            
-            while len(dates) < days:
-                if current_date.weekday() < 5:  # Monday=0, Friday=4
-                    dates.append(current_date)
-                current_date += timedelta(days=1)
-            
-            # Generate realistic price movements
-            np.random.seed(hash(symbol) % 1000)  # Consistent data for same symbol
-            
-            prices = []
-            current_price = base_price
-            
-            for i, date in enumerate(dates):
-                # Market regime simulation
-                progress = i / len(dates)
-                
-                if progress < 0.3:  # Early period - slight bearish
-                    trend = -0.0008
-                    volatility = 0.018
-                elif progress < 0.7:  # Middle period - consolidation
-                    trend = 0.0002
-                    volatility = 0.015
-                else:  # Recent period - bullish
-                    trend = 0.0012
-                    volatility = 0.022
-                
-                # Add weekly/monthly cycles
-                weekly_cycle = np.sin(i * 0.3) * 0.002
-                monthly_cycle = np.cos(i * 0.1) * 0.003
-                
-                # Daily return with trends and cycles
-                daily_return = np.random.normal(
-                    trend + weekly_cycle + monthly_cycle, 
-                    volatility
-                )
-                
-                # Update price
-                current_price *= (1 + daily_return)
-                
-                # Generate intraday OHLC
-                open_gap = np.random.normal(0, 0.004)  # Opening gap
-                open_price = current_price * (1 + open_gap)
-                
-                # Intraday range based on volatility
-                daily_range = abs(np.random.normal(0, volatility * 0.7))
-                high_price = max(open_price, current_price) * (1 + daily_range)
-                low_price = min(open_price, current_price) * (1 - daily_range)
-                
-                # Realistic volume (higher on volatile days)
-                base_volume = 400000 + (hash(symbol) % 500000)
-                volume_multiplier = 1 + abs(daily_return) * 8 + np.random.uniform(0.3, 1.8)
-                volume = int(base_volume * volume_multiplier)
-                
-                prices.append({
-                    'Open': round(open_price, 2),
-                    'High': round(high_price, 2),
-                    'Low': round(low_price, 2),
-                    'Close': round(current_price, 2),
-                    'Volume': volume
-                })
-            
-            # Create DataFrame
-            df = pd.DataFrame(prices, index=dates)
-            
-            # Final OHLC validation
-            for i in range(len(df)):
-                row = df.iloc[i]
-                high_val = max(row['Open'], row['High'], row['Close'])
-                low_val = min(row['Open'], row['Low'], row['Close'])
-                df.iloc[i, df.columns.get_loc('High')] = high_val
-                df.iloc[i, df.columns.get_loc('Low')] = low_val
-            
+            df = self.synthetic.generate(symbol, days)
             print(f"📈 Generated realistic data for {symbol}: {len(df)} days")
             return df
             
@@ -379,8 +538,183 @@ class DataFetcher:
             logger.error(f"Data generation error for {symbol}: {e}")
             return pd.DataFrame()
     
-    def get_multiple_stocks_data(self, symbols, days=30):
-        """Get data for multiple stocks efficiently"""
+    def get_intraday_data(self, symbol, days=5, include_partial=False):
+        """1m/5m/15m/60m bars for the last few sessions, all from one 1-minute download
+        
+        Returns {timeframe: frame} (empty frames when no intraday data is
+        available; Yahoo serves 1-minute bars for the last 7 days only).
+        """
+        cache_key = self._get_cache_key('intraday_bars', symbol, days)
+        minute_bars = self._get_from_cache(cache_key)
+        if minute_bars is None:
+            minute_bars = self.inflight.do(cache_key, self._fetch_minute_bars, symbol, days)
+            if not minute_bars.empty:
+                self._store_in_cache(cache_key, minute_bars, ttl=self.intraday_cache_timeout)
+        
+        resampler = self.resampler
+        if include_partial != resampler.include_partial:
+            resampler = BarResampler(resampler.timeframes, include_partial=include_partial)
+        return resampler.resample(minute_bars)
+    
+    def _fetch_minute_bars(self, symbol, days):
+        """Session 1-minute bars from Yahoo Finance (empty frame on failure)"""
+        try:
+            self._enforce_rate_limit()
+            yf_symbol = self.symbol_mapping.get(symbol, f"{symbol}.NS")
+            data = yf.Ticker(yf_symbol).history(period=f"{min(days, 7)}d", interval="1m",
+                                                auto_adjust=True, prepost=False, timeout=15)
+            if data.empty:
+                raise ValueError(f"No intraday data returned for {yf_symbol}")
+            
+            data, report = sanitize_ohlcv(data, symbol)
+            print(f"⏱️ {symbol}: {len(data)} one-minute bars")
+            return data[['Open', 'High', 'Low', 'Close', 'Volume']]
+        
+        except Exception as e:
+            print(f"Yahoo Finance intraday error for {symbol}: {e}")
+            return pd.DataFrame()
+    
+    def get_multiple_stocks_data(self, symbols, days=30, batched=True):
+        """Get data for multiple stocks efficiently
+        
+        With batched=True, symbols missing from the cache are downloaded in
+        groups of batch_size tickers per request; only the tickers a batch
+        could not return fall back to the per-symbol path.
+        """
+        if not batched:
+            return self._get_multiple_stocks_data_sequential(symbols, days)
+        
+        failed = []
+        
+        print(f"📊 Fetching data for {len(symbols)} symbols (batched)...")
+        
+        # Serve what we can from cache and the persistent store
+        stocks_data, pending = self._split_cached_symbols(symbols, days)
+        
+        # Download the rest in batches
+        fallback = []
+        batches = self._make_batches(pending)
+        
+        for batch_no, batch in enumerate(batches, 1):
+            batch_data, batch_fallback = self._download_batch_shared(batch, days, f"{batch_no}/{len(batches)}")
+            stocks_data.update(batch_data)
+            fallback.extend(batch_fallback)
+        
+        # Per-symbol fallback only for tickers the batch could not return
+        if fallback:
+            print(f"🔁 Falling back per symbol for {len(fallback)} tickers: {fallback}")
+            for symbol in fallback:
+                try:
+                    data = self.get_stock_data(symbol, days)
+                    if not data.empty:
+                        stocks_data[symbol] = data
+                    else:
+                        failed.append(symbol)
+                except Exception as e:
+                    failed.append(symbol)
+                    print(f"   ❌ {symbol}: {str(e)}")
+        
+        successful = len(stocks_data)
+        success_rate = (successful / len(symbols)) * 100 if symbols else 0
+        print(f"✅ Completed: {successful}/{len(symbols)} successful ({success_rate:.1f}%)")
+        
+        if failed:
+            print(f"⚠️ Failed: {failed}")
+        
+        # Preserve the caller's symbol order
+        return {symbol: stocks_data[symbol] for symbol in symbols if symbol in stocks_data}
+    
+    def _split_cached_symbols(self, symbols, days):
+        """Split symbols into (data served from cache/store, symbols still to download)"""
+        stocks_data = {}
+        pending = []
+        for symbol in symbols:
+            cached_data = self._get_history_from_cache(symbol, days)
+            if cached_data is None:
+                cached_data = self._get_from_store(symbol, days)
+                if cached_data is not None:
+                    self._store_history_in_cache(symbol, days, cached_data)
+            
+            if cached_data is not None:
+                stocks_data[symbol] = cached_data
+            else:
+                pending.append(symbol)
+        
+        if len(stocks_data):
+            print(f"📋 Using cached/stored data for {len(stocks_data)} symbols")
+        
+        return stocks_data, pending
+    
+    def _make_batches(self, symbols):
+        """Group symbols into batch_size download requests"""
+        return [symbols[start:start + self.batch_size] for start in range(0, len(symbols), self.batch_size)]
+    
+    def _download_batch_shared(self, batch, days, label=''):
+        """Rate-limited _download_batch, shared with identical batches already in flight"""
+        key = self._get_cache_key('batch', days, ','.join(sorted(batch)))
+        return self.inflight.do(key, self._download_batch_rate_limited, batch, days, label)
+    
+    def _download_batch_rate_limited(self, batch, days, label=''):
+        self._enforce_rate_limit()
+        return self._download_batch(batch, days, label)
+    
+    def _download_batch(self, batch, days, label=''):
+        """Download one batch, persist and cache it; returns (data, symbols needing fallback)
+        
+        The caller is responsible for rate limiting.
+        """
+        batch_start = time.time()
+        
+        # Incremental tail fetch when every symbol in the batch has stored history
+        tail_starts = [self._get_store_tail_start(symbol, days) for symbol in batch]
+        tail_start = min(tail_starts) if all(t is not None for t in tail_starts) else None
+        
+        def fetch():
+            data = self._fetch_batch_from_yahoo(batch, days, start_date=tail_start)
+            if not data:
+                raise ValueError("Empty batch response")
+            return data
+        
+        try:
+            # Gated by the Yahoo circuit so an outage fails over to the chain at once
+            batch_data = self.sources.call('yahoo', fetch)
+        except SourceUnavailable as e:
+            print(f"⚡ Batch {label} skipped: {e}")
+            batch_data = {}
+        except Exception as e:
+            print(f"⚠️ Batch {label} failed: {e}")
+            logger.error(f"Batch download error: {e}")
+            batch_data = {}
+        
+        elapsed = time.time() - batch_start
+        self.batch_stats.append({
+            'timestamp': datetime.now().isoformat(),
+            'symbols': len(batch),
+            'fetched': len(batch_data),
+            'seconds': round(elapsed, 3)
+        })
+        
+        print(f"   📦 Batch {label}: {len(batch_data)}/{len(batch)} symbols "
+              f"in {elapsed:.2f}s ({elapsed / len(batch):.3f}s/symbol)")
+        
+        stocks_data = {}
+        fallback = []
+        for symbol in batch:
+            data = batch_data.get(symbol)
+            if data is not None and not data.empty and self.store:
+                self.store.append(symbol, data)
+                data = self.store.get_window(symbol, days)
+            
+            if data is not None and len(data) >= min(days, 5):
+                self._store_history_in_cache(symbol, days, data)
+                stocks_data[symbol] = data
+            else:
+                fallback.append(symbol)
+        
+        return stocks_data, fallback
+    
+    def _get_multiple_stocks_data_sequential(self, symbols, days=30):
+        """Get data for multiple stocks one symbol at a time"""
         stocks_data = {}
         successful = 0
         failed = []
@@ -416,33 +750,215 @@ class DataFetcher:
         
         return stocks_data
     
+    def get_batch_stats(self):
+        """Get timing statistics for recent batched downloads"""
+        if not self.batch_stats:
+            return {'batches': 0}
+        
+        total_symbols = sum(b['symbols'] for b in self.batch_stats)
+        total_seconds = sum(b['seconds'] for b in self.batch_stats)
+        
+        return {
+            'batches': len(self.batch_stats),
+            'symbols_requested': total_symbols,
+            'symbols_fetched': sum(b['fetched'] for b in self.batch_stats),
+            'avg_batch_seconds': round(total_seconds / len(self.batch_stats), 3),
+            'avg_seconds_per_symbol': round(total_seconds / total_symbols, 4) if total_symbols else 0,
+            'recent': list(self.batch_stats)[-5:]
+        }
+    
+    async def get_multiple_stocks_data_async(self, symbols, days=30, max_concurrency=None, timeout=None):
+        """Async get_multiple_stocks_data with bounded concurrency
+        
+        Batches (and per-symbol fallbacks) run in worker threads, at most
+        max_concurrency at a time, each drawing a slot from the shared rate
+        budget. A request that misses its `timeout` deadline is abandoned and
+        served from stored history or simulation instead. Cancelling the
+        calling task cancels every pending request.
+        """
+        max_concurrency = max_concurrency or self.max_concurrent_requests
+        timeout = timeout or self.async_request_timeout
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        print(f"📊 Fetching data for {len(symbols)} symbols (async, {max_concurrency} concurrent)...")
+        stocks_data, pending = self._split_cached_symbols(symbols, days)
+        batches = self._make_batches(pending)
+        
+        async def fetch_batch(batch_no, batch):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        self._in_thread(self._download_batch_shared, batch, days, f"{batch_no}/{len(batches)}"),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    print(f"⏱️ Batch {batch_no}/{len(batches)} missed its {timeout}s deadline")
+                    return {}, list(batch)
+        
+        async def fetch_symbol(symbol):
+            async with semaphore:
+                try:
+                    return symbol, await asyncio.wait_for(self._in_thread(self.get_stock_data, symbol, days), timeout)
+                except asyncio.TimeoutError:
+                    print(f"⏱️ {symbol} missed its {timeout}s deadline")
+                    return symbol, self._get_deadline_fallback(symbol, days)
+        
+        fallback = []
+        for batch_data, batch_fallback in await asyncio.gather(
+                *(fetch_batch(batch_no, batch) for batch_no, batch in enumerate(batches, 1))):
+            stocks_data.update(batch_data)
+            fallback.extend(batch_fallback)
+        
+        # Per-symbol fallback only for tickers the batches could not return
+        if fallback:
+            print(f"🔁 Falling back per symbol for {len(fallback)} tickers: {fallback}")
+            for symbol, data in await asyncio.gather(*(fetch_symbol(symbol) for symbol in fallback)):
+                if data is not None and not data.empty:
+                    stocks_data[symbol] = data
+        
+        print(f"✅ Completed: {len(stocks_data)}/{len(symbols)} successful")
+        
+        # Preserve the caller's symbol order
+        return {symbol: stocks_data[symbol] for symbol in symbols if symbol in stocks_data}
+    
+    async def get_current_prices_async(self, symbols, max_concurrency=None, timeout=None):
+        """Fetch current prices for many symbols concurrently; returns {symbol: price}"""
+        quotes = await self.get_current_quotes_async(symbols, max_concurrency, timeout)
+        return {symbol: quote['price'] for symbol, quote in quotes.items()}
+    
+    async def get_current_quotes_async(self, symbols, max_concurrency=None, timeout=None):
+        """Fetch current quotes for many symbols concurrently; returns {symbol: quote}
+        
+        Cached (or, in stale-while-revalidate mode, stale) prices are returned
+        immediately. Live lookups share the rate budget and each one falls
+        back to a simulated price on error or when it misses its deadline.
+        """
+        max_concurrency = max_concurrency or self.max_concurrent_requests
+        timeout = timeout or self.async_request_timeout
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_price(symbol):
+            cached_price, age = self._get_cached_or_stale(
+                self._get_cache_key('current_price', symbol), self.price_cache_timeout,
+                self.max_price_staleness, lambda: self._refresh_current_price(symbol))
+            if cached_price is not None:
+                return symbol, self._make_quote(symbol, cached_price, age)
+            
+            async with semaphore:
+                try:
+                    price, source = await asyncio.wait_for(
+                        self._in_thread(self.inflight.do, self._get_cache_key('current_price', symbol),
+                                        self._fetch_live_price, symbol),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    print(f"⏱️ Price for {symbol} missed its {timeout}s deadline")
+                    price, source = None, None
+                except Exception as e:
+                    print(f"⚠️ Current price error for {symbol}: {e}")
+                    price, source = None, None
+            return symbol, self._make_quote(symbol, self._resolve_current_price(symbol, price, source), 0.0)
+        
+        return dict(await asyncio.gather(*(fetch_price(symbol) for symbol in symbols)))
+    
+    def _in_thread(self, func, *args):
+        """Run blocking I/O on the fetcher's worker pool
+        
+        A request abandoned at its deadline keeps its worker until the
+        underlying call returns, but nothing waits for it.
+        """
+        return asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+    
+    def _get_deadline_fallback(self, symbol, days):
+        """Data for a request that missed its deadline: stored history, else simulation"""
+        if self.store and self.store.count(symbol):
+            return self.store.get_window(symbol, days)
+        return self._generate_realistic_data(symbol, days)
+    
+    def _run_sync(self, coro):
+        """Run a coroutine to completion from synchronous code
+        
+        Uses a private event loop, or a helper thread when the caller is
+        already inside a running loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        
+        result = {}
+        
+        def runner():
+            try:
+                result['value'] = asyncio.run(coro)
+            except BaseException as e:
+                result['error'] = e
+        
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        thread.join()
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+    
+    def get_multiple_stocks_data_concurrent(self, symbols, days=30, max_concurrency=None, timeout=None):
+        """Synchronous wrapper around get_multiple_stocks_data_async"""
+        return self._run_sync(self.get_multiple_stocks_data_async(symbols, days, max_concurrency, timeout))
+    
+    def get_current_prices(self, symbols, max_concurrency=None, timeout=None):
+        """Synchronous wrapper around get_current_prices_async"""
+        return self._run_sync(self.get_current_prices_async(symbols, max_concurrency, timeout))
+    
+    def get_current_quotes(self, symbols, max_concurrency=None, timeout=None):
+        """Synchronous wrapper around get_current_quotes_async"""
+        return self._run_sync(self.get_current_quotes_async(symbols, max_concurrency, timeout))
+    
     def get_market_overview(self):
-        """Get comprehensive market overview"""
+        """Get comprehensive market overview (with its age in seconds)"""
         cache_key = self._get_cache_key('market_overview')
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
-            return cached_data
+        overview, age = self._get_cached_or_stale(cache_key, self.cache_timeout, self.max_overview_staleness,
+                                                  self._refresh_market_overview)
+        if overview is None:
+            overview, age = self._refresh_market_overview(), 0.0
+        
+        return dict(overview, age_seconds=round(age, 1), stale=age >= self.cache_timeout)
+    
+    def _refresh_market_overview(self):
+        """Blocking market overview fetch with simulated fallback"""
+        cache_key = self._get_cache_key('market_overview')
+        ttl = self._stale_ttl(self.cache_timeout, self.max_overview_staleness)
         
         try:
-            # Apply rate limiting
-            self._enforce_rate_limit()
-            
-            # Try to get real Nifty data
-            overview = self._fetch_nifty_data()
+            # Try to get real Nifty data (one fetch shared by concurrent callers)
+            overview = self.inflight.do(cache_key, self._fetch_market_overview)
             
             if overview:
-                self._store_in_cache(cache_key, overview)
+                self._store_in_cache(cache_key, overview, ttl=ttl)
                 return overview
             
             # Fallback to realistic simulation
             simulated_overview = self._generate_market_overview()
-            self._store_in_cache(cache_key, simulated_overview)
+            self._store_in_cache(cache_key, simulated_overview, ttl=ttl)
             return simulated_overview
             
         except Exception as e:
             print(f"⚠️ Market overview error: {e}")
             return self._generate_market_overview()
     
+    def _fetch_market_overview(self):
+        """Rate-limited Nifty overview fetch, gated by the Yahoo circuit (None when unavailable)"""
+        def fetch():
+            self._enforce_rate_limit()
+            overview = self._fetch_nifty_data()
+            if not overview:
+                raise ValueError("No index data returned")
+            return overview
+        
+        try:
+            return self.sources.call('yahoo', fetch)
+        except Exception:
+            return None
+    
     def _fetch_nifty_data(self):
         """Fetch real Nifty 50 data"""
         nifty_symbols = ['^NSEI', '^BSESN']  # NSE and BSE indices
@@ -479,31 +995,21 @@ class DataFetcher:
         """Generate realistic market overview"""
         # Base Nifty around current levels
         base_nifty = 19500.0
-        
-        # Time-consistent simulation
-        hour_seed = int(datetime.now().timestamp() // 3600)
-        np.random.seed(hour_seed)
-        
-        # Market movement simulation
-        daily_change = np.random.normal(0, 120)  # ±120 points typical range
-        current_nifty = base_nifty + daily_change
-        
-        # Ensure reasonable bounds
-        current_nifty = max(18000, min(21000, current_nifty))
+        current_nifty, daily_change, volume = self.synthetic.index_level(base_nifty)
         
         return {
             'nifty_price': round(current_nifty, 2),
             'nifty_change': round(daily_change, 2),
             'nifty_change_percent': round((daily_change / base_nifty) * 100, 2),
             'market_status': self._get_market_status(),
-            'volume': np.random.randint(3000000, 7000000),
+            'volume': volume,
             'data_source': 'Realistic Simulation',
             'last_updated': datetime.now().isoformat()
         }
     
-    def _get_market_status(self):
+    def _get_market_status(self, now=None):
         """Get accurate market status"""
-        now = datetime.now()
+        now = now or datetime.now()
         
         # Weekend check
         if now.weekday() >= 5:  # Saturday=5, Sunday=6
@@ -525,26 +1031,100 @@ class DataFetcher:
         else:
             return 'Closed'
     
-    def is_market_open(self):
+    def is_market_open(self, now=None):
         """Check if market is currently open"""
-        return self._get_market_status() == 'Open'
+        return self._get_market_status(now) == 'Open'
+    
+    def check_market_events(self, now=None):
+        """Detect market-hours events since the last check and invalidate the affected data
+        
+        Events: 'session_open' and 'session_close' on open/closed transitions,
+        and 'new_bar' when the date rolls over without an observed close (so
+        the previous session's final bar is picked up). Cheap enough to call
+        on every scheduler tick. Returns the list of events fired.
+        """
+        now = now or datetime.now()
+        state = (now.date(), self.is_market_open(now))
+        previous, self.market_state = self.market_state, state
+        if previous is None or previous == state:
+            return []
+        
+        (last_date, was_open), (today, is_open) = previous, state
+        events = []
+        if was_open and not is_open:
+            events.append('session_close')
+        elif today != last_date:
+            events.append('new_bar')
+        if is_open and not was_open:
+            events.append('session_open')
+        
+        for event in events:
+            self.on_market_event(event)
+        return events
+    
+    def on_market_event(self, event):
+        """Invalidate the cached data classes affected by a market event"""
+        data_classes = self.MARKET_EVENT_INVALIDATIONS.get(event)
+        if data_classes is None:
+            raise ValueError(f"Unknown market event: {event}")
+        
+        self.invalidate(*data_classes)
+        self.market_events.append({'event': event, 'timestamp': datetime.now().isoformat()})
+        print(f"🔔 Market event {event}: invalidated {', '.join(data_classes)}")
+    
+    def invalidate(self, *data_classes):
+        """Invalidate cached data by class ('history', 'quotes', 'overview'); returns new generations"""
+        generations = {}
+        for data_class in data_classes:
+            if data_class not in self.DATA_CLASSES:
+                raise ValueError(f"Unknown data class: {data_class}")
+            generations[data_class] = self.cache.invalidate(self.DATA_CLASSES[data_class])
+        return generations
+    
+    def add_zerodha_source(self, kite, instruments, rate_limiter=None):
+        """Put Zerodha (Kite Connect) at the front of the data source chain"""
+        self.sources.add(ZerodhaSource(kite, instruments, rate_limiter), position=0)
+        print(f"💎 Data sources: {' -> '.join(self.sources.names())}")
+    
+    def get_source_stats(self):
+        """Per-source circuit state, error rate and latency"""
+        return self.sources.get_stats()
+    
+    def get_data_quality_report(self, symbols=None):
+        """Get the latest ingest data-quality report per symbol"""
+        if symbols is None:
+            return dict(self.quality_reports)
+        return {symbol: self.quality_reports[symbol] for symbol in symbols if symbol in self.quality_reports}
     
     def clear_cache(self):
-        """Clear all cached data"""
-        with self.cache_lock:
-            cache_size = len(self.cache)
-            self.cache.clear()
+        """Clear all cached data (prefer invalidate() for a single data class)"""
+        cache_size = self.cache.clear()
         print(f"🗑️ Cleared {cache_size} cached entries")
     
     def get_cache_stats(self):
         """Get cache statistics for monitoring"""
-        with self.cache_lock:
-            return {
-                'cache_entries': len(self.cache),
-                'recent_requests': len(self.request_times),
-                'last_request': datetime.fromtimestamp(self.last_request_time).isoformat() if self.last_request_time else None,
-                'cache_hit_potential': len(self.cache) * self.cache_timeout
-            }
+        cache_stats = self.cache.get_stats()
+        return {
+            'cache_entries': cache_stats['entries'],
+            'cache_bytes': cache_stats['bytes'],
+            'cache_max_bytes': cache_stats['max_bytes'],
+            'hits': cache_stats['hits'],
+            'superset_hits': cache_stats['superset_hits'],
+            'misses': cache_stats['misses'],
+            'hit_rate': cache_stats['hit_rate'],
+            'evictions': cache_stats['evictions'],
+            'expirations': cache_stats['expirations'],
+            'coalesced_fetches': self.inflight.coalesced,
+            'background_refreshes': self.background_refreshes,
+            'invalidations': cache_stats['invalidations'],
+            'generations': {
+                data_class: cache_stats['generations'].get(namespace, 0)
+                for data_class, namespace in self.DATA_CLASSES.items()
+            },
+            'recent_market_events': list(self.market_events)[-5:],
+            'recent_requests': len(self.request_times),
+            'last_request': datetime.fromtimestamp(self.last_request_time).isoformat() if self.last_request_time else None
+        }
 
 # Test function to verify the enhanced data fetcher
 def test_enhanced_data_fetcher():
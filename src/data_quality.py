@@ -0,0 +1,121 @@
+# src/data_quality.py
+"""
+Vectorized OHLCV validation and repair for the data ingest path
+"""
+import logging
+import numpy as np
+import pandas as pd
+
+from src.schema import canonicalize_columns
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+def sanitize_universe(stocks_data):
+    """Validate and repair OHLCV frames for many symbols in one vectorized pass
+    
+    All frames are stacked into one (symbol, timestamp) frame and repaired
+    with whole-column operations:
+      - duplicate timestamps (keep the last bar)
+      - non-positive prices (treated as missing)
+      - NaN gaps (Close forward-filled per symbol, missing Open/High/Low
+        taken from Close, missing Volume set to 0; leading bars with no
+        price at all are dropped)
+      - High/Low clamped to contain Open and Close
+    
+    Column names are canonicalized (Open/High/Low/Close/Volume) here, once,
+    so downstream consumers never need to rename or copy.
+    
+    Returns (clean_data, reports) where both are dicts keyed by symbol.
+    """
+    frames = {symbol: canonicalize_columns(df) for symbol, df in stocks_data.items() if df is not None and not df.empty}
+    reports = {symbol: _empty_report() for symbol in stocks_data}
+    if not frames:
+        return {symbol: pd.DataFrame() for symbol in stocks_data}, reports
+    
+    panel = pd.concat(frames, names=['Symbol', None], sort=False)
+    symbol_level = panel.index.get_level_values(0)
+    rows_in = symbol_level.value_counts()
+    
+    # 1. Duplicate timestamps per symbol
+    duplicated = panel.index.duplicated(keep='last')
+    duplicates = pd.Series(duplicated, index=symbol_level).groupby(level=0).sum()
+    panel = panel[~duplicated].sort_index(level=[0, 1], sort_remaining=False)
+    
+    prices = [col for col in PRICE_COLUMNS if col in panel.columns]
+    by_symbol = panel.index.get_level_values(0)
+    
+    # 2. Record NaN gaps, then treat non-positive prices as gaps too
+    gap_rows = panel[prices].isna().any(axis=1)
+    if 'Volume' in panel.columns:
+        gap_rows |= panel['Volume'].isna()
+    gap_counts = gap_rows.groupby(by_symbol).sum()
+    
+    non_positive = panel[prices] <= 0
+    non_positive_counts = non_positive.any(axis=1).groupby(by_symbol).sum()
+    panel[prices] = panel[prices].mask(non_positive)
+    
+    # 3. Fill NaN gaps
+    if 'Close' in panel.columns:
+        panel['Close'] = panel['Close'].groupby(by_symbol).ffill()
+        for col in ['Open', 'High', 'Low']:
+            if col in panel.columns:
+                panel[col] = panel[col].fillna(panel['Close'])
+    panel[prices] = panel[prices].groupby(by_symbol).ffill()
+    
+    if 'Volume' in panel.columns:
+        panel['Volume'] = panel['Volume'].fillna(0)
+        if np.isfinite(panel['Volume'].to_numpy(dtype=float)).all():
+            panel['Volume'] = panel['Volume'].astype('int64')
+    
+    unrecoverable = panel[prices].isna().any(axis=1)
+    dropped = unrecoverable.groupby(by_symbol).sum()
+    panel = panel[~unrecoverable]
+    
+    # 4. High/Low must contain Open and Close
+    repaired = pd.Series(0, index=rows_in.index)
+    if all(col in panel.columns for col in PRICE_COLUMNS):
+        values = panel[PRICE_COLUMNS].to_numpy(dtype=float)
+        high = np.max(values[:, [0, 1, 3]], axis=1)
+        low = np.min(values[:, [0, 2, 3]], axis=1)
+        changed = (high != values[:, 1]) | (low != values[:, 2])
+        panel['High'] = high
+        panel['Low'] = low
+        repaired = pd.Series(changed, index=panel.index.get_level_values(0)).groupby(level=0).sum()
+    
+    clean = {symbol: group.droplevel(0) for symbol, group in panel.groupby(level=0, sort=False)}
+    
+    for symbol in frames:
+        report = reports[symbol]
+        report['rows_in'] = int(rows_in.get(symbol, 0))
+        report['duplicates_removed'] = int(duplicates.get(symbol, 0))
+        report['non_positive_fixed'] = int(non_positive_counts.get(symbol, 0))
+        report['gaps_filled'] = int(gap_counts.get(symbol, 0))
+        report['rows_dropped'] = int(dropped.get(symbol, 0))
+        report['high_low_repaired'] = int(repaired.get(symbol, 0))
+        report['rows_out'] = len(clean.get(symbol, ()))
+        report['clean'] = (report['rows_in'] == report['rows_out'] and
+                           not report['non_positive_fixed'] and
+                           not report['gaps_filled'] and
+                           not report['high_low_repaired'])
+    
+    clean_data = {symbol: clean.get(symbol, pd.DataFrame()) for symbol in stocks_data}
+    return clean_data, reports
+
+def sanitize_ohlcv(data, symbol='UNKNOWN'):
+    """Validate and repair a single OHLCV frame; returns (clean_frame, report)"""
+    clean_data, reports = sanitize_universe({symbol: data})
+    return clean_data[symbol], reports[symbol]
+
+def _empty_report():
+    return {
+        'rows_in': 0,
+        'rows_out': 0,
+        'duplicates_removed': 0,
+        'non_positive_fixed': 0,
+        'gaps_filled': 0,
+        'rows_dropped': 0,
+        'high_low_repaired': 0,
+        'clean': True
+    }
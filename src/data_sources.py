@@ -0,0 +1,345 @@
+# src/data_sources.py
+"""
+Pluggable market data sources chained behind per-source circuit breakers
+"""
+import time
+import threading
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from src.data_quality import sanitize_ohlcv
+
+logger = logging.getLogger(__name__)
+
+class SourceUnavailable(Exception):
+    """Raised when a source's circuit is open or no source can serve a request"""
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open probe -> closed
+    
+    While open every request is refused immediately. After recovery_timeout
+    a single probe request is let through (half-open); its success closes
+    the circuit and its failure opens it again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold=3, recovery_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.trips = 0
+        self.lock = threading.Lock()
+    
+    def allow_request(self):
+        """Whether a request may go to the source right now"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            
+            # Half-open: one probe at a time
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+    
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+class DataSource:
+    """A named source of daily history and/or live prices
+    
+    Methods return None when the source has nothing for the request (not a
+    failure) and raise on errors, which count against the circuit breaker.
+    History from remote sources is persisted to the local store.
+    """
+    
+    name = 'source'
+    remote = True
+    capabilities = ('history', 'price')
+    
+    def get_history(self, symbol, days, start_date=None):
+        """OHLCV frame for the last `days` bars (or bars from start_date on)"""
+        return None
+    
+    def get_price(self, symbol):
+        """Latest traded price"""
+        return None
+
+class ZerodhaSource(DataSource):
+    """Kite Connect quotes and daily candles"""
+    
+    name = 'zerodha'
+    
+    def __init__(self, kite, instruments, rate_limiter=None):
+        self.kite = kite
+        self.instruments = instruments
+        self.rate_limiter = rate_limiter
+    
+    def _wait_for_rate_limit(self):
+        if self.rate_limiter:
+            self.rate_limiter.wait_if_needed()
+            self.rate_limiter.record_call()
+    
+    def get_price(self, symbol):
+        if not self.instruments.get_instrument_token(symbol):
+            return None
+        
+        self._wait_for_rate_limit()
+        quote = self.kite.quote([f"NSE:{symbol}"])
+        if f"NSE:{symbol}" not in quote:
+            return None
+        return float(quote[f"NSE:{symbol}"]["last_price"])
+    
+    def get_history(self, symbol, days, start_date=None):
+        instrument_token = self.instruments.get_instrument_token(symbol)
+        if not instrument_token:
+            return None
+        
+        end_date = datetime.now()
+        if start_date is None:
+            from_date = end_date - timedelta(days=days + 10)  # Buffer for weekends
+        else:
+            from_date = pd.Timestamp(start_date).tz_localize(None).to_pydatetime()
+            days = None
+        
+        self._wait_for_rate_limit()
+        candles = self.kite.historical_data(
+            instrument_token=instrument_token,
+            from_date=from_date,
+            to_date=end_date,
+            interval="day"
+        )
+        if not candles:
+            raise ValueError(f"No candles returned for {symbol}")
+        
+        df = pd.DataFrame(candles)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('date')))
+        df = df.rename(columns={
+            'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
+        })
+        df, report = sanitize_ohlcv(df[['Open', 'High', 'Low', 'Close', 'Volume']], symbol)
+        return df.tail(days) if days else df
+
+class YahooSource(DataSource):
+    """Yahoo Finance via the DataFetcher's rate-limited helpers"""
+    
+    name = 'yahoo'
+    
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+    
+    def get_history(self, symbol, days, start_date=None):
+        self.fetcher._enforce_rate_limit()
+        data = self.fetcher._fetch_from_yahoo_finance(symbol, days, start_date=start_date)
+        if data is None or data.empty:
+            raise ValueError(f"No Yahoo Finance data for {symbol}")
+        return data
+    
+    def get_price(self, symbol):
+        self.fetcher._enforce_rate_limit()
+        price = self.fetcher._get_yahoo_current_price(symbol)
+        if not price or price <= 0:
+            raise ValueError(f"No Yahoo Finance price for {symbol}")
+        return price
+
+class StoreSource(DataSource):
+    """Stored (possibly stale) bar history
+    
+    History only: the last stored close can be days old, and a quote built
+    from it would look live to the trading engine, so price requests skip
+    this source.
+    """
+    
+    name = 'store'
+    remote = False
+    capabilities = ('history',)
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def get_history(self, symbol, days, start_date=None):
+        if self.store.count(symbol) < days:
+            return None
+        return self.store.get_window(symbol, days)
+
+class SyntheticSource(DataSource):
+    """Simulated market data; always available, last in the chain"""
+    
+    name = 'synthetic'
+    remote = False
+    
+    def __init__(self, synthetic, market_open=None):
+        self.synthetic = synthetic
+        self.market_open = market_open or (lambda: False)
+    
+    def get_history(self, symbol, days, start_date=None):
+        return self.synthetic.generate(symbol, days)
+    
+    def get_price(self, symbol):
+        return self.synthetic.current_price(symbol, market_open=self.market_open())
+
+class SourceStats:
+    """Call, error and latency counters for one source"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.empty = 0
+        self.failures = 0
+        self.short_circuits = 0
+        self.latencies = deque(maxlen=200)  # Recent call latencies in seconds
+        self.last_error = None
+    
+    def to_dict(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'empty': self.empty,
+            'failures': self.failures,
+            'short_circuits': self.short_circuits,
+            'error_rate': round(self.failures / self.calls * 100, 1) if self.calls else 0.0,
+            'avg_latency_ms': round(float(latencies.mean()), 1) if len(latencies) else None,
+            'p95_latency_ms': round(float(np.percentile(latencies, 95)), 1) if len(latencies) else None,
+            'last_error': self.last_error
+        }
+
+class DataSourceChain:
+    """Ordered data sources, each behind its own circuit breaker
+    
+    A request goes to the first source whose circuit allows it; a source
+    that errors (or has nothing) hands over to the next one immediately,
+    and a source with an open circuit is skipped without being called.
+    """
+    
+    def __init__(self, sources=None, failure_threshold=3, recovery_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.sources = []
+        self.breakers = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+        for source in sources or []:
+            self.add(source)
+    
+    def add(self, source, position=None):
+        """Add a source (at the end, or at a position in the chain)"""
+        with self.lock:
+            self.sources = [s for s in self.sources if s.name != source.name]
+            self.sources.insert(len(self.sources) if position is None else position, source)
+            self.breakers[source.name] = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+            self.stats[source.name] = SourceStats()
+    
+    def remove(self, name):
+        with self.lock:
+            self.sources = [s for s in self.sources if s.name != name]
+    
+    def get(self, name):
+        """Source by name, or None"""
+        return next((s for s in self.sources if s.name == name), None)
+    
+    def names(self):
+        return [s.name for s in self.sources]
+    
+    def call(self, name, func, *args, **kwargs):
+        """Run func against a named source's breaker, recording latency and errors
+        
+        Raises SourceUnavailable without calling func when the source is
+        missing or its circuit is open.
+        """
+        breaker = self.breakers.get(name)
+        if breaker is None or self.get(name) is None:
+            raise SourceUnavailable(f"Unknown data source: {name}")
+        
+        stats = self.stats[name]
+        if not breaker.allow_request():
+            stats.short_circuits += 1
+            raise SourceUnavailable(f"Circuit open for {name}")
+        
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.failures += 1
+            stats.last_error = str(e)
+            breaker.record_failure()
+            if breaker.state == CircuitBreaker.OPEN:
+                logger.warning(f"Circuit open for data source {name}: {e}")
+            raise
+        
+        stats.latencies.append(time.perf_counter() - started)
+        if result is None or (isinstance(result, pd.DataFrame) and result.empty):
+            stats.empty += 1
+        else:
+            stats.successes += 1
+        breaker.record_success()
+        return result
+    
+    def _first(self, capability, method, *args, **kwargs):
+        """Result of the first source that serves the request; returns (result, source)"""
+        for source in list(self.sources):
+            if capability not in source.capabilities:
+                continue
+            try:
+                result = self.call(source.name, getattr(source, method), *args, **kwargs)
+            except SourceUnavailable:
+                continue
+            except Exception as e:
+                logger.debug(f"{source.name} {capability} error: {e}")
+                continue
+            
+            if result is None or (isinstance(result, pd.DataFrame) and result.empty):
+                continue
+            return result, source
+        
+        raise SourceUnavailable(f"No data source could serve {capability} for {args[0] if args else ''}")
+    
+    def get_history(self, symbol, days, start_date=None):
+        """Daily history from the first healthy source; returns (frame, source)"""
+        return self._first('history', 'get_history', symbol, days, start_date=start_date)
+    
+    def get_price(self, symbol):
+        """Current price from the first healthy source; returns (price, source)"""
+        return self._first('price', 'get_price', symbol)
+    
+    def get_stats(self):
+        """Per-source circuit state, call counts, error rate and latency"""
+        stats = {}
+        for source in list(self.sources):
+            breaker = self.breakers[source.name]
+            stats[source.name] = dict(
+                self.stats[source.name].to_dict(),
+                state=breaker.state,
+                trips=breaker.trips,
+                remote=source.remote
+            )
+        return stats
@@ -0,0 +1,278 @@
+# src/data_store.py
+"""
+Persistent columnar OHLCV store - one memory-mapped NumPy file per column per symbol
+"""
+import io
+import os
+import json
+import shutil
+import threading
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class OHLCVStore:
+    """On-disk per-symbol bar history with incremental tail appends
+    
+    Layout: <root>/<SYMBOL>/{index,Open,High,Low,Close,Volume}.npy plus meta.json.
+    The index is stored as int64 nanoseconds (UTC for tz-aware data) and
+    columns are memory-mapped on read, so a window is served by slicing the
+    tail of each file instead of loading the full history.
+    
+    meta.json's row count is checked against every column on read, so a
+    symbol left half-written by a crash reads as empty (and is refetched)
+    rather than as misaligned columns.
+    """
+    
+    COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+    
+    def __init__(self, root='data/ohlcv'):
+        self.root = root
+        self.lock = threading.RLock()
+        self._meta = {}  # symbol -> meta dict (rows, tz, last_ts)
+        os.makedirs(self.root, exist_ok=True)
+    
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, symbol)
+    
+    def _read_meta(self, symbol):
+        """Read (and memoize) the metadata for a symbol"""
+        if symbol in self._meta:
+            return self._meta[symbol]
+        
+        meta_path = os.path.join(self._symbol_dir(symbol), 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            self._meta[symbol] = meta
+            return meta
+        except Exception as e:
+            logger.error(f"Store metadata error for {symbol}: {e}")
+            return None
+    
+    def _to_index(self, values, tz):
+        """Rebuild a DatetimeIndex from stored int64 nanoseconds"""
+        index = pd.to_datetime(np.asarray(values, dtype='int64'), unit='ns', utc=bool(tz))
+        if tz:
+            index = index.tz_convert(tz)
+        return pd.DatetimeIndex(index)
+    
+    def count(self, symbol):
+        """Number of stored bars for a symbol"""
+        with self.lock:
+            meta = self._read_meta(symbol)
+            return meta['rows'] if meta else 0
+    
+    def last_timestamp(self, symbol):
+        """Timestamp of the last stored bar, or None"""
+        with self.lock:
+            meta = self._read_meta(symbol)
+            if not meta or not meta['rows']:
+                return None
+            return self._to_index([meta['last_ts']], meta.get('tz'))[0]
+    
+    def load(self, symbol, rows=None):
+        """Load the stored history (or only its last `rows` bars)"""
+        with self.lock:
+            meta = self._read_meta(symbol)
+            if not meta or not meta['rows']:
+                return pd.DataFrame(columns=self.COLUMNS)
+            
+            symbol_dir = self._symbol_dir(symbol)
+            start = max(0, meta['rows'] - rows) if rows else 0
+            
+            try:
+                arrays = {name: np.load(os.path.join(symbol_dir, f'{name}.npy'), mmap_mode='r')
+                          for name in ['index'] + meta['columns']}
+                lengths = {name: len(values) for name, values in arrays.items()}
+                if set(lengths.values()) != {meta['rows']}:
+                    raise ValueError(f"column lengths {lengths} do not match {meta['rows']} rows")
+                index_values = np.array(arrays.pop('index')[start:])
+                columns = {col: np.array(values[start:]) for col, values in arrays.items()}
+            except Exception as e:
+                logger.error(f"Store read error for {symbol}: {e}")
+                return pd.DataFrame(columns=self.COLUMNS)
+            
+            return pd.DataFrame(columns, index=self._to_index(index_values, meta.get('tz')))
+    
+    def get_window(self, symbol, days):
+        """Serve the last `days` bars by slicing the stored columns"""
+        return self.load(symbol, rows=days)
+    
+    def write(self, symbol, data):
+        """Replace the stored history for a symbol"""
+        if data is None or data.empty:
+            return
+        
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        columns = [col for col in self.COLUMNS if col in data.columns]
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else None
+        index_ns = index.as_unit('ns').asi8
+        
+        with self.lock:
+            symbol_dir = self._symbol_dir(symbol)
+            
+            # Build the complete symbol directory beside the live one, then
+            # rename it into place: readers see the old set or the new set. A
+            # crash between the two renames leaves no directory (a refetch),
+            # never a mix of old and new columns.
+            new_dir = os.path.join(self.root, f'.{symbol}.new')
+            old_dir = os.path.join(self.root, f'.{symbol}.old')
+            shutil.rmtree(new_dir, ignore_errors=True)
+            os.makedirs(new_dir)
+            
+            arrays = {'index': index_ns}
+            arrays.update({col: data[col].to_numpy() for col in columns})
+            for name, values in arrays.items():
+                np.save(os.path.join(new_dir, f'{name}.npy'), values)
+            
+            meta = {
+                'rows': len(index_ns),
+                'columns': columns,
+                'tz': tz,
+                'last_ts': int(index_ns[-1])
+            }
+            with open(os.path.join(new_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            
+            self._meta.pop(symbol, None)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            if os.path.isdir(symbol_dir):
+                os.rename(symbol_dir, old_dir)
+            os.rename(new_dir, symbol_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            self._meta[symbol] = meta
+    
+    @staticmethod
+    def _npy_header(path, rows):
+        """(data offset, dtype, header for `rows` rows), or None when it cannot be patched in place"""
+        with open(path, 'rb') as f:
+            if np.lib.format.read_magic(f) != (1, 0):
+                return None
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            offset = f.tell()
+        if len(shape) != 1 or fortran_order:
+            return None
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {
+            'shape': (rows,), 'fortran_order': False, 'descr': np.lib.format.dtype_to_descr(dtype)
+        })
+        # np.save pads the header so the row count can grow without moving the data
+        if len(header.getvalue()) != offset:
+            return None
+        return offset, dtype, header.getvalue()
+    
+    def _append_tail(self, symbol, meta, data):
+        """Replace stored rows from data.index[0] on with data, touching only the tail of each file
+        
+        Returns False (nothing written) when the frame does not fit the stored
+        layout, so the caller can fall back to a full rewrite.
+        """
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz != meta.get('tz') or not set(meta['columns']) <= set(data.columns):
+            return False
+        
+        symbol_dir = self._symbol_dir(symbol)
+        stored_index = np.load(os.path.join(symbol_dir, 'index.npy'), mmap_mode='r')
+        keep = int(np.searchsorted(stored_index, index.as_unit('ns').asi8[0], side='left'))
+        del stored_index  # no live mapping while the file is truncated
+        
+        rows = keep + len(data)
+        arrays = {'index': index.as_unit('ns').asi8}
+        arrays.update({col: data[col].to_numpy() for col in meta['columns']})
+        plans = {}
+        for name, values in arrays.items():
+            path = os.path.join(symbol_dir, f'{name}.npy')
+            plan = self._npy_header(path, rows)
+            if plan is None or not np.can_cast(values.dtype, plan[1], casting='same_kind'):
+                return False
+            plans[name] = (path, plan, values)
+        
+        # A crash from here until meta.json is replaced leaves lengths that
+        # disagree with meta['rows'], which load() reports as no history
+        for path, (offset, dtype, header), values in plans.values():
+            with open(path, 'r+b') as f:
+                f.seek(offset + keep * dtype.itemsize)
+                f.truncate()
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+                f.seek(0)
+                f.write(header)
+        
+        meta = dict(meta, rows=rows, last_ts=int(arrays['index'][-1]))
+        meta_path = os.path.join(symbol_dir, 'meta.json')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        self._meta[symbol] = meta
+        return True
+    
+    def append(self, symbol, data):
+        """Merge newly fetched bars into the stored history
+        
+        Stored bars at or after the frame's first bar are dropped (the last
+        bar of a session may still have been forming) and the frame's bars
+        are appended to each column file in place, so an update writes only
+        the tail. A frame that starts after the stored history ends would
+        leave a gap, so it replaces the history instead. Returns the number
+        of bars added.
+        """
+        if data is None or data.empty:
+            return 0
+        
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        with self.lock:
+            existing_rows = self.count(symbol)
+            last_ts = self.last_timestamp(symbol)
+            
+            if last_ts is not None and data.index[0] <= last_ts:
+                if not self._append_tail(symbol, self._read_meta(symbol), data):
+                    existing = self.load(symbol)
+                    combined = pd.concat([existing[existing.index < data.index[0]],
+                                          data[existing.columns.intersection(data.columns)]])
+                    self.write(symbol, combined)
+            else:
+                if last_ts is not None:
+                    print(f"⚠️ Non-contiguous bars for {symbol}, replacing stored history")
+                    existing_rows = 0
+                self.write(symbol, data)
+            
+            return self.count(symbol) - existing_rows
+    
+    def delete(self, symbol):
+        """Remove a symbol from the store"""
+        with self.lock:
+            self._meta.pop(symbol, None)
+            shutil.rmtree(self._symbol_dir(symbol), ignore_errors=True)
+    
+    def symbols(self):
+        """List stored symbols"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith('.') and os.path.exists(os.path.join(self.root, name, 'meta.json'))
+        )
+    
+    def get_stats(self):
+        """Get store statistics for monitoring"""
+        symbols = self.symbols()
+        total_bytes = 0
+        for symbol in symbols:
+            symbol_dir = self._symbol_dir(symbol)
+            total_bytes += sum(
+                os.path.getsize(os.path.join(symbol_dir, name)) for name in os.listdir(symbol_dir)
+            )
+        
+        return {
+            'symbols': len(symbols),
+            'total_bars': sum(self.count(symbol) for symbol in symbols),
+            'disk_bytes': total_bytes,
+            'root': self.root
+        }
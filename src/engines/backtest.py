@@ -35,18 +35,20 @@ class BacktestEngine:
             print(f"💰 Initial Capital: ₹{initial_capital:,.2f}")
             
             # Get historical data for backtesting
-            stocks_data = {}
+            raw_data = {}
             for symbol in symbols:
                 try:
                     data = self.data_fetcher.get_stock_data(symbol, days=days+10)
                     if not data.empty:
-                        # Add technical indicators
-                        enhanced_data = self.indicators.add_all_indicators(data)
-                        stocks_data[symbol] = enhanced_data
+                        raw_data[symbol] = data
                 except Exception as e:
                     print(f"⚠️ Could not get data for {symbol}: {e}")
                     continue
             
+            # Add the indicators the signal rules read, every symbol in one pass (cached frames reused)
+            columns = self.signal_generator.indicator_columns
+            stocks_data = self.indicators.add_indicators_many(raw_data, columns) if raw_data else {}
+            
             if not stocks_data:
                 print("❌ No data available for backtesting")
                 return self._generate_fallback_results(initial_capital)
@@ -79,6 +81,14 @@ class BacktestEngine:
         total_trades = 0
         profitable_trades = 0
         
+        # Every rule on every bar in one pass, when the generator supports it
+        signal_matrix = None
+        if hasattr(self.signal_generator, 'evaluate_history'):
+            try:
+                signal_matrix = self.signal_generator.evaluate_history(stocks_data)
+            except Exception as e:
+                print(f"⚠️ Signal matrix unavailable, generating per day: {e}")
+        
         for day in range(min(days, 20)):  # Simulate up to 20 trading days
             for symbol, data in stocks_data.items():
                 if len(data) < day + 5:
@@ -86,8 +96,16 @@ class BacktestEngine:
                 
                 # Get signals from signal generator
                 try:
-                    current_data = data.iloc[-(days-day):] if day < days else data
-                    signals = self.signal_generator.generate_signals({symbol: current_data})
+                    if signal_matrix is not None:
+                        # Signals as of this simulated day's bar
+                        bar = len(data) - days + day
+                        if bar < 0 or symbol not in signal_matrix.symbol_columns:
+                            continue
+                        signals = self.signal_generator.rank_signals(
+                            signal_matrix.signals_at(data.index[bar], [symbol]))
+                    else:
+                        current_data = data.iloc[-(days-day):] if day < days else data
+                        signals = self.signal_generator.generate_signals({symbol: current_data})
                     
                     for signal in signals:
                         if random.random() > 0.7:  # 30% chance to execute signal
@@ -25,6 +25,7 @@ class PaperTradingEngine:
         self.commission_rate = 0.1  # 0.1%
         self.max_positions = 5
         self.risk_per_trade = 2.0  # 2%
+        self.max_quote_age = 120  # Oldest quote (seconds) a trade may execute on
         
         # Initialize portfolio
         self.portfolio = PaperPortfolio(self.initial_capital)
@@ -204,14 +205,15 @@ class PaperTradingEngine:
             
             print(f"🔄 Executing {action} for {symbol} (confidence: {confidence}%)")
             
-            # Get current price
-            current_price = self._get_current_price(symbol)
+            # Get current price, refetched if the cached quote is too old to trade on
+            current_price, price_age = self._get_trade_quote(symbol)
             if not current_price or current_price <= 0:
                 print(f"❌ Invalid price for {symbol}: {current_price}")
                 return None
             
             # Update signal with current price
             signal['price'] = current_price
+            signal['price_age_seconds'] = price_age
             
             if action == 'BUY':
                 return self._execute_buy_trade(signal)
@@ -372,6 +374,18 @@ class PaperTradingEngine:
             logger.error(f"Sell trade error: {e}")
             return None
 
+    def _get_trade_quote(self, symbol):
+        """Get (price, age in seconds) no older than max_quote_age for trade execution"""
+        if self.data_fetcher and hasattr(self.data_fetcher, 'get_quote'):
+            try:
+                quote = self.data_fetcher.get_quote(symbol, max_age=self.max_quote_age)
+                if quote['price'] and quote['price'] > 0:
+                    return float(quote['price']), quote['age_seconds']
+            except Exception as e:
+                logger.error(f"Quote fetch error for {symbol}: {e}")
+        
+        return self._get_current_price(symbol), 0.0
+
     def _get_current_price(self, symbol):
         """Get current price with fallback methods"""
         try:
@@ -468,10 +482,18 @@ class PaperTradingEngine:
     def _update_portfolio_positions(self):
         """Update current prices for all positions"""
         try:
-            for symbol in list(self.portfolio.positions.keys()):
-                current_price = self._get_current_price(symbol)
+            symbols = list(self.portfolio.positions.keys())
+            
+            # Fetch all position quotes concurrently when the fetcher supports it
+            quotes = {}
+            if symbols and hasattr(self.data_fetcher, 'get_current_quotes'):
+                quotes = self.data_fetcher.get_current_quotes(symbols)
+            
+            for symbol in symbols:
+                quote = quotes.get(symbol, {})
+                current_price = quote.get('price') or self._get_current_price(symbol)
                 if current_price:
-                    self.portfolio.update_position_price(symbol, current_price)
+                    self.portfolio.update_position_price(symbol, current_price, quote.get('age_seconds', 0.0))
                     
                     # Update in database
                     self._update_position_price_in_db(symbol, current_price)
@@ -552,6 +574,7 @@ class PaperTradingEngine:
                     'quantity': pos['quantity'],
                     'entry_price': pos['entry_price'],
                     'current_price': pos['current_price'],
+                    'price_age_seconds': pos.get('price_age_seconds'),
                     'unrealized_pnl': unrealized_pnl,
                     'stop_loss': pos['stop_loss'],
                     'target_price': pos['target_price'],
@@ -817,10 +840,11 @@ class PaperPortfolio:
             logger.error(f"Sell position error: {e}")
             return False
     
-    def update_position_price(self, symbol, price):
-        """Update current price of a position"""
+    def update_position_price(self, symbol, price, price_age=None):
+        """Update current price of a position (and how old that quote is, in seconds)"""
         if symbol in self.positions:
             self.positions[symbol]['current_price'] = price
+            self.positions[symbol]['price_age_seconds'] = price_age
 
 # Test the enhanced paper trading engine
 if __name__ == "__main__":
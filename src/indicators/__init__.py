@@ -4,5 +4,17 @@ Technical indicators package
 """
 
 from .technical import TechnicalIndicators
+from .rolling import rolling_min, rolling_max, rolling_std, rolling_mad, rolling_array
+from .panel import IndicatorPanel, PanelIndicators
+from .cache import IndicatorCache, parameter_hash
+from .registry import IndicatorRegistry, IndicatorSpec, register_builtin_indicators
+from .streaming import IndicatorState, StreamingIndicators
+from src.schema import CANONICAL_COLUMNS, canonicalize_columns
+from .schema import memory_report
+from .breadth import BreadthEngine
 
-__all__ = ['TechnicalIndicators']
+__all__ = ['TechnicalIndicators', 'rolling_min', 'rolling_max', 'rolling_std', 'rolling_mad',
+           'rolling_array', 'IndicatorPanel', 'PanelIndicators', 'IndicatorCache', 'parameter_hash',
+           'IndicatorRegistry', 'IndicatorSpec', 'register_builtin_indicators',
+           'IndicatorState', 'StreamingIndicators', 'CANONICAL_COLUMNS', 'canonicalize_columns',
+           'memory_report', 'BreadthEngine']
@@ -0,0 +1,155 @@
+# src/indicators/breadth.py
+"""
+Cross-sectional market breadth over a (time x symbol) panel in one pass
+"""
+import warnings
+import numpy as np
+import pandas as pd
+
+from src.schema import canonicalize_columns
+from .rolling import rolling_array
+from .panel import PanelIndicators, _shift
+
+HISTORY_COLUMNS = ['active', 'above_ema', 'pct_above_ema', 'mean_rsi', 'dispersion', 'advances', 'declines',
+                   'ad_line', 'volatility', 'volume_trend', 'momentum']
+
+class BreadthEngine:
+    """Breadth and aggregate statistics for a universe, for every bar and the latest one
+    
+    EMA_20 and RSI come from the panel indicator pass; returns, volatility,
+    volume trend and momentum are computed on the same (time x symbol)
+    arrays, each symbol on its own bar sequence. Cross-sections then reduce
+    across symbols row by row. A symbol counts towards a row once it has
+    min_bars bars and has a bar on that row.
+    """
+    
+    def __init__(self, technical_indicators=None, min_bars=20, volatility_window=20,
+                 volume_windows=(10, 20), momentum_bars=10):
+        # Shared TechnicalIndicators (its panel pass and dtype), else a plain PanelIndicators
+        self.technical_indicators = technical_indicators
+        self.min_bars = min_bars
+        self.volatility_window = volatility_window
+        self.volume_windows = volume_windows
+        self.momentum_bars = momentum_bars
+    
+    def build_panel(self, stocks_data):
+        """Panel with EMA_20/RSI plus the per-symbol breadth inputs"""
+        frames = {
+            symbol: canonicalize_columns(data)
+            for symbol, data in stocks_data.items()
+            if data is not None and not data.empty
+        }
+        if self.technical_indicators is not None:
+            panel = self.technical_indicators.add_all_indicators_panel(frames, ['EMA_20', 'RSI'])
+        else:
+            panel = PanelIndicators().compute(frames, ['EMA_20', 'RSI'])
+        if 'Close' not in panel:
+            return panel
+        
+        fields = panel.packed(['Close', 'Volume'])
+        close = fields['Close']
+        out = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = close / _shift(close) - 1
+            out['Return'] = returns
+            out['Volatility'] = rolling_array(returns, self.volatility_window, 'std') * 100
+            # Change since the bar momentum_bars - 1 bars back, as iloc[-momentum_bars] reads it
+            out['Momentum'] = (close / _shift(close, self.momentum_bars - 1) - 1) * 100
+            out['Bars'] = np.cumsum(~np.isnan(close), axis=0).astype(float)
+            if 'Volume' in fields:
+                short, long = self.volume_windows
+                volume = fields['Volume']
+                out['Volume_Trend'] = rolling_array(volume, short, 'mean') / rolling_array(volume, long, 'mean')
+        panel.columns.update(panel.unpack(out))
+        return panel
+    
+    def history(self, panel):
+        """Breadth for every row of the panel (DataFrame indexed by time)"""
+        if 'Close' not in panel or not panel.symbols:
+            return pd.DataFrame(columns=HISTORY_COLUMNS, dtype=float)
+        
+        close = panel['Close']
+        active = ~np.isnan(close) & (panel['Bars'] >= self.min_bars)
+        returns = np.where(active, panel['Return'], np.nan)
+        above = active & (close > panel['EMA_20'])
+        advances = (returns > 0).sum(axis=1)
+        declines = (returns < 0).sum(axis=1)
+        counts = active.sum(axis=1)
+        
+        with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+            warnings.simplefilter('ignore', RuntimeWarning)  # rows with no active symbol
+            history = pd.DataFrame({
+                'active': counts,
+                'above_ema': above.sum(axis=1),
+                'pct_above_ema': above.sum(axis=1) / counts * 100,
+                'mean_rsi': self._mean(panel['RSI'], active),
+                'dispersion': np.nanstd(returns, axis=1) * 100,
+                'advances': advances,
+                'declines': declines,
+                'ad_line': np.cumsum(advances - declines),
+                'volatility': self._mean(panel['Volatility'], active),
+                'volume_trend': self._mean(panel['Volume_Trend'], active) if 'Volume_Trend' in panel else np.nan,
+                'momentum': self._mean(panel['Momentum'], active)
+            }, index=panel.index)
+        return history
+    
+    @staticmethod
+    def _mean(values, active):
+        return np.nanmean(np.where(active, values, np.nan), axis=1)
+    
+    def latest(self, panel, total_symbols=None):
+        """Regime indicators from each symbol's own last bar
+        
+        Same keys and fallbacks as the per-symbol loop: market_breadth is the
+        share of all total_symbols above their EMA_20, and averages skip
+        symbols with fewer than min_bars bars or an undefined value.
+        """
+        total = len(panel.symbols) if total_symbols is None else total_symbols
+        indicators = {
+            'stocks_above_ema': 0,
+            'average_rsi': 50,
+            'market_breadth': 0,
+            'volatility': 0,
+            'volume_trend': 0,
+            'price_momentum': 0,
+            'total_stocks': total
+        }
+        if 'Close' not in panel or not panel.symbols:
+            return indicators
+        
+        last_rows = np.array([panel.positions[symbol][-1] for symbol in panel.symbols], dtype=int)
+        symbol_columns = np.arange(len(panel.symbols))
+        
+        def last(name):
+            if name not in panel:
+                return np.full(len(panel.symbols), np.nan)
+            return panel[name][last_rows, symbol_columns]
+        
+        eligible = last('Bars') >= self.min_bars
+        close, ema = last('Close'), last('EMA_20')
+        above = int((eligible & (close > ema)).sum())
+        returns = last('Return')[eligible]
+        
+        def mean(name, default):
+            values = last(name)[eligible]
+            values = values[~np.isnan(values)]
+            return float(np.mean(values)) if len(values) else default
+        
+        indicators.update({
+            'stocks_above_ema': above,
+            'average_rsi': mean('RSI', 50),
+            'market_breadth': above / total * 100 if total else 50,
+            'volatility': mean('Volatility', 2.0),
+            'volume_trend': mean('Volume_Trend', 1.0),
+            'price_momentum': mean('Momentum', 0),
+            'advances': int((returns > 0).sum()),
+            'declines': int((returns < 0).sum()),
+            'dispersion': float(np.nanstd(returns) * 100) if (~np.isnan(returns)).any() else 0.0,
+            'as_of': str(panel.index[last_rows.max()])
+        })
+        return indicators
+    
+    def compute(self, stocks_data):
+        """{'history': per-bar breadth DataFrame, 'latest': regime indicator dict}"""
+        panel = self.build_panel(stocks_data)
+        return {'history': self.history(panel), 'latest': self.latest(panel, len(stocks_data))}
@@ -0,0 +1,126 @@
+# src/indicators/cache.py
+"""
+Memoized indicator frames keyed by symbol, last bar, bar count and parameters
+"""
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+from .schema import memory_report
+
+def parameter_hash(name, params=None):
+    """Stable short hash of an indicator set's name and parameters"""
+    payload = json.dumps([name, params or {}], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+class IndicatorCache:
+    """Thread-safe LRU of computed indicator frames within a byte budget
+    
+    A frame is identified by (symbol, last bar timestamp, bar count,
+    parameter hash) plus the last close, so a new bar - or a revised last
+    bar - is a miss while every other consumer of the same history in the
+    session gets the frame already computed. No TTL: the key itself changes
+    when the data does.
+    
+    Hits return a shallow copy, so a consumer adding or overwriting columns
+    never changes the cached frame.
+    """
+    
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (frame, size)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(symbol, data, params_hash):
+        """Cache key for a symbol's OHLCV history and an indicator parameter hash"""
+        if data is None or data.empty:
+            return None
+        close = data['Close'].iloc[-1] if 'Close' in data.columns else None
+        return (symbol, data.index[-1], len(data), params_hash, close)
+    
+    @staticmethod
+    def estimate_size(frame):
+        return int(frame.memory_usage(index=True, deep=False).sum())
+    
+    def get(self, key):
+        """Cached frame for a key, or None"""
+        return self.get_first([key])
+    
+    def get_first(self, keys):
+        """Cached frame for the first key present (one lookup in the counters), or None"""
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key) if key is not None else None
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0].copy(deep=False)
+            self.misses += 1
+            return None
+    
+    def set(self, key, frame):
+        """Store a computed frame, evicting least recently used ones over budget"""
+        if key is None or not isinstance(frame, pd.DataFrame):
+            return
+        size = self.estimate_size(frame)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (frame, size)
+            self.total_bytes += size
+            
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def get_or_compute(self, symbol, data, params_hash, compute):
+        """Cached frame for this history, computing and storing it on a miss"""
+        key = self.make_key(symbol, data, params_hash)
+        frame = self.get(key)
+        if frame is None:
+            frame = compute(data)
+            self.set(key, frame)
+            if isinstance(frame, pd.DataFrame):
+                frame = frame.copy(deep=False)
+        return frame
+    
+    def clear(self):
+        """Remove all entries; returns how many were removed"""
+        with self.lock:
+            count = len(self.entries)
+            self.entries.clear()
+            self.total_bytes = 0
+            return count
+    
+    def memory_report(self):
+        """Bytes per symbol of the cached frames (latest entry per symbol)"""
+        with self.lock:
+            frames = {key[0]: frame for key, (frame, _) in self.entries.items()}
+        return memory_report(frames)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def get_stats(self):
+        """Get hit/miss/eviction counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0.0,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,344 @@
+# src/indicators/panel.py
+"""
+Panel (time x symbol) indicator computation for a whole universe in one pass
+"""
+import numpy as np
+import pandas as pd
+
+from .rolling import rolling_array
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class IndicatorPanel:
+    """OHLCV fields and indicator columns as C-contiguous (time x symbol) float arrays
+    
+    Rows are the union of every symbol's timestamps; a symbol has NaN in the
+    rows before its first bar and in any row it has no bar for.
+    """
+    
+    def __init__(self, index, symbols, columns, positions):
+        self.index = index
+        self.symbols = list(symbols)
+        self.columns = columns        # name -> (time x symbol) array
+        self.positions = positions    # symbol -> row positions of its own bars
+        self.symbol_columns = {symbol: j for j, symbol in enumerate(self.symbols)}
+    
+    @classmethod
+    def from_frames(cls, stocks_data, fields=FIELDS):
+        """Align per-symbol OHLCV frames into one (time x symbol) matrix per field"""
+        symbols = [symbol for symbol, data in stocks_data.items() if data is not None and not data.empty]
+        if not symbols:
+            return cls(pd.Index([]), [], {}, {})
+        
+        index = stocks_data[symbols[0]].index
+        for symbol in symbols[1:]:
+            other = stocks_data[symbol].index
+            if not other.equals(index):
+                index = index.union(other)
+        
+        # One (field x time x symbol) block; every field is a C-contiguous slice of it
+        fields = [field for field in fields if all(field in stocks_data[symbol].columns for symbol in symbols)]
+        cube = np.full((len(fields), len(index), len(symbols)), np.nan)
+        positions = {}
+        for j, symbol in enumerate(symbols):
+            data = stocks_data[symbol]
+            rows = np.arange(len(index)) if data.index.equals(index) else index.get_indexer(data.index)
+            positions[symbol] = rows
+            for k, field in enumerate(fields):
+                cube[k, rows, j] = data[field].to_numpy(dtype=float)
+        
+        columns = {field: cube[k] for k, field in enumerate(fields)}
+        return cls(index, symbols, columns, positions)
+    
+    def __getitem__(self, name):
+        return self.columns[name]
+    
+    def __contains__(self, name):
+        return name in self.columns
+    
+    def gapped_symbols(self):
+        """Column numbers of symbols whose bars are not the trailing rows of the index"""
+        n_rows = len(self.index)
+        gapped = []
+        for j, symbol in enumerate(self.symbols):
+            rows = self.positions[symbol]
+            if len(rows) and (rows[-1] != n_rows - 1 or rows[-1] - rows[0] != len(rows) - 1):
+                gapped.append(j)
+        return gapped
+    
+    def packed(self, names):
+        """Columns with each symbol's bars packed against the last row
+        
+        Indicators computed on the packed layout see every symbol's own bar
+        sequence, so a day one symbol did not trade never opens a NaN hole in
+        its rolling windows. Returns the layout itself when nothing is gapped.
+        """
+        gapped = self.gapped_symbols()
+        if not gapped:
+            return {name: self.columns[name] for name in names if name in self.columns}
+        
+        packed = {}
+        for name in names:
+            if name not in self.columns:
+                continue
+            values = self.columns[name].copy()
+            for j in gapped:
+                rows = self.positions[self.symbols[j]]
+                bars = values[rows, j]
+                values[:, j] = np.nan
+                values[len(values) - len(rows):, j] = bars
+            packed[name] = values
+        return packed
+    
+    def unpack(self, columns):
+        """Scatter packed columns back onto the panel's time rows"""
+        gapped = self.gapped_symbols()
+        if not gapped:
+            return columns
+        
+        unpacked = {}
+        for name, values in columns.items():
+            fill = np.nan if values.dtype.kind == 'f' else 0
+            result = values.copy()
+            for j in gapped:
+                rows = self.positions[self.symbols[j]]
+                bars = values[len(values) - len(rows):, j]
+                result[:, j] = fill
+                result[rows, j] = bars
+            unpacked[name] = result
+        return unpacked
+    
+    def series(self, name, symbol):
+        """One column for one symbol, on that symbol's own bars"""
+        rows = self.positions[symbol]
+        return pd.Series(self.columns[name][rows, self.symbol_columns[symbol]], index=self.index[rows], name=name)
+    
+    def frame(self, symbol, data=None, columns=None):
+        """Per-symbol frame of panel columns (appended to `data` when given)
+        
+        Lets the per-symbol consumers keep reading a DataFrame while the
+        indicators themselves come from the single panel pass.
+        """
+        rows = self.positions[symbol]
+        j = self.symbol_columns[symbol]
+        names = columns
+        if names is None:
+            names = [name for name in self.columns if data is None or name not in FIELDS]
+        values = pd.DataFrame({name: self.columns[name][rows, j] for name in names}, index=self.index[rows])
+        if data is None:
+            return values
+        
+        # Columns already in data are replaced, as add_all_indicators does, on a
+        # shallow copy: data's own arrays are shared, never written
+        overlap = [name for name in names if name in data.columns]
+        if overlap:
+            result = data.copy(deep=False)
+            for name in names:
+                result[name] = values[name].to_numpy()
+            return result
+        values.index = data.index
+        return pd.concat([data, values], axis=1)
+    
+    def latest(self, columns=None):
+        """Symbols x columns frame of each symbol's last bar"""
+        names = columns or list(self.columns)
+        last_rows = np.array([self.positions[symbol][-1] for symbol in self.symbols], dtype=int)
+        symbol_columns = np.arange(len(self.symbols))
+        return pd.DataFrame({name: self.columns[name][last_rows, symbol_columns] for name in names},
+                            index=self.symbols)
+    
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns.values())
+
+class PanelIndicators:
+    """add_all_indicators for a whole universe: every column in one vectorized pass
+    
+    Rolling windows reduce every symbol in the same NumPy call, exponential
+    averages run in pandas' ewm kernel over the wide frame, and the
+    Supertrend recursion steps through time once with every symbol advanced
+    together. Each symbol gets the values add_all_indicators computes for
+    its frame alone.
+    """
+    
+    def __init__(self, dtype='float64'):
+        self.dtype = np.dtype(dtype)  # storage dtype of the float indicator columns
+    
+    def compute(self, stocks_data, columns=None):
+        """Build the panel from per-symbol frames and add the indicators"""
+        panel = IndicatorPanel.from_frames(stocks_data)
+        if 'Close' in panel:
+            self.add_all_indicators(panel, columns)
+        return panel
+    
+    def add_all_indicators(self, panel, columns=None):
+        """Add the add_all_indicators columns (same defaults) to a panel in place
+        
+        `columns` limits the work to the indicator groups producing them;
+        callers pass the registry-resolved set, dependencies included.
+        """
+        needed = None if columns is None else set(columns)
+        
+        def want(*names):
+            return needed is None or any(name in needed for name in names)
+        
+        fields = panel.packed(FIELDS)
+        close = fields['Close']
+        out = {}
+        close_frame = _frame(close)
+        has_close = ~np.isnan(close)
+        has_range = 'High' in fields and 'Low' in fields
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Moving averages
+            for window in (10, 20, 50):
+                if want(f'SMA_{window}'):
+                    out[f'SMA_{window}'] = rolling_array(close, window, 'mean')
+            for span in (10, 20, 50):
+                if want(f'EMA_{span}'):
+                    out[f'EMA_{span}'] = _array(close_frame.ewm(span=span).mean())
+            
+            # RSI (a symbol's first bar counts as no change; rows before it stay NaN)
+            if want('RSI'):
+                delta = close - _shift(close)
+                gain = np.where(delta > 0, delta, 0.0)
+                loss = np.where(delta < 0, -delta, 0.0)
+                gain[~has_close] = np.nan
+                loss[~has_close] = np.nan
+                rs = rolling_array(gain, 14, 'mean') / rolling_array(loss, 14, 'mean')
+                out['RSI'] = 100 - (100 / (1 + rs))
+            
+            # MACD
+            if want('MACD', 'MACD_Signal', 'MACD_Histogram'):
+                macd = _array(close_frame.ewm(span=12).mean()) - _array(close_frame.ewm(span=26).mean())
+                signal = _array(_frame(macd).ewm(span=9).mean())
+                out['MACD'] = macd
+                out['MACD_Signal'] = signal
+                out['MACD_Histogram'] = macd - signal
+            
+            # Bollinger Bands
+            if want('BB_Upper', 'BB_Middle', 'BB_Lower'):
+                middle = out['SMA_20'] if 'SMA_20' in out else rolling_array(close, 20, 'mean')
+                std = rolling_array(close, 20, 'std')
+                out['BB_Upper'] = middle + 2 * std
+                out['BB_Middle'] = middle
+                out['BB_Lower'] = middle - 2 * std
+            
+            if has_range:
+                high, low = fields['High'], fields['Low']
+                if want('Stoch_K', 'Stoch_D', 'Williams_R'):
+                    highest = rolling_array(high, 14, 'max')
+                    lowest = rolling_array(low, 14, 'min')
+                
+                # Stochastic
+                if want('Stoch_K', 'Stoch_D'):
+                    stoch_k = 100 * ((close - lowest) / (highest - lowest))
+                    out['Stoch_K'] = stoch_k
+                    out['Stoch_D'] = rolling_array(stoch_k, 3, 'mean')
+                
+                # ATR / Supertrend
+                if want('ATR', 'Supertrend', 'Supertrend_Direction'):
+                    prev_close = _shift(close)
+                    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+                if want('ATR'):
+                    out['ATR'] = rolling_array(true_range, 14, 'mean')
+                if want('Supertrend', 'Supertrend_Direction'):
+                    atr = rolling_array(true_range, 10, 'mean')
+                    hl2 = (high + low) / 2
+                    band, direction = self.supertrend_kernel(hl2 + 3 * atr, hl2 - 3 * atr, close)
+                    out['Supertrend'] = band
+                    out['Supertrend_Direction'] = direction
+                
+                # Williams %R / CCI
+                if want('Williams_R'):
+                    out['Williams_R'] = -100 * ((highest - close) / (highest - lowest))
+                if want('CCI'):
+                    typical = (high + low + close) / 3
+                    sma_tp = rolling_array(typical, 20, 'mean')
+                    out['CCI'] = (typical - sma_tp) / (0.015 * rolling_array(typical, 20, 'mad'))
+            
+            # Momentum / ROC
+            if want('Momentum', 'ROC'):
+                past = _shift(close, 10)
+                if want('Momentum'):
+                    out['Momentum'] = close - past
+                if want('ROC'):
+                    out['ROC'] = ((close - past) / past) * 100
+            
+            if 'Volume' in fields:
+                volume = fields['Volume']
+                if want('Volume_SMA'):
+                    out['Volume_SMA'] = rolling_array(volume, 20, 'mean')
+                if want('VPT'):
+                    price_change = close / _shift(close) - 1
+                    flow = volume * price_change
+                    vpt = np.nancumsum(flow, axis=0)
+                    vpt[np.isnan(flow)] = np.nan
+                    out['VPT'] = vpt
+        
+        if self.dtype != np.float64:
+            out = {name: values.astype(self.dtype) if values.dtype == np.float64 else values
+                   for name, values in out.items()}
+        panel.columns.update(panel.unpack(out))
+        return panel
+    
+    @staticmethod
+    def supertrend_kernel(upper_band, lower_band, close):
+        """TechnicalIndicators.supertrend_kernel stepped over time for all symbols at once
+        
+        Each symbol's recursion starts at its own first bar; rows before it
+        get a NaN band and direction 0.
+        """
+        n_rows, n_symbols = close.shape
+        band = np.full((n_rows, n_symbols), np.nan)
+        direction = np.zeros((n_rows, n_symbols), dtype=np.int8)
+        if n_rows == 0:
+            return band, direction
+        
+        valid = ~np.isnan(close)
+        start = np.where(valid.any(axis=0), valid.argmax(axis=0), n_rows)
+        
+        current = np.full(n_symbols, np.nan)
+        trend = np.zeros(n_symbols, dtype=np.int8)
+        for i in range(n_rows):
+            up, lo, price = upper_band[i], lower_band[i], close[i]
+            first = start == i
+            active = start < i
+            
+            if i > 0:
+                prev_upper = np.where(trend == -1, current, upper_band[i - 1])
+                prev_lower = np.where(trend == 1, current, lower_band[i - 1])
+                prev_close = close[i - 1]
+                final_upper = np.where((up < prev_upper) | (prev_close > prev_upper), up, prev_upper)
+                final_lower = np.where((lo > prev_lower) | (prev_close < prev_lower), lo, prev_lower)
+                
+                # The second bar takes the raw bands
+                second = start == i - 1
+                final_upper = np.where(second, up, final_upper)
+                final_lower = np.where(second, lo, final_lower)
+                
+                new_trend = np.where(price <= final_lower, -1, np.where(price >= final_upper, 1, trend))
+                new_band = np.where(new_trend == 1, final_lower, final_upper)
+                
+                # NaN bands during ATR warm-up carry the previous value forward
+                update = active & ~(np.isnan(up) | np.isnan(lo))
+                trend = np.where(update, new_trend, trend).astype(np.int8)
+                current = np.where(update, new_band, current)
+            
+            trend = np.where(first, 1, trend).astype(np.int8)
+            current = np.where(first, price, current)
+            band[i] = current
+            direction[i] = trend
+        
+        return band, direction
+
+def _frame(values):
+    return pd.DataFrame(values, copy=False)
+
+def _array(frame):
+    return np.ascontiguousarray(frame.to_numpy(dtype=float))
+
+def _shift(values, periods=1):
+    shifted = np.full(values.shape, np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:-periods]
+    return shifted
@@ -0,0 +1,169 @@
+# src/indicators/registry.py
+"""
+Indicator registry with declared dependencies, so consumers compute only the columns they read
+"""
+from collections import OrderedDict
+import pandas as pd
+
+OHLCV_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+class IndicatorSpec:
+    """One indicator: the columns it produces and the columns it reads"""
+    
+    __slots__ = ('name', 'outputs', 'inputs', 'func', 'builtin')
+    
+    def __init__(self, name, outputs, inputs, func, builtin=False):
+        self.name = name
+        self.outputs = tuple(outputs)
+        self.inputs = tuple(inputs)
+        self.func = func  # func(technical_indicators, df) -> {column: Series}
+        self.builtin = builtin  # PanelIndicators computes it natively
+
+class IndicatorRegistry:
+    """Named indicators in registration order, resolved by the columns a consumer asks for
+    
+    Inputs are raw OHLCV fields or other indicators' outputs; resolve()
+    pulls in every indicator a requested column depends on, in dependency
+    order. Registering a name again replaces it.
+    """
+    
+    def __init__(self):
+        self.specs = OrderedDict()
+        self.producers = {}  # output column -> indicator name
+    
+    def register(self, name, outputs, inputs, func, builtin=False):
+        """Add (or replace) an indicator"""
+        if name in self.specs:
+            self.unregister(name)
+        spec = IndicatorSpec(name, outputs, inputs, func, builtin)
+        for column in spec.outputs:
+            if column in self.producers:
+                raise ValueError(f"Column {column} is already produced by {self.producers[column]}")
+        self.specs[name] = spec
+        for column in spec.outputs:
+            self.producers[column] = name
+        return spec
+    
+    def indicator(self, name, outputs, inputs):
+        """Decorator form of register()"""
+        def decorator(func):
+            self.register(name, outputs, inputs, func)
+            return func
+        return decorator
+    
+    def unregister(self, name):
+        spec = self.specs.pop(name)
+        for column in spec.outputs:
+            self.producers.pop(column, None)
+    
+    def columns(self):
+        """Every column the registry can produce, in registration order"""
+        return [column for spec in self.specs.values() for column in spec.outputs]
+    
+    def resolve(self, columns=None):
+        """Indicators needed for `columns` (all when None), dependencies first
+        
+        Raw fields are taken as given; an unknown column raises KeyError.
+        """
+        if columns is None:
+            wanted = list(self.specs)
+        else:
+            wanted = []
+            for column in columns:
+                if column in OHLCV_COLUMNS:
+                    continue
+                if column not in self.producers:
+                    raise KeyError(f"No indicator produces {column}")
+                wanted.append(self.producers[column])
+        
+        ordered = []
+        visiting = set()
+        
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Circular indicator dependency at {name}")
+            visiting.add(name)
+            for column in self.specs[name].inputs:
+                if column in self.producers:
+                    visit(self.producers[column])
+            visiting.discard(name)
+            ordered.append(name)
+        
+        # Visit in registration order so output column order is stable
+        needed = set(wanted)
+        for name in self.specs:
+            if name in needed:
+                visit(name)
+        return [self.specs[name] for name in ordered]
+    
+    def resolve_columns(self, columns=None):
+        """Every output column computed for `columns`, dependencies included"""
+        return [column for spec in self.resolve(columns) for column in spec.outputs]
+    
+    def evaluate(self, indicators, df, columns=None, skip=()):
+        """Add the requested columns (and their inputs) to df in place; returns df
+        
+        Indicators whose inputs are missing (e.g. no Volume) are skipped, and
+        one failing indicator doesn't stop the others. Names in `skip` are
+        taken as already computed.
+        """
+        for spec in self.resolve(columns):
+            if spec.name in skip:
+                continue
+            if not all(column in df.columns for column in spec.inputs):
+                continue
+            try:
+                values = spec.func(indicators, df)
+                for column in spec.outputs:
+                    if column in values:
+                        df[column] = values[column]
+            except Exception as e:
+                print(f"⚠️ Error adding {spec.name}: {e}")
+        return df
+
+def _supertrend(ti, df):
+    result = ti.supertrend(df['High'], df['Low'], df['Close'], return_direction=True)
+    if isinstance(result, pd.DataFrame):
+        return result
+    
+    # Fallback to EMA_20 if Supertrend fails
+    print("⚠️ Supertrend error: falling back to EMA_20")
+    return {'Supertrend': df['EMA_20'] if 'EMA_20' in df.columns else ti.ema(df['Close'], 20)}
+
+def _vpt(ti, df):
+    price_change = df['Close'].pct_change()
+    return {'VPT': (df['Volume'] * price_change).cumsum()}
+
+def _builtin(registry, name, outputs, inputs, func):
+    registry.register(name, outputs, inputs, func, builtin=True)
+
+def register_builtin_indicators(registry):
+    """The add_all_indicators set, in its column order"""
+    for window in (10, 20, 50):
+        _builtin(registry, f'sma_{window}', [f'SMA_{window}'], ['Close'],
+                 lambda ti, df, w=window: {f'SMA_{w}': ti.sma(df['Close'], w)})
+    for span in (10, 20, 50):
+        _builtin(registry, f'ema_{span}', [f'EMA_{span}'], ['Close'],
+                 lambda ti, df, s=span: {f'EMA_{s}': ti.ema(df['Close'], s)})
+    
+    hlc = ['High', 'Low', 'Close']
+    _builtin(registry, 'rsi', ['RSI'], ['Close'], lambda ti, df: {'RSI': ti.rsi(df['Close'])})
+    _builtin(registry, 'macd', ['MACD', 'MACD_Signal', 'MACD_Histogram'], ['Close'],
+             lambda ti, df: ti.macd(df['Close']))
+    _builtin(registry, 'bollinger', ['BB_Upper', 'BB_Middle', 'BB_Lower'], ['Close', 'SMA_20'],
+             lambda ti, df: ti.bollinger_bands(df['Close'], middle=df['SMA_20']))
+    _builtin(registry, 'stochastic', ['Stoch_K', 'Stoch_D'], hlc,
+             lambda ti, df: ti.stochastic(df['High'], df['Low'], df['Close']))
+    _builtin(registry, 'atr', ['ATR'], hlc, lambda ti, df: {'ATR': ti.atr(df['High'], df['Low'], df['Close'])})
+    _builtin(registry, 'supertrend', ['Supertrend', 'Supertrend_Direction'], hlc, _supertrend)
+    _builtin(registry, 'williams_r', ['Williams_R'], hlc,
+             lambda ti, df: {'Williams_R': ti.williams_r(df['High'], df['Low'], df['Close'])})
+    _builtin(registry, 'cci', ['CCI'], hlc, lambda ti, df: {'CCI': ti.cci(df['High'], df['Low'], df['Close'])})
+    _builtin(registry, 'momentum', ['Momentum'], ['Close'], lambda ti, df: {'Momentum': ti.momentum(df['Close'])})
+    _builtin(registry, 'roc', ['ROC'], ['Close'], lambda ti, df: {'ROC': ti.roc(df['Close'])})
+    _builtin(registry, 'volume_sma', ['Volume_SMA'], ['Volume'],
+             lambda ti, df: {'Volume_SMA': ti.sma(df['Volume'], 20)})
+    _builtin(registry, 'vpt', ['VPT'], ['Close', 'Volume'], _vpt)
+    return registry
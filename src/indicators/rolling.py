@@ -0,0 +1,71 @@
+# src/indicators/rolling.py
+"""
+Shared rolling-window primitives for the technical indicators
+
+Min, max and std use pandas' O(n) rolling kernels; mean absolute deviation
+has no running-sum form, so it is reduced over a NumPy sliding-window view
+instead of calling back into Python for every window. rolling_array applies
+the same view to (time x symbol) matrices for the panel indicators.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+MAD_BLOCK_ROWS = 65536
+
+def rolling_min(series, window):
+    """Rolling minimum (NaN until the window is full, or when it holds a NaN)"""
+    return series.rolling(window=window).min()
+
+def rolling_max(series, window):
+    """Rolling maximum (NaN until the window is full, or when it holds a NaN)"""
+    return series.rolling(window=window).max()
+
+def rolling_std(series, window, ddof=1):
+    """Rolling sample standard deviation"""
+    return series.rolling(window=window).std(ddof=ddof)
+
+def rolling_mad(series, window):
+    """Rolling mean absolute deviation around each window's own mean"""
+    values = rolling_mad_array(series.to_numpy(dtype=float), window)
+    return pd.Series(values, index=series.index, name=series.name)
+
+def rolling_mad_array(values, window):
+    """rolling_mad over axis 0 of a 1-D or (time x symbol) 2-D array"""
+    return rolling_array(values, window, 'mad')
+
+def _window_mad(block):
+    return np.abs(block - block.mean(axis=-1, keepdims=True)).mean(axis=-1)
+
+def _window_std(block):
+    return np.sqrt(((block - block.mean(axis=-1, keepdims=True)) ** 2).sum(axis=-1) / (block.shape[-1] - 1))
+
+WINDOW_REDUCERS = {
+    'mean': lambda block: block.sum(axis=-1) / block.shape[-1],
+    'min': lambda block: block.min(axis=-1),
+    'max': lambda block: block.max(axis=-1),
+    'std': _window_std,
+    'mad': _window_mad
+}
+
+def rolling_array(values, window, how):
+    """Rolling mean/min/max/std/mad over axis 0 of a 1-D or (time x symbol) 2-D array
+    
+    Matches the pandas rolling result with min_periods=window: NaN until the
+    window is full, or when it holds a NaN. Every symbol column is reduced in
+    the same NumPy call, which is what makes panel indicators cheap.
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    reducer = WINDOW_REDUCERS[how]
+    
+    if 1 <= window <= len(values):
+        windows = sliding_window_view(values, window, axis=0)  # (n - window + 1, [symbols,] window), no copy
+        
+        # Reduce in blocks to bound the (rows x window) temporaries
+        block_rows = max(1, MAD_BLOCK_ROWS // (values.shape[1] if values.ndim == 2 else 1))
+        for start in range(0, len(windows), block_rows):
+            block = windows[start:start + block_rows]
+            result[window - 1 + start:window - 1 + start + len(block)] = reducer(block)
+    
+    return result
@@ -0,0 +1,50 @@
+# src/indicators/schema.py
+"""
+Compact indicator dtypes and frame memory reports (the OHLCV schema lives in src.schema)
+"""
+import numpy as np
+
+INDICATOR_DTYPES = ('float64', 'float32')
+
+def compact_columns(df, columns, dtype):
+    """Store float64 `columns` of df as `dtype` (in place); returns df"""
+    if dtype is None or np.dtype(dtype) == np.float64:
+        return df
+    for column in columns:
+        if column in df.columns and df[column].dtype == np.float64:
+            df[column] = df[column].to_numpy().astype(dtype)
+    return df
+
+def frame_bytes(df):
+    """In-memory size of a frame (data plus index) in bytes"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def memory_report(frames):
+    """Bytes per symbol for a {symbol: DataFrame} dict
+    
+    Reports the total, the mean per symbol, the largest symbols, and a
+    breakdown by dtype so float64 indicator columns stand out.
+    """
+    per_symbol = {}
+    by_dtype = {}
+    columns = 0
+    for symbol, df in frames.items():
+        if df is None:
+            continue
+        per_symbol[symbol] = frame_bytes(df)
+        columns += len(df.columns)
+        for column in df.columns:
+            dtype = str(df[column].dtype)
+            by_dtype[dtype] = by_dtype.get(dtype, 0) + int(df[column].memory_usage(index=False, deep=True))
+    
+    total = sum(per_symbol.values())
+    largest = sorted(per_symbol.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'symbols': len(per_symbol),
+        'total_bytes': total,
+        'bytes_per_symbol': int(total / len(per_symbol)) if per_symbol else 0,
+        'columns_per_symbol': round(columns / len(per_symbol), 1) if per_symbol else 0,
+        'by_dtype': by_dtype,
+        'largest': dict(largest),
+        'per_symbol': per_symbol
+    }
@@ -0,0 +1,424 @@
+# src/indicators/streaming.py
+"""
+Streaming per-symbol indicator state: one new bar in, every indicator updated in O(1)
+"""
+import json
+import math
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+def _div(numerator, denominator):
+    """Float division with NumPy semantics (x/0 -> +-inf, 0/0 -> NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+def _to_json(value):
+    """Snapshot value with NaN as None and +-inf as strings, so strict JSON parsers accept it"""
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None if value != value else ('inf' if value > 0 else '-inf')
+    return value
+
+def _from_json(value):
+    """Inverse of _to_json"""
+    if isinstance(value, dict):
+        return {key: _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    if value is None:
+        return NAN
+    if value in ('inf', '-inf'):
+        return float(value)
+    return value
+
+class _Window:
+    """Fixed-size window of the most recent values with a running sum and sum of squares
+    
+    The sums are taken around a shift near the data (so the variance
+    subtraction stays well conditioned) and updated on every push and pop,
+    which makes mean() and std() O(1). They are recomputed exactly once per
+    `size` pushes, so rounding cannot drift, at O(1) amortized. While the
+    window holds a NaN or inf, mean() and std() fall back to a full sum and
+    give what pandas gives.
+    """
+    
+    def __init__(self, size, values=()):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.shift = 0.0
+        self.total = 0.0
+        self.squares = 0.0
+        self.nonfinite = 0
+        self.pushes = 0
+        for value in values:
+            self.push(value)
+    
+    def push(self, value):
+        if len(self.values) == self.size:
+            self._account(self.values[0], -1)
+        self.values.append(value)
+        self._account(value, 1)
+        
+        self.pushes += 1
+        if self.pushes >= self.size:
+            self._resync()
+    
+    def _account(self, value, sign):
+        if not math.isfinite(value):
+            self.nonfinite += sign
+            return
+        offset = value - self.shift
+        self.total += sign * offset
+        self.squares += sign * offset * offset
+    
+    def _resync(self):
+        finite = [v for v in self.values if math.isfinite(v)]
+        self.shift = math.fsum(finite) / len(finite) if finite else 0.0
+        self.total = math.fsum(v - self.shift for v in finite)
+        self.squares = math.fsum((v - self.shift) ** 2 for v in finite)
+        self.pushes = 0
+    
+    def full(self):
+        return len(self.values) == self.size
+    
+    def mean(self):
+        if not self.full():
+            return NAN
+        if self.nonfinite:
+            return math.fsum(self.values) / self.size
+        return self.shift + self.total / self.size
+    
+    def std(self):
+        if not self.full() or self.size < 2:
+            return NAN
+        if self.nonfinite:
+            mean = math.fsum(self.values) / self.size
+            return math.sqrt(math.fsum((v - mean) ** 2 for v in self.values) / (self.size - 1))
+        variance = (self.squares - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+    
+    def min(self):
+        return min(self.values) if self.full() and not self._has_nan() else NAN
+    
+    def max(self):
+        return max(self.values) if self.full() and not self._has_nan() else NAN
+    
+    def mad(self):
+        """Mean absolute deviation; the one statistic here that needs the whole window"""
+        if not self.full():
+            return NAN
+        mean = self.mean()
+        return math.fsum(abs(v - mean) for v in self.values) / self.size
+    
+    def _has_nan(self):
+        return any(v != v for v in self.values)
+
+class _EMA:
+    """Adjusted exponential mean, matching pandas ewm(span=...).mean()"""
+    
+    def __init__(self, span, numerator=0.0, denominator=0.0):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = numerator
+        self.denominator = denominator
+    
+    def push(self, value):
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.numerator / self.denominator
+
+class IndicatorState:
+    """Incremental indicator state for one symbol
+    
+    update() takes one OHLCV bar and returns the same columns
+    TechnicalIndicators.add_all_indicators produces for that bar, using the
+    same default parameters, so seeding from history and streaming new bars
+    stays in sync with a batch recompute. Moving averages, Bollinger std,
+    ATR and Volume_SMA update from running sums in O(1); only the 14-bar
+    high/low range and CCI's 20-bar MAD look at their window.
+    
+    snapshot() returns a dict that is valid strict JSON (warm-up NaNs are
+    stored as null); from_snapshot() resumes from it.
+    """
+    
+    COLUMNS = [
+        'SMA_10', 'SMA_20', 'SMA_50', 'EMA_10', 'EMA_20', 'EMA_50', 'RSI',
+        'MACD', 'MACD_Signal', 'MACD_Histogram', 'BB_Upper', 'BB_Middle', 'BB_Lower',
+        'Stoch_K', 'Stoch_D', 'ATR', 'Supertrend', 'Supertrend_Direction',
+        'Williams_R', 'CCI', 'Momentum', 'ROC', 'Volume_SMA', 'VPT'
+    ]
+    
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bars = 0
+        self.last_timestamp = None
+        self.prev_close = NAN
+        self.latest = {}
+        
+        # Close-based windows and averages
+        self.closes = {w: _Window(w) for w in (10, 20, 50)}
+        self.emas = {span: _EMA(span) for span in (10, 20, 50)}
+        self.gains = _Window(14)
+        self.losses = _Window(14)
+        self.macd_fast = _EMA(12)
+        self.macd_slow = _EMA(26)
+        self.macd_signal = _EMA(9)
+        self.momentum_closes = _Window(11)
+        
+        # Range-based windows
+        self.highs = _Window(14)
+        self.lows = _Window(14)
+        self.stoch_k = _Window(3)
+        self.true_range = _Window(14)
+        self.typical = _Window(20)
+        self.volumes = _Window(20)
+        self.vpt = 0.0
+        
+        # Supertrend (ATR 10, multiplier 3) recursion state
+        self.st_true_range = _Window(10)
+        self.st_band = NAN
+        self.st_trend = 1
+        self.st_prev_upper = NAN
+        self.st_prev_lower = NAN
+    
+    @classmethod
+    def from_history(cls, symbol, df):
+        """Seed a state by streaming an OHLCV history through it"""
+        state = cls(symbol)
+        state.update_many(df)
+        return state
+    
+    def update_many(self, df):
+        """Stream every bar of an OHLCV frame; returns the last bar's values"""
+        for timestamp, row in zip(df.index, df[['Open', 'High', 'Low', 'Close', 'Volume']].itertuples(index=False)):
+            self.update({'Open': row[0], 'High': row[1], 'Low': row[2], 'Close': row[3], 'Volume': row[4]},
+                        timestamp)
+        return self.latest
+    
+    def update(self, bar, timestamp=None):
+        """Apply one new bar (mapping with Open/High/Low/Close/Volume); returns all indicator values
+        
+        Bars at or before the last applied timestamp are ignored, so replaying
+        an overlapping history after a restart is harmless.
+        """
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp)
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return self.latest
+            self.last_timestamp = timestamp
+        
+        high = float(bar['High'])
+        low = float(bar['Low'])
+        close = float(bar['Close'])
+        volume = float(bar.get('Volume', 0.0))
+        prev_close = self.prev_close
+        first = self.bars == 0
+        values = {}
+        
+        # Moving averages
+        for window, closes in self.closes.items():
+            closes.push(close)
+            values[f'SMA_{window}'] = closes.mean()
+        for span, ema in self.emas.items():
+            values[f'EMA_{span}'] = ema.push(close)
+        
+        # RSI (simple-average gains/losses; the first bar counts as no change)
+        delta = 0.0 if first else close - prev_close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        values['RSI'] = 100 - _div(100, 1 + _div(self.gains.mean(), self.losses.mean()))
+        
+        # MACD
+        macd = self.macd_fast.push(close) - self.macd_slow.push(close)
+        signal = self.macd_signal.push(macd)
+        values.update({'MACD': macd, 'MACD_Signal': signal, 'MACD_Histogram': macd - signal})
+        
+        # Bollinger Bands
+        middle = values['SMA_20']
+        std = self.closes[20].std()
+        values.update({'BB_Upper': middle + 2 * std, 'BB_Middle': middle, 'BB_Lower': middle - 2 * std})
+        
+        # Stochastic and Williams %R
+        self.highs.push(high)
+        self.lows.push(low)
+        highest, lowest = self.highs.max(), self.lows.min()
+        stoch_k = 100 * _div(close - lowest, highest - lowest)
+        self.stoch_k.push(stoch_k)
+        values['Stoch_K'] = stoch_k
+        values['Stoch_D'] = self.stoch_k.mean()
+        values['Williams_R'] = -100 * _div(highest - close, highest - lowest)
+        
+        # ATR and Supertrend
+        true_range = NAN if first else max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.true_range.push(true_range)
+        values['ATR'] = self.true_range.mean()
+        values['Supertrend'], values['Supertrend_Direction'] = self._update_supertrend(high, low, close, true_range)
+        
+        # CCI
+        typical = (high + low + close) / 3
+        self.typical.push(typical)
+        values['CCI'] = _div(typical - self.typical.mean(), 0.015 * self.typical.mad())
+        
+        # Momentum / ROC
+        self.momentum_closes.push(close)
+        past = self.momentum_closes.values[0] if self.momentum_closes.full() else NAN
+        values['Momentum'] = close - past
+        values['ROC'] = _div(close - past, past) * 100
+        
+        # Volume
+        self.volumes.push(volume)
+        values['Volume_SMA'] = self.volumes.mean()
+        if not first:
+            self.vpt += volume * (close / prev_close - 1)
+        values['VPT'] = NAN if first else self.vpt
+        
+        self.prev_close = close
+        self.bars += 1
+        self.latest = values
+        return values
+    
+    def _update_supertrend(self, high, low, close, true_range):
+        """One step of TechnicalIndicators.supertrend_kernel"""
+        self.st_true_range.push(true_range)
+        atr = self.st_true_range.mean()
+        hl2 = (high + low) / 2
+        upper, lower = hl2 + 3 * atr, hl2 - 3 * atr
+        index = self.bars
+        prev_upper, prev_lower = self.st_prev_upper, self.st_prev_lower
+        self.st_prev_upper, self.st_prev_lower = upper, lower
+        
+        if index == 0:
+            self.st_band = close
+            return self.st_band, self.st_trend
+        
+        if upper != upper or lower != lower:
+            return self.st_band, self.st_trend
+        
+        if index == 1:
+            final_upper, final_lower = upper, lower
+        else:
+            band_upper = self.st_band if self.st_trend == -1 else prev_upper
+            band_lower = self.st_band if self.st_trend == 1 else prev_lower
+            prev_close = self.prev_close
+            final_upper = upper if upper < band_upper or prev_close > band_upper else band_upper
+            final_lower = lower if lower > band_lower or prev_close < band_lower else band_lower
+        
+        if close <= final_lower:
+            self.st_trend = -1
+        elif close >= final_upper:
+            self.st_trend = 1
+        
+        self.st_band = final_lower if self.st_trend == 1 else final_upper
+        return self.st_band, self.st_trend
+    
+    def snapshot(self):
+        """State for resuming after a restart, as strict JSON (NaN -> None, inf -> 'inf')"""
+        windows = {
+            'closes': {str(w): list(win.values) for w, win in self.closes.items()},
+            'gains': list(self.gains.values),
+            'losses': list(self.losses.values),
+            'momentum_closes': list(self.momentum_closes.values),
+            'highs': list(self.highs.values),
+            'lows': list(self.lows.values),
+            'stoch_k': list(self.stoch_k.values),
+            'true_range': list(self.true_range.values),
+            'typical': list(self.typical.values),
+            'volumes': list(self.volumes.values),
+            'st_true_range': list(self.st_true_range.values)
+        }
+        emas = {str(span): [ema.numerator, ema.denominator] for span, ema in self.emas.items()}
+        for name in ('macd_fast', 'macd_slow', 'macd_signal'):
+            ema = getattr(self, name)
+            emas[name] = [ema.numerator, ema.denominator]
+        
+        return {
+            'symbol': self.symbol,
+            'bars': self.bars,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            'prev_close': _to_json(self.prev_close),
+            'vpt': _to_json(self.vpt),
+            'supertrend': _to_json([self.st_band, self.st_trend, self.st_prev_upper, self.st_prev_lower]),
+            'windows': _to_json(windows),
+            'emas': _to_json(emas),
+            'latest': _to_json(self.latest)
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data):
+        """Rebuild a state from snapshot()"""
+        state = cls(data['symbol'])
+        state.bars = data['bars']
+        state.last_timestamp = pd.Timestamp(data['last_timestamp']) if data['last_timestamp'] else None
+        state.prev_close = _from_json(data['prev_close'])
+        state.vpt = _from_json(data['vpt'])
+        state.st_band, state.st_trend, state.st_prev_upper, state.st_prev_lower = _from_json(data['supertrend'])
+        state.latest = _from_json(data['latest'])
+        
+        windows = _from_json(data['windows'])
+        for w, values in windows['closes'].items():
+            state.closes[int(w)] = _Window(int(w), values)
+        for name in ('gains', 'losses', 'momentum_closes', 'highs', 'lows', 'stoch_k',
+                     'true_range', 'typical', 'volumes', 'st_true_range'):
+            current = getattr(state, name)
+            setattr(state, name, _Window(current.size, windows[name]))
+        
+        emas = _from_json(data['emas'])
+        for span in state.emas:
+            state.emas[span] = _EMA(span, *emas[str(span)])
+        for name, span in (('macd_fast', 12), ('macd_slow', 26), ('macd_signal', 9)):
+            setattr(state, name, _EMA(span, *emas[name]))
+        return state
+
+class StreamingIndicators:
+    """Indicator states for a universe of symbols, persisted as one JSON snapshot"""
+    
+    def __init__(self, snapshot_path='data/indicator_state.json'):
+        self.snapshot_path = snapshot_path
+        self.states = {}
+    
+    def seed(self, symbol, df):
+        """(Re)build a symbol's state from its OHLCV history"""
+        self.states[symbol] = IndicatorState.from_history(symbol, df)
+        return self.states[symbol].latest
+    
+    def catch_up(self, symbol, df):
+        """Apply only the bars newer than the symbol's state (seeding it if missing)"""
+        if symbol not in self.states:
+            return self.seed(symbol, df)
+        return self.states[symbol].update_many(df)
+    
+    def update(self, symbol, bar, timestamp=None):
+        """Apply one new bar for a symbol"""
+        if symbol not in self.states:
+            self.states[symbol] = IndicatorState(symbol)
+        return self.states[symbol].update(bar, timestamp)
+    
+    def latest(self, symbol):
+        state = self.states.get(symbol)
+        return state.latest if state else {}
+    
+    def save(self, path=None):
+        """Write every state to the snapshot file"""
+        path = path or self.snapshot_path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({symbol: state.snapshot() for symbol, state in self.states.items()}, f, allow_nan=False)
+        os.replace(tmp_path, path)
+    
+    def load(self, path=None):
+        """Restore states from the snapshot file; returns how many were loaded"""
+        path = path or self.snapshot_path
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self.states = {symbol: IndicatorState.from_snapshot(snapshot) for symbol, snapshot in data.items()}
+        return len(self.states)
@@ -4,9 +4,30 @@ Fixed Technical Indicators with robust Supertrend calculation and column name ha
 import pandas as pd
 import numpy as np
 
+from src.schema import canonicalize_columns
+from .rolling import rolling_min, rolling_max, rolling_std, rolling_mad
+from .panel import PanelIndicators
+from .cache import IndicatorCache, parameter_hash
+from .registry import IndicatorRegistry, register_builtin_indicators
+from .schema import compact_columns, memory_report, INDICATOR_DTYPES
+
 class TechnicalIndicators:
-    def __init__(self):
-        pass
+    # Parameters of the built-in indicators; part of the cache key, so keep in step with them
+    ALL_INDICATOR_PARAMS = {
+        'sma': [10, 20, 50], 'ema': [10, 20, 50], 'rsi': 14, 'macd': [12, 26, 9],
+        'bollinger': [20, 2], 'stochastic': [14, 3], 'atr': 14, 'supertrend': [10, 3],
+        'williams_r': 14, 'cci': 20, 'momentum': 10, 'roc': 10, 'volume_sma': 20
+    }
+    
+    def __init__(self, cache=None, registry=None, dtype='float64'):
+        # Shared by every consumer of this instance (signals, backtest, regime)
+        self.cache = cache if cache is not None else IndicatorCache()
+        self.registry = registry if registry is not None else register_builtin_indicators(IndicatorRegistry())
+        
+        # Storage dtype of indicator columns; 'float32' halves them (computed in float64 either way)
+        if str(dtype) not in INDICATOR_DTYPES:
+            raise ValueError(f"dtype must be one of {INDICATOR_DTYPES}, got {dtype}")
+        self.dtype = str(dtype)
     
     def sma(self, data, window):
         """Simple Moving Average"""
@@ -39,13 +60,13 @@ class TechnicalIndicators:
             'MACD_Histogram': histogram
         })
     
-    def bollinger_bands(self, data, window=20, std_dev=2):
-        """Bollinger Bands"""
-        rolling_mean = self.sma(data, window)
-        rolling_std = data.rolling(window=window).std()
+    def bollinger_bands(self, data, window=20, std_dev=2, middle=None):
+        """Bollinger Bands (middle: an already computed SMA of `window` bars to reuse)"""
+        rolling_mean = self.sma(data, window) if middle is None else middle
+        std = rolling_std(data, window)
         
-        upper_band = rolling_mean + (rolling_std * std_dev)
-        lower_band = rolling_mean - (rolling_std * std_dev)
+        upper_band = rolling_mean + (std * std_dev)
+        lower_band = rolling_mean - (std * std_dev)
         
         return pd.DataFrame({
             'BB_Upper': upper_band,
@@ -55,8 +76,8 @@ class TechnicalIndicators:
     
     def stochastic(self, high, low, close, k_window=14, d_window=3):
         """Stochastic Oscillator"""
-        lowest_low = low.rolling(window=k_window).min()
-        highest_high = high.rolling(window=k_window).max()
+        lowest_low = rolling_min(low, k_window)
+        highest_high = rolling_max(high, k_window)
         
         k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
         d_percent = k_percent.rolling(window=d_window).mean()
@@ -77,8 +98,13 @@ class TechnicalIndicators:
         
         return atr
     
-    def supertrend(self, high, low, close, atr_period=10, multiplier=3):
-        """Fixed Supertrend Indicator"""
+    def supertrend(self, high, low, close, atr_period=10, multiplier=3, return_direction=False):
+        """Supertrend Indicator
+        
+        Returns the Supertrend band, or a DataFrame with Supertrend and
+        Supertrend_Direction (1 bullish, -1 bearish) when return_direction
+        is True.
+        """
         try:
             atr = self.atr(high, low, close, atr_period)
             hl2 = (high + low) / 2
@@ -86,43 +112,18 @@ class TechnicalIndicators:
             upper_band = hl2 + (multiplier * atr)
             lower_band = hl2 - (multiplier * atr)
             
-            # Initialize arrays
-            supertrend = pd.Series(index=close.index, dtype=float)
-            direction = pd.Series(index=close.index, dtype=int)
-            
-            # Initialize first values
-            supertrend.iloc[0] = close.iloc[0]
-            direction.iloc[0] = 1
-            
-            # Calculate supertrend
-            for i in range(1, len(close)):
-                if pd.isna(upper_band.iloc[i]) or pd.isna(lower_band.iloc[i]):
-                    supertrend.iloc[i] = supertrend.iloc[i-1]
-                    direction.iloc[i] = direction.iloc[i-1]
-                    continue
-                
-                # Calculate final bands
-                if i == 1:
-                    final_upper = upper_band.iloc[i]
-                    final_lower = lower_band.iloc[i]
-                else:
-                    prev_final_upper = upper_band.iloc[i-1] if i == 1 else supertrend.iloc[i-1] if direction.iloc[i-1] == -1 else upper_band.iloc[i-1]
-                    prev_final_lower = lower_band.iloc[i-1] if i == 1 else supertrend.iloc[i-1] if direction.iloc[i-1] == 1 else lower_band.iloc[i-1]
-                    
-                    final_upper = upper_band.iloc[i] if upper_band.iloc[i] < prev_final_upper or close.iloc[i-1] > prev_final_upper else prev_final_upper
-                    final_lower = lower_band.iloc[i] if lower_band.iloc[i] > prev_final_lower or close.iloc[i-1] < prev_final_lower else prev_final_lower
-                
-                # Determine direction
-                if close.iloc[i] <= final_lower:
-                    direction.iloc[i] = -1
-                elif close.iloc[i] >= final_upper:
-                    direction.iloc[i] = 1
-                else:
-                    direction.iloc[i] = direction.iloc[i-1]
-                
-                # Set supertrend value
-                supertrend.iloc[i] = final_lower if direction.iloc[i] == 1 else final_upper
+            band, direction = self.supertrend_kernel(
+                upper_band.to_numpy(dtype=float),
+                lower_band.to_numpy(dtype=float),
+                close.to_numpy(dtype=float)
+            )
+            supertrend = pd.Series(band, index=close.index)
             
+            if return_direction:
+                return pd.DataFrame({
+                    'Supertrend': supertrend,
+                    'Supertrend_Direction': pd.Series(direction, index=close.index)
+                })
             return supertrend
             
         except Exception as e:
@@ -130,10 +131,65 @@ class TechnicalIndicators:
             # Return simple moving average as fallback
             return self.sma(close, atr_period)
     
+    @staticmethod
+    def supertrend_kernel(upper_band, lower_band, close):
+        """One-pass Supertrend recursion over NumPy arrays; returns (band, direction)
+        
+        Bars whose bands are not yet defined (ATR warm-up) carry the previous
+        value forward. Final bands ratchet: the upper band only moves down and
+        the lower band only moves up until price closes through them.
+        """
+        n = len(close)
+        if n == 0:
+            return np.empty(0), np.empty(0, dtype=np.int8)
+        
+        # Plain Python floats are much faster to index than array scalars
+        upper = upper_band.tolist()
+        lower = lower_band.tolist()
+        closes = close.tolist()
+        
+        band = [0.0] * n
+        direction = [1] * n
+        current = closes[0]
+        trend = 1
+        band[0] = current
+        
+        for i in range(1, n):
+            up = upper[i]
+            lo = lower[i]
+            if up != up or lo != lo:  # NaN band during ATR warm-up
+                band[i] = current
+                direction[i] = trend
+                continue
+            
+            # Final bands
+            if i == 1:
+                final_upper = up
+                final_lower = lo
+            else:
+                prev_upper = current if trend == -1 else upper[i - 1]
+                prev_lower = current if trend == 1 else lower[i - 1]
+                prev_close = closes[i - 1]
+                final_upper = up if up < prev_upper or prev_close > prev_upper else prev_upper
+                final_lower = lo if lo > prev_lower or prev_close < prev_lower else prev_lower
+            
+            # Direction flips when price closes through the opposite band
+            price = closes[i]
+            if price <= final_lower:
+                trend = -1
+            elif price >= final_upper:
+                trend = 1
+            
+            current = final_lower if trend == 1 else final_upper
+            band[i] = current
+            direction[i] = trend
+        
+        return np.array(band), np.array(direction, dtype=np.int8)
+    
     def williams_r(self, high, low, close, window=14):
         """Williams %R"""
-        highest_high = high.rolling(window=window).max()
-        lowest_low = low.rolling(window=window).min()
+        highest_high = rolling_max(high, window)
+        lowest_low = rolling_min(low, window)
         
         wr = -100 * ((highest_high - close) / (highest_high - lowest_low))
         return wr
@@ -142,7 +198,7 @@ class TechnicalIndicators:
         """Commodity Channel Index"""
         typical_price = (high + low + close) / 3
         sma_tp = self.sma(typical_price, window)
-        mad = typical_price.rolling(window=window).apply(lambda x: np.abs(x - x.mean()).mean())
+        mad = rolling_mad(typical_price, window)
         
         cci = (typical_price - sma_tp) / (0.015 * mad)
         return cci
@@ -156,107 +212,151 @@ class TechnicalIndicators:
         return ((data - data.shift(window)) / data.shift(window)) * 100
     
     def standardize_columns(self, df):
-        """Standardize column names to handle case variations"""
-        df_copy = df.copy()
-        
-        # Map common variations to standard names
-        column_mapping = {
-            'open': 'Open',
-            'high': 'High', 
-            'low': 'Low',
-            'close': 'Close',
-            'volume': 'Volume',
-            'Open': 'Open',
-            'High': 'High',
-            'Low': 'Low', 
-            'Close': 'Close',
-            'Volume': 'Volume'
-        }
+        """Standardize column names to handle case variations
+        
+        Frames from the data layer are already canonical and come back as
+        is; others get a renamed shallow copy. Either way no data is copied.
+        """
+        return canonicalize_columns(df)
+    
+    def register_indicator(self, name, outputs, inputs, func):
+        """Register an extra indicator; func(indicators, df) returns {column: Series}
+        
+        Inputs may be OHLCV fields or other indicators' columns. The new
+        columns are then part of add_all_indicators and can be requested by
+        name through add_indicators.
+        """
+        return self.registry.register(name, outputs, inputs, func)
+    
+    def _params_hash(self, columns=None):
+        """Cache key part for a column request: parameters plus the resolved columns"""
+        return parameter_hash('indicators', {
+            'params': self.ALL_INDICATOR_PARAMS,
+            'columns': self.registry.resolve_columns(columns),
+            'dtype': self.dtype
+        })
+    
+    def _cache_keys(self, symbol, data, columns):
+        """Exact key first, then the full-set key (a full frame serves any subset)"""
+        keys = [self.cache.make_key(symbol, data, self._params_hash(columns))]
+        if columns is not None:
+            keys.append(self.cache.make_key(symbol, data, self._params_hash(None)))
+        return keys
+    
+    def add_indicators(self, df, columns=None, symbol=None):
+        """Add only the requested indicator columns (plus the ones they depend on)
         
-        # Rename columns if they exist
-        for old_name, new_name in column_mapping.items():
-            if old_name in df_copy.columns:
-                df_copy = df_copy.rename(columns={old_name: new_name})
+        columns=None adds every registered indicator. With a symbol the
+        result is memoized, so another consumer asking for the same symbol's
+        unchanged history gets the frame already computed.
+        """
+        if symbol is None or self.cache is None:
+            return self._compute_indicators(df, columns)
         
-        return df_copy
+        keys = self._cache_keys(symbol, df, columns)
+        frame = self.cache.get_first(keys)
+        if frame is None:
+            frame = self._compute_indicators(df, columns)
+            self.cache.set(keys[0], frame)
+            frame = frame.copy(deep=False)
+        return frame
     
-    def add_all_indicators(self, df):
+    def add_all_indicators(self, df, symbol=None):
         """Add all technical indicators to DataFrame"""
+        return self.add_indicators(df, None, symbol)
+    
+    def _compute_indicators(self, df, columns=None):
+        """Evaluate the requested registry columns on a shallow copy of df (uncached)
+        
+        New columns are added to the copy only; the OHLCV arrays stay shared
+        with the caller's frame.
+        """
         # Standardize column names first
         result_df = self.standardize_columns(df)
+        if result_df is df:
+            result_df = df.copy(deep=False)
         
-        try:
-            # Verify required columns exist
-            required_cols = ['Close']
-            if not all(col in result_df.columns for col in required_cols):
-                print(f"⚠️ Missing required columns. Available: {list(result_df.columns)}")
-                return result_df
-            
-            # Basic moving averages
-            result_df['SMA_10'] = self.sma(result_df['Close'], 10)
-            result_df['SMA_20'] = self.sma(result_df['Close'], 20)
-            result_df['SMA_50'] = self.sma(result_df['Close'], 50)
-            result_df['EMA_10'] = self.ema(result_df['Close'], 10)
-            result_df['EMA_20'] = self.ema(result_df['Close'], 20)
-            result_df['EMA_50'] = self.ema(result_df['Close'], 50)
-            
-            # RSI
-            result_df['RSI'] = self.rsi(result_df['Close'])
-            
-            # MACD
-            macd_data = self.macd(result_df['Close'])
-            result_df['MACD'] = macd_data['MACD']
-            result_df['MACD_Signal'] = macd_data['MACD_Signal']
-            result_df['MACD_Histogram'] = macd_data['MACD_Histogram']
-            
-            # Bollinger Bands
-            bb_data = self.bollinger_bands(result_df['Close'])
-            result_df['BB_Upper'] = bb_data['BB_Upper']
-            result_df['BB_Middle'] = bb_data['BB_Middle']
-            result_df['BB_Lower'] = bb_data['BB_Lower']
-            
-            # Advanced indicators (only if OHLC data available)
-            if all(col in result_df.columns for col in ['High', 'Low']):
-                # Stochastic
-                stoch_data = self.stochastic(result_df['High'], result_df['Low'], result_df['Close'])
-                result_df['Stoch_K'] = stoch_data['Stoch_K']
-                result_df['Stoch_D'] = stoch_data['Stoch_D']
-                
-                # ATR
-                result_df['ATR'] = self.atr(result_df['High'], result_df['Low'], result_df['Close'])
-                
-                # Supertrend (with error handling)
-                try:
-                    result_df['Supertrend'] = self.supertrend(result_df['High'], result_df['Low'], result_df['Close'])
-                except Exception as e:
-                    print(f"⚠️ Supertrend failed, using EMA fallback: {e}")
-                    result_df['Supertrend'] = result_df['EMA_20']
-                
-                # Williams %R
-                result_df['Williams_R'] = self.williams_r(result_df['High'], result_df['Low'], result_df['Close'])
-                
-                # CCI
-                result_df['CCI'] = self.cci(result_df['High'], result_df['Low'], result_df['Close'])
-            
-            # Price momentum indicators
-            result_df['Momentum'] = self.momentum(result_df['Close'])
-            result_df['ROC'] = self.roc(result_df['Close'])
-            
-            # Volume indicators (if volume available)
-            if 'Volume' in result_df.columns:
-                result_df['Volume_SMA'] = self.sma(result_df['Volume'], 20)
-                # Volume Price Trend
-                price_change = result_df['Close'].pct_change()
-                result_df['VPT'] = (result_df['Volume'] * price_change).cumsum()
-            
-            indicators_added = len([col for col in result_df.columns if col not in df.columns])
-            print(f"✅ Added {indicators_added} technical indicators")
-            
-        except Exception as e:
-            print(f"⚠️ Error adding indicators: {e}")
+        # Verify required columns exist
+        if 'Close' not in result_df.columns:
+            print(f"⚠️ Missing required columns. Available: {list(result_df.columns)}")
+            return result_df
         
+        self.registry.evaluate(self, result_df, columns)
+        compact_columns(result_df, self.registry.resolve_columns(columns), self.dtype)
+        
+        indicators_added = len([col for col in result_df.columns if col not in df.columns])
+        print(f"✅ Added {indicators_added} technical indicators")
         return result_df
     
+    def add_all_indicators_panel(self, stocks_data, columns=None):
+        """Built-in indicators for many symbols in one vectorized pass
+        
+        Returns an IndicatorPanel of (time x symbol) arrays; panel.frame(symbol)
+        gives the per-symbol DataFrame add_all_indicators would have returned.
+        Indicators added with register_indicator are not in the panel.
+        """
+        frames = {
+            symbol: self.standardize_columns(data)
+            for symbol, data in stocks_data.items()
+            if data is not None and not data.empty
+        }
+        builtin = [column for spec in self.registry.resolve(columns) if spec.builtin for column in spec.outputs]
+        panel = PanelIndicators(dtype=self.dtype).compute(frames, builtin)
+        print(f"✅ Added technical indicators for {len(panel.symbols)} symbols")
+        return panel
+    
+    def add_all_indicators_many(self, stocks_data):
+        """add_all_indicators for a {symbol: frame} dict; returns {symbol: frame}"""
+        return self.add_indicators_many(stocks_data, None)
+    
+    def add_indicators_many(self, stocks_data, columns=None):
+        """add_indicators for a {symbol: frame} dict; returns {symbol: frame}
+        
+        Frames already in the cache are reused; the rest get the built-in
+        indicators in one panel pass, any registered extras per frame, and
+        are cached for the next consumer.
+        """
+        specs = self.registry.resolve(columns)
+        builtin_columns = [column for spec in specs if spec.builtin for column in spec.outputs]
+        extras = [spec for spec in specs if not spec.builtin]
+        builtin_names = [spec.name for spec in specs if spec.builtin]
+        
+        results = {}
+        missing = {}
+        for symbol, data in stocks_data.items():
+            if data is None or data.empty:
+                continue
+            frame = self.cache.get_first(self._cache_keys(symbol, data, columns)) if self.cache is not None else None
+            if frame is not None:
+                results[symbol] = frame
+            else:
+                missing[symbol] = data
+        
+        if missing:
+            panel = self.add_all_indicators_panel(missing, columns)
+            for symbol, data in missing.items():
+                standardized = self.standardize_columns(data)
+                if symbol in panel.positions and 'Close' in standardized.columns:
+                    frame = panel.frame(symbol, standardized, [c for c in builtin_columns if c in panel])
+                    if extras:
+                        extra_columns = [column for spec in extras for column in spec.outputs]
+                        self.registry.evaluate(self, frame, extra_columns, skip=builtin_names)
+                        compact_columns(frame, extra_columns, self.dtype)
+                else:
+                    frame = self._compute_indicators(data, columns)
+                if self.cache is not None:
+                    self.cache.set(self._cache_keys(symbol, data, columns)[0], frame)
+                    frame = frame.copy(deep=False)
+                results[symbol] = frame
+        
+        return {symbol: results[symbol] for symbol in stocks_data if symbol in results}
+    
+    def memory_report(self, stocks_data=None):
+        """Bytes per symbol of indicator frames (the cached ones when stocks_data is None)"""
+        if stocks_data is None:
+            return self.cache.memory_report()
+        return memory_report(stocks_data)
+    
     def get_signals(self, df):
         """Generate trading signals based on indicators"""
         signals = []
@@ -5,32 +5,20 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from src.schema import canonicalize_columns
+from src.indicators.breadth import BreadthEngine
+
 class MarketRegimeDetector:
-    def __init__(self, data_fetcher):
+    def __init__(self, data_fetcher, technical_indicators=None):
         self.data_fetcher = data_fetcher
+        # When given, EMA/RSI come from its panel indicator pass
+        self.technical_indicators = technical_indicators
+        self.breadth_engine = BreadthEngine(technical_indicators)
+        self.breadth_history = None
         
     def standardize_columns(self, df):
-        """Standardize column names to handle case variations"""
-        if df.empty:
-            return df
-            
-        df_copy = df.copy()
-        
-        # Map common variations to standard names
-        column_mapping = {
-            'open': 'Open',
-            'high': 'High', 
-            'low': 'Low',
-            'close': 'Close',
-            'volume': 'Volume'
-        }
-        
-        # Rename columns if they exist
-        for old_name, new_name in column_mapping.items():
-            if old_name in df_copy.columns:
-                df_copy = df_copy.rename(columns={old_name: new_name})
-        
-        return df_copy
+        """Standardize column names to handle case variations (no data copy)"""
+        return canonicalize_columns(df)
     
     def detect_current_regime(self):
         """Detect current market regime"""
@@ -73,76 +61,20 @@ class MarketRegimeDetector:
             return indicators
         
         try:
-            stocks_above_ema = 0
-            rsi_values = []
-            volatilities = []
-            volume_trends = []
-            momentum_values = []
-            
-            for symbol, data in stocks_data.items():
-                try:
-                    # Standardize column names
-                    data = self.standardize_columns(data)
-                    
-                    if len(data) < 20 or 'Close' not in data.columns:
-                        continue
-                    
-                    # Calculate EMA
-                    ema_20 = data['Close'].ewm(span=20).mean()
-                    latest_price = data['Close'].iloc[-1]
-                    latest_ema = ema_20.iloc[-1]
-                    
-                    # Check if stock is above EMA
-                    if not pd.isna(latest_ema) and latest_price > latest_ema:
-                        stocks_above_ema += 1
-                    
-                    # Calculate RSI
-                    delta = data['Close'].diff()
-                    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                    rs = gain / loss
-                    rsi = 100 - (100 / (1 + rs))
-                    
-                    if not pd.isna(rsi.iloc[-1]):
-                        rsi_values.append(rsi.iloc[-1])
-                    
-                    # Calculate volatility (20-day rolling std of returns)
-                    returns = data['Close'].pct_change()
-                    volatility = returns.rolling(window=20).std().iloc[-1]
-                    if not pd.isna(volatility):
-                        volatilities.append(volatility * 100)  # Convert to percentage
-                    
-                    # Volume trend (if volume data available)
-                    if 'Volume' in data.columns:
-                        volume_ma_short = data['Volume'].rolling(window=10).mean()
-                        volume_ma_long = data['Volume'].rolling(window=20).mean()
-                        if not pd.isna(volume_ma_short.iloc[-1]) and not pd.isna(volume_ma_long.iloc[-1]):
-                            volume_trend = volume_ma_short.iloc[-1] / volume_ma_long.iloc[-1]
-                            volume_trends.append(volume_trend)
-                    
-                    # Price momentum (10-day)
-                    if len(data) >= 10:
-                        momentum = (data['Close'].iloc[-1] / data['Close'].iloc[-10] - 1) * 100
-                        if not pd.isna(momentum):
-                            momentum_values.append(momentum)
-                
-                except Exception as e:
-                    print(f"Error processing {symbol}: {e}")
-                    continue
-            
-            # Calculate final indicators
-            indicators['stocks_above_ema'] = stocks_above_ema
-            indicators['average_rsi'] = np.mean(rsi_values) if rsi_values else 50
-            indicators['market_breadth'] = (stocks_above_ema / len(stocks_data)) * 100 if stocks_data else 50
-            indicators['volatility'] = np.mean(volatilities) if volatilities else 2.0
-            indicators['volume_trend'] = np.mean(volume_trends) if volume_trends else 1.0
-            indicators['price_momentum'] = np.mean(momentum_values) if momentum_values else 0
+            # One pass over the (time x symbol) matrix; keeps the whole breadth history too
+            breadth = self.breadth_engine.compute(stocks_data)
+            self.breadth_history = breadth['history']
+            indicators = breadth['latest']
             
         except Exception as e:
             print(f"Error calculating regime indicators: {e}")
         
         return indicators
     
+    def get_breadth_history(self):
+        """Per-bar breadth (percent above EMA, mean RSI, dispersion, advance/decline, ...) of the last detection"""
+        return self.breadth_history
+    
     def _classify_regime(self, indicators):
         """Classify market regime based on indicators"""
         try:
@@ -0,0 +1,198 @@
+# src/resampler.py
+"""
+Multi-timeframe intraday bars built from one 1-minute series, on NSE session boundaries
+"""
+import logging
+import numpy as np
+import pandas as pd
+
+from src.schema import canonicalize_columns
+
+logger = logging.getLogger(__name__)
+
+NSE_TIMEZONE = 'Asia/Kolkata'
+NSE_SESSION_OPEN = '09:15'
+NSE_SESSION_CLOSE = '15:30'
+
+DEFAULT_TIMEFRAMES = ('1m', '5m', '15m', '60m')
+
+NS_PER_MINUTE = 60 * 10**9
+
+def timeframe_minutes(timeframe):
+    """Length in minutes of a timeframe name like '5m' or '1h'"""
+    name = str(timeframe).strip().lower()
+    if name.endswith('m') and name[:-1].isdigit():
+        minutes = int(name[:-1])
+    elif name.endswith('h') and name[:-1].isdigit():
+        minutes = int(name[:-1]) * 60
+    else:
+        raise ValueError(f"Unknown timeframe {timeframe!r} (use e.g. '5m' or '1h')")
+    if minutes <= 0:
+        raise ValueError(f"Timeframe must be positive: {timeframe!r}")
+    return minutes
+
+def _clock_minutes(value):
+    hours, minutes = str(value).split(':')
+    return int(hours) * 60 + int(minutes)
+
+class BarResampler:
+    """Builds every configured timeframe from 1-minute bars in one pass
+    
+    Bars are bucketed by minutes since the session open, so each day's
+    buckets start at 09:15 (09:15, 09:20, ... for 5m; 09:15, 10:15, ...,
+    15:15 for 60m, the last one 15 minutes long as on NSE). Minutes outside
+    the session (pre-open, post-close) are left out, and no bucket spans two
+    sessions. Each timeframe is reduced from the previous one when it
+    divides it (1m -> 5m -> 15m -> 60m), so every level reads far fewer
+    rows than the base series. Bars are labelled by their start time.
+    
+    The last bucket is partial when the data ends before the bucket does
+    (a bar still forming). It is dropped unless include_partial is set; a
+    kept partial bar is flagged in frame.attrs['partial'].
+    """
+    
+    def __init__(self, timeframes=DEFAULT_TIMEFRAMES, session_open=NSE_SESSION_OPEN,
+                 session_close=NSE_SESSION_CLOSE, include_partial=False, timezone=NSE_TIMEZONE):
+        self.timeframes = sorted(dict.fromkeys(timeframes), key=timeframe_minutes)
+        self.session_open = _clock_minutes(session_open)
+        self.session_length = _clock_minutes(session_close) - self.session_open
+        if self.session_length <= 0:
+            raise ValueError(f"Session close {session_close} must be after open {session_open}")
+        self.include_partial = include_partial
+        self.timezone = timezone
+    
+    def _session_bars(self, bars):
+        """1-minute arrays restricted to session minutes, in time order"""
+        index = pd.DatetimeIndex(bars.index)
+        unit = index.unit
+        index = index.as_unit('ns')
+        tz = index.tz
+        if tz is not None:
+            # Session times are exchange wall-clock times
+            index = index.tz_convert(self.timezone).tz_localize(None)
+        
+        order = np.argsort(index.asi8, kind='stable')
+        stamps = index.asi8[order]
+        keep = np.ones(len(stamps), dtype=bool)
+        keep[:-1] = stamps[1:] != stamps[:-1]  # last bar wins for a repeated minute
+        
+        day = stamps - stamps % (24 * 60 * NS_PER_MINUTE)
+        offset = (stamps - day) // NS_PER_MINUTE - self.session_open
+        keep &= (offset >= 0) & (offset < self.session_length)
+        
+        rows = order[keep]
+        level = {'day': day[keep], 'offset': offset[keep]}
+        for column in ('Open', 'High', 'Low', 'Close'):
+            level[column] = bars[column].to_numpy(dtype=float)[rows]
+        volume = bars['Volume'].to_numpy(dtype=float)[rows] if 'Volume' in bars.columns else np.zeros(len(rows))
+        level['Volume'] = np.nan_to_num(volume)
+        return level, (tz, unit), stamps[-1]
+    
+    @staticmethod
+    def _reduce(level, minutes):
+        """Aggregate a level's bars into buckets of `minutes` since the open"""
+        bucket = level['offset'] // minutes * minutes
+        day = level['day']
+        change = np.ones(len(bucket), dtype=bool)
+        change[1:] = (bucket[1:] != bucket[:-1]) | (day[1:] != day[:-1])
+        starts = np.flatnonzero(change)
+        ends = np.append(starts[1:], len(bucket))[:len(starts)] - 1
+        return {
+            'day': day[starts],
+            'offset': bucket[starts],
+            'Open': level['Open'][starts],
+            'High': np.fmax.reduceat(level['High'], starts),
+            'Low': np.fmin.reduceat(level['Low'], starts),
+            'Close': level['Close'][ends],
+            'Volume': np.add.reduceat(level['Volume'], starts)
+        }
+    
+    def resample(self, minute_bars, as_of=None):
+        """{timeframe: OHLCV frame} for one symbol's 1-minute bars
+        
+        as_of is the time the data is complete up to (default: one minute
+        after the last bar); a bucket ending after it is partial.
+        """
+        empty = {timeframe: pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+                 for timeframe in self.timeframes}
+        if minute_bars is None or minute_bars.empty:
+            return empty
+        bars = canonicalize_columns(minute_bars)
+        if not all(column in bars.columns for column in ('Open', 'High', 'Low', 'Close')):
+            logger.warning(f"Missing OHLC columns for resampling: {list(bars.columns)}")
+            return empty
+        
+        base, index_type, last_stamp = self._session_bars(bars)
+        if as_of is None:
+            complete_until = last_stamp + NS_PER_MINUTE
+        else:
+            as_of = pd.Timestamp(as_of)
+            if as_of.tzinfo is not None:
+                as_of = as_of.tz_convert(self.timezone).tz_localize(None)
+            complete_until = as_of.as_unit('ns').value
+        integer_volume = 'Volume' in bars.columns and bars['Volume'].dtype.kind in 'iu'
+        
+        results = {}
+        levels = [(1, base)]
+        for timeframe in self.timeframes:
+            minutes = timeframe_minutes(timeframe)
+            # Coarsest finer level whose buckets nest inside this timeframe's
+            source_minutes, source = next((m, level) for m, level in reversed(levels) if minutes % m == 0)
+            level = source if minutes == source_minutes else self._reduce(source, minutes)
+            levels.append((minutes, level))
+            results[timeframe] = self._frame(level, minutes, index_type, complete_until, integer_volume)
+        return results
+    
+    def _frame(self, level, minutes, index_type, complete_until, integer_volume):
+        """OHLCV frame for one level, with the partial last bar handled"""
+        start = level['day'] + (self.session_open + level['offset']) * NS_PER_MINUTE
+        end_offset = np.minimum(level['offset'] + minutes, self.session_length)
+        end = level['day'] + (self.session_open + end_offset) * NS_PER_MINUTE
+        
+        partial = len(end) > 0 and end[-1] > complete_until
+        rows = slice(None) if self.include_partial or not partial else slice(None, -1)
+        
+        tz, unit = index_type
+        index = pd.DatetimeIndex(start[rows]).as_unit(unit)
+        if tz is not None:
+            index = index.tz_localize(self.timezone)
+        frame = pd.DataFrame({column: level[column][rows] for column in ('Open', 'High', 'Low', 'Close', 'Volume')},
+                             index=index)
+        if integer_volume:
+            frame['Volume'] = frame['Volume'].astype('int64')
+        frame.attrs['partial'] = bool(partial and self.include_partial)
+        return frame
+    
+    def resample_many(self, stocks_data, as_of=None):
+        """{timeframe: {symbol: frame}} for a {symbol: 1-minute frame} dict"""
+        by_timeframe = {timeframe: {} for timeframe in self.timeframes}
+        for symbol, minute_bars in stocks_data.items():
+            for timeframe, frame in self.resample(minute_bars, as_of).items():
+                if not frame.empty:
+                    by_timeframe[timeframe][symbol] = frame
+        return by_timeframe
+    
+    @staticmethod
+    def add_indicators(technical_indicators, bars_by_timeframe, columns=None, symbol=None):
+        """TechnicalIndicators per timeframe for one symbol; returns {timeframe: frame}
+        
+        With a symbol, results are cached per (symbol, timeframe).
+        """
+        return {
+            timeframe: technical_indicators.add_indicators(
+                frame, columns, symbol=f"{symbol}@{timeframe}" if symbol else None)
+            for timeframe, frame in bars_by_timeframe.items()
+            if not frame.empty
+        }
+    
+    @staticmethod
+    def add_indicators_many(technical_indicators, by_timeframe, columns=None):
+        """One panel pass per timeframe over {timeframe: {symbol: frame}}"""
+        results = {}
+        for timeframe, stocks_data in by_timeframe.items():
+            # Timeframe-qualified names keep cache entries apart
+            frames = technical_indicators.add_indicators_many(
+                {f"{symbol}@{timeframe}": frame for symbol, frame in stocks_data.items()}, columns)
+            results[timeframe] = {symbol: frames[f"{symbol}@{timeframe}"]
+                                  for symbol in stocks_data if f"{symbol}@{timeframe}" in frames}
+        return results
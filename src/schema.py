@@ -0,0 +1,37 @@
+# src/schema.py
+"""
+Canonical OHLCV column schema shared by the data layer, indicators and strategies
+"""
+
+CANONICAL_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Case/whitespace variants ('close', ' VOLUME') map to the canonical name
+COLUMN_ALIASES = {column.lower(): column for column in CANONICAL_COLUMNS}
+
+def canonical_column_map(columns):
+    """{source column: canonical name} for the columns that need renaming"""
+    present = set(columns)
+    mapping = {}
+    for column in columns:
+        if column in CANONICAL_COLUMNS or not isinstance(column, str):
+            continue
+        canonical = COLUMN_ALIASES.get(column.strip().lower())
+        # Never create a duplicate of a canonical column that is already there
+        if canonical and canonical not in present and canonical not in mapping.values():
+            mapping[column] = canonical
+    return mapping
+
+def canonicalize_columns(df):
+    """Frame with canonical OHLCV column names, without copying any data
+    
+    Returns df itself when it is already canonical; otherwise a shallow
+    copy (shared column arrays) with all columns renamed in one step.
+    """
+    if df is None:
+        return df
+    mapping = canonical_column_map(df.columns)
+    if not mapping:
+        return df
+    renamed = df.copy(deep=False)
+    renamed.columns = [mapping.get(column, column) for column in df.columns]
+    return renamed
@@ -0,0 +1,78 @@
+# src/single_flight.py
+"""
+In-flight request coalescing: concurrent callers for the same key share one fetch
+"""
+import threading
+
+class _Call:
+    """A fetch in progress and its eventual outcome"""
+    
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run at most one call per key at a time
+    
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running block until it finishes and receive the same
+    result, or the same exception. Nothing is remembered once the call
+    completes - caching stays the job of DataCache.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        
+        # Counters
+        self.executions = 0
+        self.coalesced = 0
+    
+    def do(self, key, func, *args, **kwargs):
+        """Call func(*args, **kwargs), or join an identical call already in flight"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.executions += 1
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+    
+    def in_flight(self):
+        """Keys currently being fetched"""
+        with self.lock:
+            return list(self.calls)
+    
+    def get_stats(self):
+        """Get coalescing counters for monitoring"""
+        with self.lock:
+            requests = self.executions + self.coalesced
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self.calls),
+                'saved_rate': round(self.coalesced / requests * 100, 1) if requests else 0.0
+            }
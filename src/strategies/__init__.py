@@ -4,5 +4,10 @@ Trading strategies package
 """
 
 from .signal_generator import SignalGenerator
+from .rules import RuleSet, compile_expression
+from .signal_matrix import SignalMatrix, evaluate_signal_matrix, evaluate_variants
+from .signals import Signal, SignalBatch
+from .signal_history import SignalHistory
 
-__all__ = ['SignalGenerator']
+__all__ = ['SignalGenerator', 'SignalMatrix', 'RuleSet', 'compile_expression', 'evaluate_signal_matrix',
+           'evaluate_variants', 'Signal', 'SignalBatch', 'SignalHistory']
@@ -0,0 +1,190 @@
+# src/strategies/parallel.py
+"""
+Process-pool signal generation: watchlist shards shipped to workers as plain arrays
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.schema import CANONICAL_COLUMNS, canonicalize_columns
+from .signal_matrix import evaluate_signal_matrix, MIN_BARS
+
+logger = logging.getLogger(__name__)
+
+# Below this many symbols the pool's shipping costs more than it saves
+PARALLEL_MIN_SYMBOLS = 100
+
+def pack_shard(stocks_data):
+    """One shard's OHLCV frames as a few flat arrays (cheap to pickle, no DataFrame overhead)
+    
+    Bars of every symbol are stacked into one (bars x column) float block;
+    lengths split it back up, and present marks which columns each symbol
+    really had.
+    """
+    symbols = list(stocks_data)
+    frames = [canonicalize_columns(stocks_data[symbol]) for symbol in symbols]
+    columns = [column for column in CANONICAL_COLUMNS if any(column in frame.columns for frame in frames)]
+    lengths = np.array([len(frame) for frame in frames], dtype=np.int64)
+    values = np.full((int(lengths.sum()), len(columns)), np.nan)
+    present = np.zeros((len(symbols), len(columns)), dtype=bool)
+    
+    stamps, timezones, units = [], [], []
+    start = 0
+    for i, frame in enumerate(frames):
+        for k, column in enumerate(columns):
+            if column in frame.columns:
+                values[start:start + len(frame), k] = frame[column].to_numpy(dtype=float)
+                present[i, k] = True
+        index = frame.index
+        if isinstance(index, pd.DatetimeIndex):
+            stamps.append(index.as_unit('ns').asi8)
+            timezones.append(index.tz)
+            units.append(index.unit)
+        else:
+            stamps.append(np.asarray(index))
+            timezones.append(None)
+            units.append(None)
+        start += len(frame)
+    
+    return {'symbols': symbols, 'columns': columns, 'lengths': lengths, 'values': values,
+            'present': present, 'stamps': stamps, 'timezones': timezones, 'units': units}
+
+def unpack_shard(shard):
+    """{symbol: OHLCV frame} back from pack_shard"""
+    frames = {}
+    start = 0
+    for i, symbol in enumerate(shard['symbols']):
+        length = int(shard['lengths'][i])
+        block = shard['values'][start:start + length]
+        start += length
+        
+        unit = shard['units'][i]
+        if unit is None:
+            index = pd.Index(shard['stamps'][i])
+        else:
+            index = pd.DatetimeIndex(shard['stamps'][i].view('datetime64[ns]')).as_unit(unit)
+            if shard['timezones'][i] is not None:
+                index = index.tz_localize('UTC').tz_convert(shard['timezones'][i])
+        frames[symbol] = pd.DataFrame({column: block[:, k] for k, column in enumerate(shard['columns'])
+                                       if shard['present'][i, k]}, index=index)
+    return frames
+
+def shard_symbols(stocks_data, shards):
+    """Split symbols into `shards` groups of about equal bar counts (largest first, into the lightest)"""
+    groups = [[] for _ in range(max(1, shards))]
+    loads = [0] * len(groups)
+    for symbol in sorted(stocks_data, key=lambda s: len(stocks_data[s]), reverse=True):
+        lightest = loads.index(min(loads))
+        groups[lightest].append(symbol)
+        loads[lightest] += len(stocks_data[symbol])
+    return [group for group in groups if group]
+
+# Per-process state, set once by the pool initializer
+_worker = {}
+
+def _init_worker(rule_set, dtype):
+    from src.indicators.technical import TechnicalIndicators
+    _worker['indicators'] = TechnicalIndicators(dtype=dtype)
+    _worker['rule_set'] = rule_set
+
+def _worker_ready():
+    return True
+
+def _evaluate_shard(shard):
+    """Indicators and every rule for one shard; returns (latest-bar signals, symbols processed)"""
+    rule_set = _worker['rule_set']
+    frames = _worker['indicators'].add_indicators_many(unpack_shard(shard), rule_set.indicator_columns)
+    matrix = evaluate_signal_matrix(frames, rule_set, tail=rule_set.lookback + 1)
+    return matrix.latest_signals(), len(matrix.symbols)
+
+class ParallelSignalEngine:
+    """Latest-bar signals for a large watchlist on a pool of worker processes
+    
+    Symbols are sharded by bar count, one shard per worker. Each shard goes
+    out as flat NumPy arrays (pack_shard), the worker runs the indicator
+    pass and the compiled rules on it, and only the few resulting signals
+    come back; they are merged in watchlist order for ranking. The pool is
+    started on first use and reused, so a worker keeps its rule set and
+    indicator setup between calls.
+    
+    Lists shorter than min_symbols (or workers <= 1) should stay in-process;
+    should_run says which.
+    
+    Workers are forked by default: spawn and forkserver re-import the
+    caller's __main__ in every worker, and main.py builds its components
+    and starts its scheduler threads at import. Forking is only safe while
+    the process has a single thread (a lock held by another thread stays
+    held forever in the child), so main.py calls start() before starting
+    any thread, and the pool is never forked once other threads are
+    running: if it has to be rebuilt then, the engine turns itself off
+    and generation stays in-process.
+    """
+    
+    def __init__(self, rule_set, workers=None, min_symbols=PARALLEL_MIN_SYMBOLS, dtype='float64',
+                 start_method=None):
+        self.rule_set = rule_set
+        self.workers = workers or os.cpu_count() or 1
+        self.min_symbols = min_symbols
+        self.dtype = dtype
+        if start_method is None:
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.start_method = start_method
+        self.available = True
+        self._pool = None
+    
+    def should_run(self, n_symbols):
+        return self.available and self.workers > 1 and n_symbols >= self.min_symbols
+    
+    def start(self):
+        """Start every worker process now; with fork, call this before the process starts any thread"""
+        # A fork pool launches all of its workers on the first submit
+        self._get_pool().submit(_worker_ready).result()
+    
+    def _get_pool(self):
+        if self._pool is None:
+            if self.start_method == 'fork' and threading.active_count() > 1:
+                self.available = False
+                raise RuntimeError(f"not forking signal workers from a process with {threading.active_count()} "
+                                   f"threads; start() the pool before any thread starts")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.rule_set, self.dtype)
+            )
+        return self._pool
+    
+    def generate(self, stocks_data):
+        """(signals in watchlist order, symbols processed) for {symbol: OHLCV frame}
+        
+        Signal timestamps are the bar times; pool failures propagate so the
+        caller can fall back to in-process generation.
+        """
+        eligible = {symbol: data for symbol, data in stocks_data.items()
+                    if data is not None and len(data) >= MIN_BARS}
+        if not eligible:
+            return [], 0
+        
+        shards = [pack_shard({symbol: eligible[symbol] for symbol in group})
+                  for group in shard_symbols(eligible, self.workers)]
+        try:
+            results = list(self._get_pool().map(_evaluate_shard, shards))
+        except Exception:
+            # A broken pool cannot be reused; the next call starts a fresh one
+            self.shutdown()
+            raise
+        
+        order = {symbol: position for position, symbol in enumerate(stocks_data)}
+        signals = [signal for shard_signals, _ in results for signal in shard_signals]
+        signals.sort(key=lambda signal: order[signal['symbol']])  # stable: rule order kept per symbol
+        return signals, sum(processed for _, processed in results)
+    
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,381 @@
+# src/strategies/rules.py
+"""
+Declarative signal rules (JSON/YAML) compiled to whole-array NumPy expressions
+"""
+import ast
+import json
+import copy
+from pathlib import Path
+
+import numpy as np
+
+from src.indicators.panel import _shift
+from src.indicators.rolling import rolling_array
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parents[2] / 'config' / 'signal_rules.json'
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# Built in: each symbol's running bar count (len(data) as the per-symbol rules read it)
+BAR_COUNT = 'Bars'
+
+ACTIONS = ('BUY', 'SELL')
+
+# Variant rules are named "<variant>.<rule>" once rule sets are combined
+VARIANT_SEPARATOR = '.'
+
+COMPARISONS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal
+}
+
+ARITHMETIC = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+
+ROLLING = {'rolling_max': 'max', 'rolling_min': 'min', 'rolling_mean': 'mean', 'rolling_std': 'std'}
+
+FUNCTIONS = ('prev', 'cross_above', 'cross_below', 'defined', 'abs', 'min', 'max', 'where') + tuple(ROLLING)
+
+def compile_expression(text, defines=None):
+    """Expression tree for one rule expression
+    
+    The syntax is a Python expression over column names: numbers, + - * /,
+    comparisons (chains like 35 <= RSI <= 45 included), and/or/not, and the
+    functions prev(x, n=1), rolling_max/min/mean/std(x, n),
+    cross_above(a, b), cross_below(a, b), defined(x, ...), abs, min, max
+    and where(condition, a, b). Names in `defines` are replaced by their own
+    (compiled) expressions; any other name is a column.
+    
+    Trees are nested tuples, so equal sub-expressions compare and hash
+    equal and are computed once per evaluation however many rules use them.
+    """
+    return _Compiler(defines or {}).compile(text)
+
+class _Compiler:
+    def __init__(self, defines):
+        self.defines = defines
+        self.compiled = {}
+        self.expanding = []
+    
+    def compile(self, text):
+        if isinstance(text, bool) or not isinstance(text, (str, int, float)):
+            raise ValueError(f"Rule expression must be a string or number, got {text!r}")
+        if not isinstance(text, str):
+            return ('const', float(text))
+        try:
+            tree = ast.parse(text.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid rule expression {text!r}: {e.msg}")
+        return self.node(tree.body, text)
+    
+    def define(self, name):
+        if name not in self.compiled:
+            if name in self.expanding:
+                raise ValueError(f"Rule definition {name!r} refers to itself")
+            self.expanding.append(name)
+            self.compiled[name] = self.compile(self.defines[name])
+            self.expanding.pop()
+        return self.compiled[name]
+    
+    def node(self, node, text):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return ('const', float(node.value))
+        if isinstance(node, ast.Name):
+            if node.id in self.defines:
+                return self.define(node.id)
+            if node.id in FUNCTIONS:
+                raise ValueError(f"{node.id} is a function, call it with arguments in {text!r}")
+            return ('column', node.id)
+        if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC:
+            return ('arithmetic', type(node.op), self.node(node.left, text), self.node(node.right, text))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return ('negate', self.node(node.operand, text))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.UAdd):
+            return self.node(node.operand, text)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ('not', self.node(node.operand, text))
+        if isinstance(node, ast.BoolOp):
+            kind = 'and' if isinstance(node.op, ast.And) else 'or'
+            return (kind,) + tuple(self.node(value, text) for value in node.values)
+        if isinstance(node, ast.Compare) and all(type(op) in COMPARISONS for op in node.ops):
+            # a < b < c is (a < b) and (b < c)
+            operands = [self.node(operand, text) for operand in [node.left] + node.comparators]
+            tests = tuple(('compare', type(op), operands[i], operands[i + 1]) for i, op in enumerate(node.ops))
+            return tests[0] if len(tests) == 1 else ('and',) + tests
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            return self.call(node.func.id, node.args, text)
+        raise ValueError(f"Unsupported syntax {ast.unparse(node)!r} in rule expression {text!r}")
+    
+    def call(self, name, args, text):
+        if name not in FUNCTIONS:
+            raise ValueError(f"Unknown function {name!r} in rule expression {text!r} (use one of {', '.join(FUNCTIONS)})")
+        
+        def arity(*counts):
+            if len(args) not in counts:
+                raise ValueError(f"{name}() takes {' or '.join(map(str, counts))} arguments in {text!r}")
+        
+        def periods(node, minimum):
+            if not (isinstance(node, ast.Constant) and isinstance(node.value, int)) or node.value < minimum:
+                raise ValueError(f"{name}() needs a whole number of bars >= {minimum} in {text!r}")
+            return node.value
+        
+        if name == 'prev':
+            arity(1, 2)
+            return ('prev', self.node(args[0], text), periods(args[1], 1) if len(args) == 2 else 1)
+        if name in ROLLING:
+            arity(2)
+            return ('rolling', ROLLING[name], self.node(args[0], text), periods(args[1], 1))
+        if name in ('cross_above', 'cross_below'):
+            arity(2)
+            a, b = self.node(args[0], text), self.node(args[1], text)
+            now, before = (ast.Gt, ast.LtE) if name == 'cross_above' else (ast.Lt, ast.GtE)
+            return ('and', ('compare', now, a, b), ('compare', before, ('prev', a, 1), ('prev', b, 1)))
+        if name == 'defined':
+            if not args:
+                raise ValueError(f"defined() needs at least one argument in {text!r}")
+            tests = tuple(('defined', self.node(arg, text)) for arg in args)
+            return tests[0] if len(tests) == 1 else ('and',) + tests
+        if name == 'abs':
+            arity(1)
+            return ('abs', self.node(args[0], text))
+        if name in ('min', 'max'):
+            arity(2)
+            return (name, self.node(args[0], text), self.node(args[1], text))
+        arity(3)
+        return ('where',) + tuple(self.node(arg, text) for arg in args)
+
+def expression_columns(tree, columns=None):
+    """Set of column names an expression tree reads"""
+    columns = set() if columns is None else columns
+    if tree[0] == 'column':
+        columns.add(tree[1])
+    for child in tree[1:]:
+        if isinstance(child, tuple):
+            expression_columns(child, columns)
+    return columns
+
+def expression_lookback(tree):
+    """Bars of history before the current one an expression reads"""
+    kind = tree[0]
+    if kind == 'prev':
+        return expression_lookback(tree[1]) + tree[2]
+    if kind == 'rolling':
+        return expression_lookback(tree[2]) + tree[3] - 1
+    return max([expression_lookback(child) for child in tree[1:] if isinstance(child, tuple)], default=0)
+
+def evaluate_expression(tree, columns, memo=None):
+    """Array value of an expression tree over {column: array}; memo shares sub-results"""
+    kind = tree[0]
+    if kind == 'const':
+        return tree[1]
+    if kind == 'column':
+        return columns[tree[1]]
+    if memo is not None and tree in memo:
+        return memo[tree]
+    
+    def arg(position):
+        return evaluate_expression(tree[position], columns, memo)
+    
+    if kind == 'arithmetic':
+        result = ARITHMETIC[tree[1]](arg(2), arg(3))
+    elif kind == 'compare':
+        result = COMPARISONS[tree[1]](arg(2), arg(3))
+    elif kind in ('and', 'or'):
+        combine = np.logical_and if kind == 'and' else np.logical_or
+        result = arg(1)
+        for position in range(2, len(tree)):
+            result = combine(result, arg(position))
+    elif kind == 'not':
+        result = np.logical_not(arg(1))
+    elif kind == 'negate':
+        result = np.negative(arg(1))
+    elif kind == 'prev':
+        result = _shift(np.asarray(arg(1), dtype=float), tree[2])
+    elif kind == 'rolling':
+        result = rolling_array(arg(2), tree[3], tree[1])
+    elif kind == 'defined':
+        result = ~np.isnan(np.asarray(arg(1), dtype=float))
+    elif kind == 'abs':
+        result = np.abs(arg(1))
+    elif kind == 'min':
+        result = np.minimum(arg(1), arg(2))
+    elif kind == 'max':
+        result = np.maximum(arg(1), arg(2))
+    else:
+        result = np.where(arg(1), arg(2), arg(3))
+    
+    if memo is not None:
+        memo[tree] = result
+    return result
+
+class Rule:
+    """One compiled rule: an if/elif chain of branches, at most one fires per bar"""
+    
+    def __init__(self, name, branches, columns, lookback):
+        self.name = name
+        self.branches = branches      # [{'when', 'action', 'confidence', 'stop', 'target', 'value', 'reason'}]
+        self.columns = columns
+        self.lookback = lookback
+    
+    @property
+    def outcomes(self):
+        return [(branch['action'], branch['confidence'], branch['reason']) for branch in self.branches]
+
+class RuleSet:
+    """Signal rules compiled from a declarative spec
+    
+    A spec (JSON or YAML, or the same dict) has a name, optional `define`
+    (named expressions shared by every rule) and `rules`. Each rule lists
+    `branches` tried in order; the first whose `when` holds on a bar gives
+    the signal. A rule may add a `guard` (and-ed into every branch),
+    `min_bars` (bars the symbol must have) and a `value` the reason quotes;
+    a branch may override `value`. `stop` and `target` are expressions, or
+    a number meaning that multiple of Close:
+        
+        {"when": "RSI <= 30", "action": "BUY", "confidence": 85,
+         "stop": 0.95, "target": 1.08, "reason": "RSI oversold ({value:.1f})"}
+    
+    A rule whose columns are missing is skipped, as the per-symbol methods
+    skipped a missing indicator. Rules evaluate over whole (time x symbol)
+    arrays, so adding a rule or a variant adds array operations, not
+    per-symbol Python.
+    """
+    
+    _default = None
+    
+    def __init__(self, spec):
+        if not isinstance(spec, dict) or not isinstance(spec.get('rules'), list):
+            raise ValueError("Rule spec must be a mapping with a 'rules' list")
+        self.spec = copy.deepcopy(spec)
+        self.name = str(spec.get('name', 'rules'))
+        compiler = _Compiler(dict(spec.get('define') or {}))
+        
+        self.rules = []
+        for position, rule_spec in enumerate(spec['rules']):
+            name = rule_spec.get('name') or f'rule_{position + 1}'
+            if any(rule.name == name for rule in self.rules):
+                raise ValueError(f"Duplicate rule name {name!r}")
+            try:
+                self.rules.append(self._compile_rule(name, rule_spec, compiler))
+            except KeyError as e:
+                raise ValueError(f"Rule {name!r}: missing {e}")
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Rule {name!r}: {e}")
+        
+        self._index()
+    
+    def _index(self):
+        self.outcomes = {rule.name: rule.outcomes for rule in self.rules}
+        self.columns = set().union(*(rule.columns for rule in self.rules))
+        self.lookback = max([rule.lookback for rule in self.rules], default=0)
+    
+    @staticmethod
+    def _compile_rule(name, rule_spec, compiler):
+        guards = []
+        if rule_spec.get('guard'):
+            guards.append(compiler.compile(rule_spec['guard']))
+        if rule_spec.get('min_bars'):
+            guards.append(('compare', ast.GtE, ('column', BAR_COUNT), ('const', float(rule_spec['min_bars']))))
+        rule_value = compiler.compile(rule_spec['value']) if rule_spec.get('value') is not None else None
+        
+        def price_level(level):
+            # A bare number is a multiple of the bar's close
+            if isinstance(level, (int, float)) and not isinstance(level, bool):
+                return ('arithmetic', ast.Mult, ('column', 'Close'), ('const', float(level)))
+            return compiler.compile(level)
+        
+        branches = []
+        for branch in rule_spec.get('branches') or []:
+            action = str(branch['action']).upper()
+            if action not in ACTIONS:
+                raise ValueError(f"action must be BUY or SELL, got {branch['action']!r}")
+            when = compiler.compile(branch['when'])
+            branches.append({
+                'when': ('and',) + tuple(guards) + (when,) if guards else when,
+                'action': action,
+                'confidence': float(branch['confidence']),
+                'stop': price_level(branch['stop']),
+                'target': price_level(branch['target']),
+                'value': compiler.compile(branch['value']) if branch.get('value') is not None else rule_value,
+                'reason': str(branch.get('reason', name))
+            })
+        if not branches:
+            raise ValueError("needs at least one branch")
+        
+        trees = [tree for branch in branches
+                 for tree in (branch['when'], branch['stop'], branch['target'], branch['value']) if tree is not None]
+        columns = set()
+        for tree in trees:
+            expression_columns(tree, columns)
+        columns.add('Close')
+        columns.discard(BAR_COUNT)
+        return Rule(name, branches, columns, max(expression_lookback(tree) for tree in trees))
+    
+    @classmethod
+    def load(cls, source=None):
+        """RuleSet from a path (.json, .yaml/.yml), a spec dict or a RuleSet; None loads the default rules"""
+        if isinstance(source, cls):
+            return source
+        if isinstance(source, dict):
+            return cls(source)
+        if source is None:
+            # The bundled rules are read once per process
+            if cls._default is None:
+                cls._default = cls.load(DEFAULT_RULES_PATH)
+            return cls._default
+        path = Path(source)
+        with open(path, encoding='utf-8') as f:
+            if path.suffix.lower() in ('.yaml', '.yml'):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError(f"PyYAML is needed to read {path}; install it or use a .json rule file")
+                return cls(yaml.safe_load(f))
+            return cls(json.load(f))
+    
+    @classmethod
+    def combine(cls, rule_sets):
+        """One RuleSet holding every variant's rules as "<variant>.<rule>"
+        
+        Definitions are inlined when compiled, so variants never clash over
+        names while the sub-expressions they share are still computed once.
+        """
+        rule_sets = [cls.load(rule_set) for rule_set in rule_sets]
+        names = [rule_set.name for rule_set in rule_sets]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Rule set variants need distinct names, got {names}")
+        
+        combined = cls.__new__(cls)
+        combined.spec = {'name': 'combined', 'variants': [rule_set.spec for rule_set in rule_sets]}
+        combined.name = 'combined'
+        combined.rules = [Rule(f"{rule_set.name}{VARIANT_SEPARATOR}{rule.name}", rule.branches, rule.columns, rule.lookback)
+                          for rule_set in rule_sets for rule in rule_set.rules]
+        combined._index()
+        return combined
+    
+    @property
+    def indicator_columns(self):
+        """Columns the rules read besides OHLCV (what the indicator pass must add)"""
+        return sorted(self.columns.difference(PRICE_COLUMNS))
+    
+    def evaluate(self, c):
+        """{rule: (branches, stops, targets, values)} over packed arrays c
+        
+        c holds the rule columns and Bars; rules reading a column c lacks
+        are left out.
+        """
+        memo = {}
+        rules = {}
+        for rule in self.rules:
+            if not rule.columns.issubset(c):
+                continue
+            
+            def value_of(tree):
+                return evaluate_expression(tree, c, memo)
+            
+            rules[rule.name] = (
+                [value_of(branch['when']) for branch in rule.branches],
+                [value_of(branch['stop']) for branch in rule.branches],
+                [value_of(branch['target']) for branch in rule.branches],
+                [None if branch['value'] is None else value_of(branch['value']) for branch in rule.branches]
+            )
+        return rules
@@ -8,13 +8,30 @@ import logging
 from datetime import datetime
 import random
 
+from .rules import RuleSet
+from .signal_matrix import evaluate_signal_matrix, evaluate_variants
+from .parallel import ParallelSignalEngine, PARALLEL_MIN_SYMBOLS
+from .signals import Signal, SignalBatch
+from .signal_history import SignalHistory, DEFAULT_CAPACITY
+
 logger = logging.getLogger(__name__)
 
 class SignalGenerator:
-    def __init__(self, technical_indicators, market_regime_detector):
+    def __init__(self, technical_indicators, market_regime_detector, rules=None, workers=1,
+                 parallel_min_symbols=PARALLEL_MIN_SYMBOLS, history_path=None, history_capacity=DEFAULT_CAPACITY):
         self.indicators = technical_indicators
         self.regime_detector = market_regime_detector
-        self.signal_history = []
+        # Ring buffer of ranked signals; with a path it is also kept in SQLite across restarts
+        self.signal_history = SignalHistory(history_capacity, history_path)
+        
+        # Declarative rules (config/signal_rules.json unless a file, spec or RuleSet is given)
+        self.rule_set = RuleSet.load(rules)
+        
+        # Process pool for large watchlists (workers > 1, or 0 for every CPU); smaller lists run in-process
+        self.parallel = None
+        if workers != 1:
+            self.parallel = ParallelSignalEngine(self.rule_set, workers or None, parallel_min_symbols,
+                                                 dtype=getattr(technical_indicators, 'dtype', 'float64'))
         
         # Signal generation parameters
         self.min_confidence = 60  # Lower threshold for more signals
@@ -39,30 +56,24 @@ class SignalGenerator:
             if market_regime is None:
                 market_regime = {'regime': 'bull', 'confidence': 75.0}  # Default bullish
             
-            processed_count = 0
-            for symbol, data in stocks_data.items():
+            all_signals, processed_count = None, 0
+            if self.parallel is not None and self.parallel.should_run(len(stocks_data)):
                 try:
-                    if len(data) < 10:
-                        continue
-                    
-                    # Add technical indicators
-                    enhanced_data = self.indicators.add_all_indicators(data)
-                    
-                    if len(enhanced_data) < 5:
-                        continue
-                    
-                    # Generate signals for this stock
-                    stock_signals = self._generate_stock_signals(symbol, enhanced_data, market_regime)
-                    
-                    if stock_signals:
-                        all_signals.extend(stock_signals)
-                        print(f"   📡 {symbol}: {len(stock_signals)} signals")
-                    
-                    processed_count += 1
-                    
+                    print(f"⚡ Sharding {len(stocks_data)} stocks across {self.parallel.workers} workers")
+                    all_signals, processed_count = self.parallel.generate(stocks_data)
+                    all_signals = SignalBatch.from_signals(all_signals, datetime.now())
                 except Exception as e:
-                    print(f"⚠️ Error processing {symbol}: {e}")
-                    continue
+                    print(f"⚠️ Parallel signal generation failed, running in-process: {e}")
+                    logger.error(f"Parallel signal generation error: {e}")
+                    all_signals = None
+            if all_signals is None:
+                all_signals, processed_count = self._generate_in_process(stocks_data)
+            
+            signal_counts = {}
+            for signal in all_signals:
+                signal_counts[signal['symbol']] = signal_counts.get(signal['symbol'], 0) + 1
+            for symbol, count in signal_counts.items():
+                print(f"   📡 {symbol}: {count} signals")
             
             # If no signals from real data, generate test signals
             if not all_signals and processed_count > 0:
@@ -79,351 +90,98 @@ class SignalGenerator:
             print(f"❌ Signal generation error: {e}")
             logger.error(f"Signal generation error: {e}")
             return self._generate_test_signals()
-
-    def _generate_stock_signals(self, symbol, data, market_regime):
-        """Generate signals for individual stock"""
-        try:
-            signals = []
-            latest = data.iloc[-1]
-            
-            # Get current price
-            current_price = latest['Close']
-            
-            # Multiple signal strategies
-            
-            # 1. RSI-based signals
-            rsi_signals = self._get_rsi_signals(symbol, data, current_price)
-            signals.extend(rsi_signals)
-            
-            # 2. Moving average signals
-            ma_signals = self._get_moving_average_signals(symbol, data, current_price)
-            signals.extend(ma_signals)
-            
-            # 3. MACD signals
-            macd_signals = self._get_macd_signals(symbol, data, current_price)
-            signals.extend(macd_signals)
-            
-            # 4. Momentum signals
-            momentum_signals = self._get_momentum_signals(symbol, data, current_price)
-            signals.extend(momentum_signals)
-            
-            # 5. Volatility breakout signals
-            breakout_signals = self._get_breakout_signals(symbol, data, current_price)
-            signals.extend(breakout_signals)
-            
-            return signals
-            
-        except Exception as e:
-            logger.error(f"Error generating signals for {symbol}: {e}")
-            return []
-
-    def _get_rsi_signals(self, symbol, data, current_price):
-        """Generate RSI-based signals"""
-        signals = []
-        
-        try:
-            if 'RSI' not in data.columns:
-                return signals
-            
-            latest = data.iloc[-1]
-            rsi = latest['RSI']
-            
-            if pd.isna(rsi):
-                return signals
-            
-            # RSI Oversold (Strong Buy)
-            if rsi <= 30:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 85.0,
-                    'reasons': [f'RSI oversold ({rsi:.1f})'],
-                    'stop_loss': current_price * 0.95,
-                    'target_price': current_price * 1.08,
-                    'timestamp': datetime.now()
-                })
-            
-            # RSI Overbought (Strong Sell)
-            elif rsi >= 70:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 85.0,
-                    'reasons': [f'RSI overbought ({rsi:.1f})'],
-                    'stop_loss': current_price * 1.03,
-                    'target_price': current_price * 0.92,
-                    'timestamp': datetime.now()
-                })
-            
-            # RSI Momentum (Medium confidence)
-            elif 35 <= rsi <= 45:  # RSI recovering from oversold
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 70.0,
-                    'reasons': [f'RSI recovery ({rsi:.1f})'],
-                    'stop_loss': current_price * 0.96,
-                    'target_price': current_price * 1.06,
-                    'timestamp': datetime.now()
-                })
-            
-            elif 55 <= rsi <= 65:  # RSI declining from overbought
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 70.0,
-                    'reasons': [f'RSI weakness ({rsi:.1f})'],
-                    'stop_loss': current_price * 1.02,
-                    'target_price': current_price * 0.94,
-                    'timestamp': datetime.now()
-                })
-            
-        except Exception as e:
-            logger.error(f"RSI signal error for {symbol}: {e}")
-        
-        return signals
-
-    def _get_moving_average_signals(self, symbol, data, current_price):
-        """Generate moving average signals"""
-        signals = []
-        
-        try:
-            if not all(col in data.columns for col in ['EMA_10', 'EMA_20']):
-                return signals
-            
-            latest = data.iloc[-1]
-            previous = data.iloc[-2] if len(data) > 1 else latest
-            
-            ema10_now = latest['EMA_10']
-            ema20_now = latest['EMA_20']
-            ema10_prev = previous['EMA_10']
-            ema20_prev = previous['EMA_20']
-            
-            if any(pd.isna([ema10_now, ema20_now, ema10_prev, ema20_prev])):
-                return signals
-            
-            # Golden Cross (EMA10 crosses above EMA20)
-            if ema10_now > ema20_now and ema10_prev <= ema20_prev:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 80.0,
-                    'reasons': ['EMA Golden Cross (10>20)'],
-                    'stop_loss': current_price * 0.95,
-                    'target_price': current_price * 1.10,
-                    'timestamp': datetime.now()
-                })
-            
-            # Death Cross (EMA10 crosses below EMA20)
-            elif ema10_now < ema20_now and ema10_prev >= ema20_prev:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 80.0,
-                    'reasons': ['EMA Death Cross (10<20)'],
-                    'stop_loss': current_price * 1.03,
-                    'target_price': current_price * 0.90,
-                    'timestamp': datetime.now()
-                })
-            
-            # Price above/below EMAs
-            elif current_price > ema10_now > ema20_now:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 65.0,
-                    'reasons': ['Price above both EMAs'],
-                    'stop_loss': ema20_now * 0.98,
-                    'target_price': current_price * 1.05,
-                    'timestamp': datetime.now()
-                })
-            
-            elif current_price < ema10_now < ema20_now:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 65.0,
-                    'reasons': ['Price below both EMAs'],
-                    'stop_loss': ema20_now * 1.02,
-                    'target_price': current_price * 0.95,
-                    'timestamp': datetime.now()
-                })
-        
-        except Exception as e:
-            logger.error(f"Moving average signal error for {symbol}: {e}")
+    
+    def _generate_in_process(self, stocks_data):
+        """(latest-bar signals, symbols processed) computed in the calling process"""
+        # Only the indicators the rules read, whole universe in one pass (cached frames reused)
+        indicator_frames = self._compute_indicator_frames(stocks_data)
         
-        return signals
-
-    def _get_macd_signals(self, symbol, data, current_price):
-        """Generate MACD signals"""
-        signals = []
+        frames = {}
+        for symbol, data in stocks_data.items():
+            try:
+                if len(data) < 10:
+                    continue
+                
+                # Add technical indicators
+                if symbol in indicator_frames:
+                    frames[symbol] = indicator_frames[symbol]
+                else:
+                    frames[symbol] = self.indicators.add_all_indicators(data)
+                
+            except Exception as e:
+                print(f"⚠️ Error processing {symbol}: {e}")
+                continue
         
+        # Every rule on every symbol's latest bar at once
+        return (self._latest_signals(frames) if frames else []), len(frames)
+    
+    def start_workers(self):
+        """Start the signal worker pool now, if one is configured (before any thread starts)"""
+        if self.parallel is None:
+            return
         try:
-            if not all(col in data.columns for col in ['MACD', 'MACD_Signal']):
-                return signals
-            
-            latest = data.iloc[-1]
-            previous = data.iloc[-2] if len(data) > 1 else latest
-            
-            macd_now = latest['MACD']
-            signal_now = latest['MACD_Signal']
-            macd_prev = previous['MACD']
-            signal_prev = previous['MACD_Signal']
-            
-            if any(pd.isna([macd_now, signal_now, macd_prev, signal_prev])):
-                return signals
-            
-            # MACD Bullish Crossover
-            if macd_now > signal_now and macd_prev <= signal_prev:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 75.0,
-                    'reasons': ['MACD bullish crossover'],
-                    'stop_loss': current_price * 0.96,
-                    'target_price': current_price * 1.08,
-                    'timestamp': datetime.now()
-                })
-            
-            # MACD Bearish Crossover
-            elif macd_now < signal_now and macd_prev >= signal_prev:
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 75.0,
-                    'reasons': ['MACD bearish crossover'],
-                    'stop_loss': current_price * 1.02,
-                    'target_price': current_price * 0.92,
-                    'timestamp': datetime.now()
-                })
-        
+            self.parallel.start()
+            print(f"⚡ Started {self.parallel.workers} signal workers")
         except Exception as e:
-            logger.error(f"MACD signal error for {symbol}: {e}")
+            print(f"⚠️ Signal workers unavailable, generating in-process: {e}")
+            logger.error(f"Signal worker start error: {e}")
+            self.parallel.available = False
+    
+    def shutdown(self):
+        """Stop the signal worker pool, if one was started"""
+        if self.parallel is not None:
+            self.parallel.shutdown()
+    
+    def evaluate_history(self, stocks_data):
+        """Every rule on every bar of every symbol at once; returns a SignalMatrix
         
-        return signals
-
-    def _get_momentum_signals(self, symbol, data, current_price):
-        """Generate momentum-based signals"""
-        signals = []
+        signals_at(row) on the result gives the signals generate_signals
+        would have produced for the data up to that bar, so backtests and
+        analytics need no re-slicing.
+        """
+        return evaluate_signal_matrix(self._compute_indicator_frames(stocks_data), self.rule_set)
+    
+    def evaluate_variants(self, stocks_data, rule_sets):
+        """{variant name: SignalMatrix} for several rule sets (files, specs or RuleSets)
         
+        One indicator pass covers every column any variant reads, and the
+        variants' rules are evaluated together, sharing common expressions.
+        """
+        rule_sets = [RuleSet.load(rule_set) for rule_set in rule_sets]
+        columns = sorted(set().union(*(rule_set.indicator_columns for rule_set in rule_sets)))
+        return evaluate_variants(self._compute_indicator_frames(stocks_data, columns), rule_sets)
+    
+    def _compute_indicator_frames(self, stocks_data, columns=None):
+        """Indicator frames for every symbol, or {} to fall back to per-symbol computation"""
         try:
-            if len(data) < 5:
-                return signals
-            
-            # Price momentum (5-day)
-            price_5d_ago = data['Close'].iloc[-5]
-            momentum = ((current_price - price_5d_ago) / price_5d_ago) * 100
-            
-            # Strong positive momentum
-            if momentum > 4:  # 4% gain in 5 days
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 70.0,
-                    'reasons': [f'Strong momentum (+{momentum:.1f}% in 5d)'],
-                    'stop_loss': current_price * 0.96,
-                    'target_price': current_price * 1.06,
-                    'timestamp': datetime.now()
-                })
-            
-            # Strong negative momentum
-            elif momentum < -4:  # 4% loss in 5 days
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 70.0,
-                    'reasons': [f'Negative momentum ({momentum:.1f}% in 5d)'],
-                    'stop_loss': current_price * 1.02,
-                    'target_price': current_price * 0.94,
-                    'timestamp': datetime.now()
-                })
-            
-            # Volume momentum (if available)
-            if 'Volume' in data.columns and len(data) >= 10:
-                avg_volume = data['Volume'].tail(10).mean()
-                latest_volume = data['Volume'].iloc[-1]
-                
-                if latest_volume > avg_volume * 1.5:  # Volume spike
-                    # Volume spike with positive price momentum
-                    if momentum > 1:
-                        signals.append({
-                            'symbol': symbol,
-                            'action': 'BUY',
-                            'price': current_price,
-                            'confidence': 75.0,
-                            'reasons': [f'Volume spike + momentum (+{momentum:.1f}%)'],
-                            'stop_loss': current_price * 0.95,
-                            'target_price': current_price * 1.08,
-                            'timestamp': datetime.now()
-                        })
-        
+            eligible = {symbol: data for symbol, data in stocks_data.items() if data is not None and len(data) >= 10}
+            if not eligible or not hasattr(self.indicators, 'add_indicators_many'):
+                return {}
+            return self.indicators.add_indicators_many(eligible, columns or self.indicator_columns)
         except Exception as e:
-            logger.error(f"Momentum signal error for {symbol}: {e}")
-        
-        return signals
-
-    def _get_breakout_signals(self, symbol, data, current_price):
-        """Generate breakout signals"""
-        signals = []
-        
+            logger.error(f"Indicator computation error, falling back to per-symbol: {e}")
+            return {}
+    
+    def _generate_stock_signals(self, symbol, data, market_regime):
+        """Generate signals for individual stock"""
         try:
-            if len(data) < 20:
-                return signals
-            
-            # Calculate 20-day high/low
-            high_20d = data['High'].tail(20).max()
-            low_20d = data['Low'].tail(20).min()
-            
-            # Breakout above 20-day high
-            if current_price > high_20d * 1.01:  # 1% above high
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'BUY',
-                    'price': current_price,
-                    'confidence': 80.0,
-                    'reasons': [f'Breakout above 20d high (₹{high_20d:.2f})'],
-                    'stop_loss': high_20d * 0.98,
-                    'target_price': current_price * 1.10,
-                    'timestamp': datetime.now()
-                })
-            
-            # Breakdown below 20-day low
-            elif current_price < low_20d * 0.99:  # 1% below low
-                signals.append({
-                    'symbol': symbol,
-                    'action': 'SELL',
-                    'price': current_price,
-                    'confidence': 80.0,
-                    'reasons': [f'Breakdown below 20d low (₹{low_20d:.2f})'],
-                    'stop_loss': low_20d * 1.02,
-                    'target_price': current_price * 0.90,
-                    'timestamp': datetime.now()
-                })
-        
+            return self._latest_signals({symbol: data})
         except Exception as e:
-            logger.error(f"Breakout signal error for {symbol}: {e}")
-        
-        return signals
-
+            logger.error(f"Error generating signals for {symbol}: {e}")
+            return []
+    
+    def _latest_signals(self, indicator_frames):
+        """Every rule on each symbol's latest bar, all symbols in one array pass"""
+        matrix = evaluate_signal_matrix(indicator_frames, self.rule_set, tail=self.rule_set.lookback + 1)
+        return matrix.latest_signals(timestamp=datetime.now())
+    
     def _generate_test_signals(self, symbols=None):
         """Generate test signals for demonstration"""
         try:
             if symbols is None:
                 symbols = ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK']
             
-            signals = []
+            signals = SignalBatch(timestamp=datetime.now())
             
             # Generate 2-3 test signals
             num_signals = min(3, len(symbols))
@@ -458,16 +216,12 @@ class SignalGenerator:
                     ])
                 ]
                 
-                signal = {
-                    'symbol': symbol,
-                    'action': action,
-                    'price': round(price, 2),
-                    'confidence': confidence,
-                    'reasons': reasons,
-                    'stop_loss': round(price * (0.95 if action == 'BUY' else 1.03), 2),
-                    'target_price': round(price * (1.08 if action == 'BUY' else 0.92), 2),
-                    'timestamp': datetime.now()
-                }
+                signal = Signal(
+                    symbol, action, round(price, 2), confidence, reasons,
+                    stop_loss=round(price * (0.95 if action == 'BUY' else 1.03), 2),
+                    target_price=round(price * (1.08 if action == 'BUY' else 0.92), 2),
+                    timestamp=signals.timestamp
+                )
                 
                 signals.append(signal)
             
@@ -477,68 +231,53 @@ class SignalGenerator:
         except Exception as e:
             logger.error(f"Test signal generation error: {e}")
             return []
-
-    def _filter_and_rank_signals(self, signals):
-        """Filter and rank signals by quality"""
+    
+    @property
+    def indicator_columns(self):
+        """Indicator columns the signal rules read (besides OHLCV)"""
+        return self.rule_set.indicator_columns
+    
+    def rank_signals(self, signals, record=False):
+        """Filter signals by confidence and keep the best ones for a session
+        
+        Signals from evaluate_history or a SignalMatrix go through the same
+        ranking as generate_signals; they are only added to signal_history
+        when record is set (backtests leave it off).
+        """
+        return self._filter_and_rank_signals(signals, record=record)
+    
+    def _filter_and_rank_signals(self, signals, record=True):
+        """Filter and rank signals by quality (added to signal_history when record is set)"""
         try:
             if not signals:
-                return []
+                return SignalBatch()
+            signals = SignalBatch.from_signals(signals)
             
             # Filter by minimum confidence
-            filtered_signals = [s for s in signals if s.get('confidence', 0) >= self.min_confidence]
+            filtered_signals = [s for s in signals if s.confidence >= self.min_confidence]
             
             # Sort by confidence (highest first)
-            filtered_signals.sort(key=lambda x: x.get('confidence', 0), reverse=True)
+            filtered_signals.sort(key=lambda x: x.confidence, reverse=True)
             
             # Limit number of signals
-            final_signals = filtered_signals[:self.max_signals_per_session]
+            final_signals = SignalBatch(filtered_signals[:self.max_signals_per_session], signals.timestamp)
             
-            # Add to signal history
-            for signal in final_signals:
-                self.signal_history.append({
-                    'timestamp': signal['timestamp'],
-                    'symbol': signal['symbol'],
-                    'action': signal['action'],
-                    'confidence': signal['confidence']
-                })
+            if not record:
+                return final_signals
             
-            # Keep history limited
-            if len(self.signal_history) > 100:
-                self.signal_history = self.signal_history[-100:]
+            # Add to signal history (it keeps snapshots, so callers may update these)
+            self.signal_history.extend(final_signals)
             
             return final_signals
             
         except Exception as e:
             logger.error(f"Signal filtering error: {e}")
             return signals[:self.max_signals_per_session]
-
+    
     def get_signal_performance(self, days=7):
         """Get signal performance statistics"""
         try:
-            from datetime import timedelta
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            recent_signals = [
-                s for s in self.signal_history 
-                if s['timestamp'] >= cutoff_date
-            ]
-            
-            if not recent_signals:
-                return {'total_signals': 0, 'message': 'No recent signals'}
-            
-            total_signals = len(recent_signals)
-            buy_signals = len([s for s in recent_signals if s['action'] == 'BUY'])
-            sell_signals = len([s for s in recent_signals if s['action'] == 'SELL'])
-            avg_confidence = sum(s['confidence'] for s in recent_signals) / total_signals
-            
-            return {
-                'total_signals': total_signals,
-                'buy_signals': buy_signals,
-                'sell_signals': sell_signals,
-                'avg_confidence': round(avg_confidence, 1),
-                'signals_per_day': round(total_signals / days, 1)
-            }
-            
+            return self.signal_history.stats(days)
         except Exception as e:
             logger.error(f"Signal performance error: {e}")
             return {'total_signals': 0, 'error': str(e)}
@@ -0,0 +1,272 @@
+# src/strategies/signal_history.py
+"""
+Bounded ring-buffer signal history with O(1) rolling counters and an SQLite spill
+"""
+import os
+import sqlite3
+import threading
+import logging
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .signals import Signal, ROW_COLUMNS, REASON_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 5000
+
+ACTION_CODES = {'BUY': 1, 'SELL': -1}
+
+def _epoch(timestamp):
+    """Seconds since the epoch, naive timestamps read as local time (like datetime.now())"""
+    if hasattr(timestamp, 'to_pydatetime'):
+        timestamp = timestamp.to_pydatetime()
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return datetime.now().timestamp()
+
+class _RingView:
+    """Arrival times of the ring in logical (oldest first) order, for bisect"""
+    
+    def __init__(self, history):
+        self.history = history
+    
+    def __len__(self):
+        return self.history.size
+    
+    def __getitem__(self, position):
+        return self.history.times[self.history._slot(position)]
+
+class SignalHistory:
+    """Recent signals in a fixed-size ring, indexed by symbol, with rolling statistics
+    
+    Each slot stores the signal, its arrival time and the running buy, sell
+    and confidence totals *before* it arrived. Adding a signal is O(1); the
+    counts for any time window are the difference of two running totals,
+    found with one binary search over arrival times. Arrival times never
+    go backwards (an out-of-order timestamp is clamped to the last one).
+    
+    With a path, every signal is also written through to an SQLite table
+    (ROW_COLUMNS), so the history outlives the ring and the process: the
+    newest `capacity` rows are reloaded on start, and windows reaching past
+    the ring are answered from the table.
+    """
+    
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None):
+        self.capacity = max(1, int(capacity))
+        self.path = path
+        self.lock = threading.RLock()
+        
+        self.signals = [None] * self.capacity
+        self.times = np.zeros(self.capacity)
+        self.before = np.zeros((self.capacity, 3))    # buys, sells, confidence sum before each slot
+        self.head = 0                                 # slot of the oldest signal
+        self.size = 0
+        self.next_sequence = 0
+        
+        # Running totals over everything added (reloaded rows included)
+        self.totals = np.zeros(3)
+        self.last_time = 0.0
+        self.spilled = False                          # the table holds rows older than the ring
+        
+        self.by_symbol = {}                           # symbol -> deque of sequence numbers in the ring
+        self.symbol_totals = {}                       # symbol -> [count, buys, sells, confidence sum]
+        
+        if self.path:
+            self._open_store()
+    
+    def _slot(self, position):
+        return (self.head + position) % self.capacity
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        """Signals in the ring, oldest first"""
+        with self.lock:
+            return iter([self.signals[self._slot(position)] for position in range(self.size)])
+    
+    def recent(self, count=10):
+        """The newest `count` signals, oldest first"""
+        with self.lock:
+            count = min(count, self.size)
+            return [self.signals[self._slot(position)] for position in range(self.size - count, self.size)]
+    
+    def for_symbol(self, symbol, count=None):
+        """Signals for one symbol still in the ring, oldest first"""
+        with self.lock:
+            sequences = list(self.by_symbol.get(symbol, ()))
+            if count is not None:
+                sequences = sequences[-count:]
+            return [self.signals[sequence % self.capacity] for sequence in sequences]
+    
+    def append(self, signal):
+        self.extend([signal])
+    
+    def extend(self, signals):
+        """Add snapshots of signals (Signals or signal dicts) in arrival order
+        
+        The ring keeps its own copies: callers go on to fill in trade prices
+        on the Signals they were handed, and the ring has to keep matching
+        its running totals and the rows already written to SQLite.
+        """
+        signals = [Signal.from_mapping(signal).copy() for signal in signals]
+        if not signals:
+            return
+        with self.lock:
+            arrivals = [self._add(signal, _epoch(signal.timestamp)) for signal in signals]
+            if self.path:
+                self._write([(arrival,) + signal.to_row() for arrival, signal in zip(arrivals, signals)])
+    
+    def _add(self, signal, arrival):
+        arrival = max(arrival, self.last_time)
+        if self.size == self.capacity:
+            self._evict()
+        
+        # Sequence numbers start at slot 0 and the ring only ever advances, so slot == sequence % capacity
+        sequence = self.next_sequence
+        slot = sequence % self.capacity
+        self.signals[slot] = signal
+        self.times[slot] = arrival
+        self.before[slot] = self.totals
+        self.size += 1
+        self.next_sequence += 1
+        self.last_time = arrival
+        
+        action = ACTION_CODES.get(signal.action, 0)
+        confidence = float(signal.confidence or 0)
+        self.totals += (action == 1, action == -1, confidence)
+        
+        self.by_symbol.setdefault(signal.symbol, deque()).append(sequence)
+        counts = self.symbol_totals.setdefault(signal.symbol, [0, 0, 0, 0.0])
+        counts[0] += 1
+        counts[1] += action == 1
+        counts[2] += action == -1
+        counts[3] += confidence
+        return arrival
+    
+    def _evict(self):
+        slot = self.head
+        symbol = self.signals[slot].symbol
+        index = self.by_symbol[symbol]
+        index.popleft()  # the ring is in arrival order, so this is the symbol's oldest entry too
+        if not index:
+            del self.by_symbol[symbol]
+        self.signals[slot] = None
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        self.spilled = self.spilled or bool(self.path)
+    
+    def stats(self, days=7, now=None):
+        """Counts for the signals of the last `days` days, in get_signal_performance form"""
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=days)).timestamp()
+        with self.lock:
+            if self.size and self.times[self.head] >= cutoff and self.spilled:
+                counts = self._stored_counts(cutoff)
+            else:
+                counts = self._ring_counts(cutoff)
+        total, buys, sells, confidence = counts
+        if not total:
+            return {'total_signals': 0, 'message': 'No recent signals'}
+        return {
+            'total_signals': int(total),
+            'buy_signals': int(buys),
+            'sell_signals': int(sells),
+            'avg_confidence': round(float(confidence) / total, 1),
+            'signals_per_day': round(total / days, 1)
+        }
+    
+    def _ring_counts(self, cutoff):
+        position = bisect_left(_RingView(self), cutoff)
+        if position >= self.size:
+            return 0, 0, 0, 0.0
+        slot = self._slot(position)
+        buys, sells, confidence = self.totals - self.before[slot]
+        return self.size - position, buys, sells, confidence
+    
+    def symbol_stats(self, symbol):
+        """All-time counts for one symbol since this history was created (or loaded)"""
+        with self.lock:
+            count, buys, sells, confidence = self.symbol_totals.get(symbol, [0, 0, 0, 0.0])
+        return {
+            'total_signals': count,
+            'buy_signals': buys,
+            'sell_signals': sells,
+            'avg_confidence': round(confidence / count, 1) if count else 0.0
+        }
+    
+    # --- SQLite spill ---
+    
+    def _connect(self):
+        return sqlite3.connect(self.path)
+    
+    def _open_store(self):
+        """Create the table if needed and reload the newest `capacity` rows"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS signal_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    epoch REAL NOT NULL,
+                    {', '.join(f'{column} TEXT' if column in ('timestamp', 'symbol', 'action', 'rule', 'reasons')
+                               else f'{column} REAL' for column in ROW_COLUMNS)}
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS signal_history_epoch ON signal_history (epoch)")
+            stored = conn.execute("SELECT COUNT(*) FROM signal_history").fetchone()[0]
+            rows = conn.execute(f"""
+                SELECT epoch, {', '.join(ROW_COLUMNS)} FROM signal_history ORDER BY id DESC LIMIT ?
+            """, (self.capacity,)).fetchall()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Signal history store error, keeping history in memory only: {e}")
+            self.path = None
+            return
+        
+        for epoch, *row in reversed(rows):
+            values = dict(zip(ROW_COLUMNS, row))
+            timestamp = values['timestamp']
+            try:
+                timestamp = datetime.fromisoformat(timestamp)
+            except (TypeError, ValueError):
+                pass
+            reasons = values['reasons'].split(REASON_SEPARATOR) if values['reasons'] else ()
+            self._add(Signal(values['symbol'], values['action'], values['price'], values['confidence'], reasons,
+                             values['stop_loss'], values['target_price'], timestamp, values['rule']), epoch)
+        self.spilled = stored > len(rows)
+        if rows:
+            print(f"📜 Loaded {len(rows)} of {stored} stored signals")
+    
+    def _write(self, rows):
+        """Append (epoch, *ROW_COLUMNS) rows in one transaction"""
+        try:
+            conn = self._connect()
+            conn.executemany(f"""
+                INSERT INTO signal_history (epoch, {', '.join(ROW_COLUMNS)})
+                VALUES ({', '.join('?' * (len(ROW_COLUMNS) + 1))})
+            """, rows)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Signal history write error: {e}")
+    
+    def _stored_counts(self, cutoff):
+        """(count, buys, sells, confidence sum) since cutoff, from the table"""
+        try:
+            conn = self._connect()
+            row = conn.execute("""
+                SELECT COUNT(*), SUM(action = 'BUY'), SUM(action = 'SELL'), SUM(confidence)
+                FROM signal_history WHERE epoch >= ?
+            """, (cutoff,)).fetchone()
+            conn.close()
+            return tuple(value or 0 for value in row)
+        except Exception as e:
+            logger.error(f"Signal history read error: {e}")
+            return self._ring_counts(cutoff)
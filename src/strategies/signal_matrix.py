@@ -0,0 +1,186 @@
+# src/strategies/signal_matrix.py
+"""
+Signal rules evaluated as boolean masks over the full history of a whole universe
+"""
+import numpy as np
+import pandas as pd
+
+from src.indicators.panel import IndicatorPanel
+from .rules import RuleSet, PRICE_COLUMNS, BAR_COUNT, VARIANT_SEPARATOR
+from .signals import Signal, SignalBatch
+
+ACTION_CODES = {'BUY': 1, 'SELL': -1}
+ACTION_NAMES = {1: 'BUY', -1: 'SELL'}
+
+# Fewest bars a symbol needs before any rule fires (generate_signals skips shorter frames)
+MIN_BARS = 10
+
+class SignalMatrix:
+    """(timestamp x symbol x rule) signal arrays for a universe's full history
+    
+    action is +1 (BUY), -1 (SELL) or 0 (no signal); confidence, stop_loss
+    and target_price are defined where action is non-zero. outcome indexes
+    the rule's outcome list (for its reason text) and value holds the number
+    the reason quotes (RSI, momentum, 20-bar high/low).
+    """
+    
+    def __init__(self, index, symbols, rules, outcomes, price, action, confidence, stop_loss,
+                 target_price, outcome, value, last_rows):
+        self.index = index
+        self.symbols = list(symbols)
+        self.rules = list(rules)
+        self.outcomes = outcomes          # rule -> [(action, confidence, reason template)]
+        self.price = price                # (time x symbol) close
+        self.action = action              # (time x symbol x rule) int8
+        self.confidence = confidence      # float32
+        self.stop_loss = stop_loss
+        self.target_price = target_price
+        self.outcome = outcome            # int8, read where action is non-zero
+        self.value = value
+        self.last_rows = last_rows        # each symbol's last bar row
+        self.symbol_columns = {symbol: j for j, symbol in enumerate(self.symbols)}
+    
+    def __len__(self):
+        return int(np.count_nonzero(self.action))
+    
+    def nbytes(self):
+        arrays = (self.price, self.action, self.confidence, self.stop_loss, self.target_price, self.outcome, self.value)
+        return sum(values.nbytes for values in arrays)
+    
+    def row(self, timestamp):
+        """Row number of a timestamp"""
+        return self.index.get_loc(pd.Timestamp(timestamp))
+    
+    def _signal(self, i, j, k, timestamp):
+        rule = self.rules[k]
+        action, confidence, reason = self.outcomes[rule][self.outcome[i, j, k]]
+        return Signal(self.symbols[j], action, float(self.price[i, j]), confidence,
+                      (reason.format(value=self.value[i, j, k]),), float(self.stop_loss[i, j, k]),
+                      float(self.target_price[i, j, k]), timestamp, rule)
+    
+    def signals_at(self, row, symbols=None, timestamp=None):
+        """SignalBatch (the generate_signals format) for one row; timestamp defaults to the bar time"""
+        if not isinstance(row, (int, np.integer)):
+            row = self.row(row)
+        timestamp = self.index[row] if timestamp is None else timestamp
+        columns = range(len(self.symbols)) if symbols is None else [self.symbol_columns[s] for s in symbols]
+        return SignalBatch((self._signal(row, j, k, timestamp)
+                            for j in columns for k in np.flatnonzero(self.action[row, j])), timestamp)
+    
+    def latest_signals(self, timestamp=None):
+        """SignalBatch of the signals on each symbol's own last bar"""
+        signals = SignalBatch(timestamp=timestamp)
+        for j, row in enumerate(self.last_rows):
+            stamp = self.index[row] if timestamp is None else timestamp
+            signals.extend(self._signal(row, j, k, stamp) for k in np.flatnonzero(self.action[row, j]))
+        return signals
+    
+    def to_frame(self):
+        """Long-format frame of every signal: timestamp, symbol, rule, action, confidence, price, stop, target"""
+        rows, columns, rules = np.nonzero(self.action)
+        return pd.DataFrame({
+            'timestamp': self.index[rows],
+            'symbol': np.array(self.symbols, dtype=object)[columns],
+            'rule': np.array(self.rules, dtype=object)[rules],
+            'action': np.where(self.action[rows, columns, rules] > 0, 'BUY', 'SELL'),
+            'confidence': self.confidence[rows, columns, rules],
+            'price': self.price[rows, columns],
+            'stop_loss': self.stop_loss[rows, columns, rules],
+            'target_price': self.target_price[rows, columns, rules]
+        })
+    
+    def variant(self, name):
+        """Matrix of one variant's rules from a combined evaluation, under their own names"""
+        prefix = f"{name}{VARIANT_SEPARATOR}"
+        keep = [k for k, rule in enumerate(self.rules) if rule.startswith(prefix)]
+        if not keep:
+            raise KeyError(f"No rules for variant {name!r}")
+        rules = [self.rules[k][len(prefix):] for k in keep]
+        arrays = {field: getattr(self, field)[..., keep]
+                  for field in ('action', 'confidence', 'stop_loss', 'target_price', 'outcome', 'value')}
+        return SignalMatrix(self.index, self.symbols, rules, {rule: self.outcomes[prefix + rule] for rule in rules},
+                            self.price, last_rows=self.last_rows, **arrays)
+    
+    def counts(self):
+        """(timestamp x symbol) frame of net signal direction (sum of rule actions)"""
+        return pd.DataFrame(self.action.sum(axis=2), index=self.index, columns=self.symbols)
+
+def _first_match(branches, shape):
+    """Index of the first true branch per cell (an if/elif chain), -1 where none is"""
+    choice = np.full(shape, -1, dtype=np.int8)
+    for position in range(len(branches) - 1, -1, -1):
+        choice[branches[position]] = position
+    return choice
+
+
+def evaluate_signal_matrix(indicator_frames, rule_set=None, min_bars=MIN_BARS, tail=None):
+    """SignalMatrix for {symbol: indicator frame} (frames carry OHLCV plus the rule columns)
+    
+    rule_set is a RuleSet, a spec dict or a rule file path (default: the
+    bundled rules). With tail, only each symbol's last `tail` bars are
+    evaluated, which is all the latest signals need once tail exceeds the
+    rules' lookback; bar counts still reflect the whole frames.
+    """
+    rule_set = RuleSet.load(rule_set)
+    columns = list(PRICE_COLUMNS) + rule_set.indicator_columns
+    frames = {symbol: data for symbol, data in indicator_frames.items()
+              if data is not None and len(data) >= min_bars and 'Close' in data.columns}
+    offsets = {}
+    if tail is not None:
+        offsets = {symbol: max(len(data) - tail, 0) for symbol, data in frames.items()}
+        frames = {symbol: data.iloc[offsets[symbol]:] for symbol, data in frames.items()}
+    
+    # A column some symbols lack (Volume, say) is NaN for them, and rules reading it skip them
+    available = [column for column in columns if any(column in data.columns for data in frames.values())]
+    lacking = {symbol: {column for column in available if column not in data.columns} for symbol, data in frames.items()}
+    frames = {symbol: data.assign(**dict.fromkeys(lacking[symbol], np.nan)) if lacking[symbol] else data
+              for symbol, data in frames.items()}
+    panel = IndicatorPanel.from_frames(frames, columns)
+    shape = (len(panel.index), len(panel.symbols))
+    rules = [rule.name for rule in rule_set.rules]
+    
+    arrays = {
+        'action': np.zeros(shape + (len(rules),), dtype=np.int8),
+        'confidence': np.full(shape + (len(rules),), np.nan, dtype=np.float32),
+        'stop_loss': np.full(shape + (len(rules),), np.nan),
+        'target_price': np.full(shape + (len(rules),), np.nan),
+        'outcome': np.full(shape + (len(rules),), -1, dtype=np.int8),
+        'value': np.full(shape + (len(rules),), np.nan)
+    }
+    if panel.symbols and 'High' in panel and 'Low' in panel:
+        c = panel.packed(columns)
+        has_bar = ~np.isnan(c['Close'])
+        offset = np.array([offsets.get(symbol, 0) for symbol in panel.symbols])
+        c[BAR_COUNT] = np.where(has_bar, np.cumsum(has_bar, axis=0) + offset, 0)
+        eligible = c[BAR_COUNT] >= min_bars
+        
+        packed = {name: values.copy() for name, values in arrays.items()}
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            evaluated = rule_set.evaluate(c)
+        for k, rule in enumerate(rule_set.rules):
+            if rule.name not in evaluated:
+                continue
+            branches, stops, targets, values = evaluated[rule.name]
+            applies = eligible & np.array([not (rule.columns & lacking[symbol]) for symbol in panel.symbols])
+            choice = _first_match([np.logical_and(branch, applies) for branch in branches], shape)
+            chosen = [choice == b for b in range(len(branches))]
+            outcomes = rule_set.outcomes[rule.name]
+            packed['outcome'][..., k] = choice
+            packed['action'][..., k] = np.select(chosen, [ACTION_CODES[action] for action, _, _ in outcomes], 0)
+            packed['confidence'][..., k] = np.select(chosen, [confidence for _, confidence, _ in outcomes], np.nan)
+            packed['stop_loss'][..., k] = np.select(chosen, stops, np.nan)
+            packed['target_price'][..., k] = np.select(chosen, targets, np.nan)
+            if any(value is not None for value in values):
+                packed['value'][..., k] = np.select(chosen, [np.nan if value is None else value for value in values], np.nan)
+        arrays = panel.unpack(packed)
+    
+    last_rows = np.array([panel.positions[symbol][-1] for symbol in panel.symbols], dtype=int)
+    price = panel['Close'] if 'Close' in panel else np.empty(shape)
+    return SignalMatrix(panel.index, panel.symbols, rules, rule_set.outcomes, price, last_rows=last_rows, **arrays)
+
+def evaluate_variants(indicator_frames, rule_sets, min_bars=MIN_BARS, tail=None):
+    """{variant name: SignalMatrix} for several rule sets in one evaluation pass"""
+    rule_sets = [RuleSet.load(rule_set) for rule_set in rule_sets]
+    matrix = evaluate_signal_matrix(indicator_frames, RuleSet.combine(rule_sets), min_bars, tail)
+    return {rule_set.name: matrix.variant(rule_set.name) for rule_set in rule_sets}
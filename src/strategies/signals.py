@@ -0,0 +1,197 @@
+# src/strategies/signals.py
+"""
+Compact trading signals: a slotted Signal that still reads like the old signal dict
+"""
+import sys
+import json
+from datetime import datetime
+from collections.abc import MutableMapping
+
+FIELDS = ('symbol', 'action', 'price', 'confidence', 'reasons', 'stop_loss', 'target_price', 'timestamp', 'rule')
+
+# Column order of Signal.to_row / SignalBatch.to_rows
+ROW_COLUMNS = ('timestamp', 'symbol', 'action', 'price', 'confidence', 'stop_loss', 'target_price', 'rule', 'reasons')
+
+# Reasons are joined with this in SQLite rows
+REASON_SEPARATOR = '; '
+
+def _timestamp_text(timestamp):
+    return timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
+
+class Signal(MutableMapping):
+    """One trading signal in __slots__ (no per-instance dict)
+    
+    Consumers written for the signal dict keep working: signal['action'],
+    signal.get('stop_loss', ...), dict(signal) and item assignment all
+    behave as before. Keys outside the fixed fields (price_age_seconds,
+    regime, ...) go to a small dict made only when one is set. symbol and
+    action are interned, reasons is a tuple, and every signal of a batch
+    shares the batch's timestamp object.
+    """
+    
+    __slots__ = FIELDS + ('_extra',)
+    
+    def __init__(self, symbol, action, price, confidence, reasons=(), stop_loss=None, target_price=None,
+                 timestamp=None, rule=None, **extra):
+        self.symbol = sys.intern(str(symbol))
+        self.action = sys.intern(str(action).upper())
+        self.price = price
+        self.confidence = confidence
+        self.reasons = tuple(reasons)
+        self.stop_loss = stop_loss
+        self.target_price = target_price
+        self.timestamp = timestamp
+        self.rule = rule
+        self._extra = extra or None
+    
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Signal from a signal dict (or another Signal)"""
+        if isinstance(mapping, cls):
+            return mapping
+        values = dict(mapping)
+        return cls(values.pop('symbol'), values.pop('action'), values.pop('price'), values.pop('confidence'),
+                   **values)
+    
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        if key in FIELDS:
+            if key == 'reasons':
+                value = tuple(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+    
+    def __delitem__(self, key):
+        if key in FIELDS:
+            raise KeyError(f"{key!r} is a fixed signal field")
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        del self._extra[key]
+    
+    def __iter__(self):
+        yield from FIELDS
+        if self._extra:
+            yield from self._extra
+    
+    def __len__(self):
+        return len(FIELDS) + (len(self._extra) if self._extra else 0)
+    
+    def __contains__(self, key):
+        return key in FIELDS or (self._extra is not None and key in self._extra)
+    
+    def __repr__(self):
+        return (f"Signal({self.action} {self.symbol} @ {self.price:.2f}, {self.confidence:.0f}%, "
+                f"rule={self.rule!r})")
+    
+    def copy(self):
+        """Shallow copy (reasons is already immutable; extra keys get their own dict)"""
+        signal = _rebuild_signal(tuple(getattr(self, field) for field in FIELDS), None)
+        if self._extra:
+            signal._extra = dict(self._extra)
+        return signal
+    
+    def __reduce__(self):
+        return (_rebuild_signal, (tuple(getattr(self, field) for field in FIELDS), self._extra))
+    
+    def to_dict(self, timestamp_text=None):
+        """JSON-ready dict; timestamp_text skips formatting when the caller already has it"""
+        values = {
+            'symbol': self.symbol,
+            'action': self.action,
+            'price': float(self.price),
+            'confidence': float(self.confidence),
+            'reasons': list(self.reasons),
+            'stop_loss': None if self.stop_loss is None else float(self.stop_loss),
+            'target_price': None if self.target_price is None else float(self.target_price),
+            'timestamp': timestamp_text if timestamp_text is not None else _timestamp_text(self.timestamp),
+            'rule': self.rule
+        }
+        if self._extra:
+            values.update(self._extra)
+        return values
+    
+    def to_row(self, timestamp_text=None):
+        """Tuple in ROW_COLUMNS order for an SQLite INSERT"""
+        return (
+            timestamp_text if timestamp_text is not None else _timestamp_text(self.timestamp),
+            self.symbol,
+            self.action,
+            float(self.price),
+            float(self.confidence),
+            None if self.stop_loss is None else float(self.stop_loss),
+            None if self.target_price is None else float(self.target_price),
+            self.rule,
+            REASON_SEPARATOR.join(self.reasons)
+        )
+
+def _rebuild_signal(values, extra):
+    signal = Signal.__new__(Signal)
+    for field, value in zip(FIELDS, values):
+        setattr(signal, field, value)
+    signal._extra = extra
+    return signal
+
+class SignalBatch(list):
+    """A list of Signals from one generation pass, sharing one timestamp
+    
+    Serialization formats each distinct timestamp once for the whole batch
+    instead of once per signal.
+    """
+    
+    def __init__(self, signals=(), timestamp=None):
+        super().__init__(signals)
+        self.timestamp = timestamp
+    
+    @classmethod
+    def from_signals(cls, signals, timestamp=None):
+        """Batch of Signals from signal dicts or Signals, optionally restamped"""
+        batch = cls((Signal.from_mapping(signal) for signal in signals),
+                    timestamp if timestamp is not None else getattr(signals, 'timestamp', None))
+        if timestamp is not None:
+            for signal in batch:
+                signal.timestamp = timestamp
+        return batch
+    
+    def _timestamp_texts(self):
+        texts = {}
+        for signal in self:
+            if id(signal.timestamp) not in texts:
+                texts[id(signal.timestamp)] = _timestamp_text(signal.timestamp)
+        return texts
+    
+    def to_dicts(self):
+        texts = self._timestamp_texts()
+        return [signal.to_dict(texts[id(signal.timestamp)]) for signal in self]
+    
+    def to_json(self):
+        return json.dumps(self.to_dicts(), ensure_ascii=False)
+    
+    def to_rows(self):
+        """Rows in ROW_COLUMNS order, for cursor.executemany"""
+        texts = self._timestamp_texts()
+        return [signal.to_row(texts[id(signal.timestamp)]) for signal in self]
+
+def signal_to_dict(signal):
+    """JSON-ready dict for a Signal or a plain signal dict (missing keys get the old API defaults)"""
+    if isinstance(signal, Signal):
+        return signal.to_dict()
+    timestamp = signal.get('timestamp') or datetime.now()
+    return {
+        'symbol': signal.get('symbol', 'UNKNOWN'),
+        'action': signal.get('action', 'UNKNOWN'),
+        'price': signal.get('price', 0),
+        'confidence': signal.get('confidence', 0),
+        'reasons': list(signal.get('reasons', [])),
+        'timestamp': _timestamp_text(timestamp),
+        'stop_loss': signal.get('stop_loss', 0),
+        'target_price': signal.get('target_price', 0)
+    }
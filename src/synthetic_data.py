@@ -0,0 +1,143 @@
+# src/synthetic_data.py
+"""
+Vectorized, thread-safe synthetic market data generator
+"""
+import zlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+class SyntheticMarketData:
+    """Build realistic OHLCV price paths for many symbols at once
+    
+    Every symbol draws from its own np.random.Generator seeded from a stable
+    hash of the symbol, so output is reproducible across processes and never
+    touches the global NumPy RNG (safe to call from several threads).
+    Paths follow the same regime structure as the original simulator: a mild
+    bearish first 30%, consolidation to 70%, then a bullish run, overlaid
+    with weekly and monthly cycles.
+    """
+    
+    # (end of period as a fraction of the path, daily drift, daily volatility)
+    REGIMES = [(0.3, -0.0008, 0.018), (0.7, 0.0002, 0.015), (1.0, 0.0012, 0.022)]
+    
+    def __init__(self, base_prices=None, default_price=1000.0):
+        self.base_prices = base_prices or {}
+        self.default_price = default_price
+    
+    @staticmethod
+    def symbol_seed(symbol):
+        """Stable per-symbol seed (Python's hash() is salted per process)"""
+        return zlib.crc32(symbol.encode('utf-8')) % 1000
+    
+    def _rng(self, symbol):
+        return np.random.default_rng(self.symbol_seed(symbol))
+    
+    def _trading_days(self, days, end_date=None):
+        """Last `days` weekdays ending at end_date, stamped at the 15:30 close"""
+        end_date = end_date or datetime.now()
+        end_date = pd.Timestamp(end_date).normalize() + pd.Timedelta(hours=15, minutes=30)
+        return pd.bdate_range(end=end_date, periods=days)
+    
+    def _regime_profile(self, days):
+        """Per-bar drift and volatility arrays for the regime/cycle structure"""
+        progress = np.arange(days) / days
+        trend = np.empty(days)
+        volatility = np.empty(days)
+        start = 0.0
+        for end, drift, vol in self.REGIMES:
+            in_regime = (progress >= start) & (progress < end)
+            trend[in_regime] = drift
+            volatility[in_regime] = vol
+            start = end
+        
+        i = np.arange(days)
+        weekly_cycle = np.sin(i * 0.3) * 0.002
+        monthly_cycle = np.cos(i * 0.1) * 0.003
+        return trend + weekly_cycle + monthly_cycle, volatility
+    
+    def generate_arrays(self, symbols, days, end_date=None):
+        """Generate (symbols x days) OHLCV arrays for the whole universe
+        
+        Returns (dates, arrays) where arrays maps 'Open', 'High', 'Low',
+        'Close' and 'Volume' to 2-D arrays with one row per symbol.
+        """
+        dates = self._trading_days(days, end_date)
+        n = len(symbols)
+        drift, volatility = self._regime_profile(days)
+        
+        # Per-symbol random draws, each from the symbol's own generator
+        shocks = np.empty((n, days))
+        gaps = np.empty((n, days))
+        ranges = np.empty((n, days))
+        volume_noise = np.empty((n, days))
+        for row, symbol in enumerate(symbols):
+            rng = self._rng(symbol)
+            draws = rng.standard_normal((3, days))
+            shocks[row], gaps[row], ranges[row] = draws
+            volume_noise[row] = rng.uniform(0.3, 1.8, days)
+        
+        base = np.array([self.base_prices.get(s, self.default_price) for s in symbols])[:, None]
+        seeds = np.array([self.symbol_seed(s) for s in symbols])[:, None]
+        
+        # Whole price paths at once
+        returns = drift + volatility * shocks
+        close = base * np.cumprod(1 + returns, axis=1)
+        open_ = close * (1 + 0.004 * gaps)
+        daily_range = np.abs(volatility * 0.7 * ranges)
+        high = np.maximum(open_, close) * (1 + daily_range)
+        low = np.minimum(open_, close) * (1 - daily_range)
+        
+        base_volume = 400000 + (seeds * 7919) % 500000
+        volume = (base_volume * (1 + np.abs(returns) * 8 + volume_noise)).astype(np.int64)
+        
+        arrays = {
+            'Open': np.round(open_, 2),
+            'High': np.round(high, 2),
+            'Low': np.round(low, 2),
+            'Close': np.round(close, 2),
+            'Volume': volume
+        }
+        return dates, arrays
+    
+    def generate_frames(self, symbols, days, end_date=None):
+        """Generate one OHLCV DataFrame per symbol"""
+        dates, arrays = self.generate_arrays(symbols, days, end_date)
+        return {
+            symbol: pd.DataFrame({col: values[row] for col, values in arrays.items()}, index=dates)
+            for row, symbol in enumerate(symbols)
+        }
+    
+    def generate(self, symbol, days, end_date=None):
+        """Generate an OHLCV DataFrame for a single symbol"""
+        return self.generate_frames([symbol], days, end_date)[symbol]
+    
+    def current_price(self, symbol, now=None, market_open=False):
+        """Simulated current price, stable within the same minute"""
+        base_price = self.base_prices.get(symbol, self.default_price)
+        now = now or datetime.now()
+        
+        # Higher volatility during market hours
+        volatility = 0.025 if market_open else 0.008
+        
+        # Day-based trend (simulates weekly/monthly trends)
+        day_trend = np.sin(now.day * 0.2) * 0.01  # ±1% monthly cycle
+        
+        # Time-consistent randomness (same price within same minute)
+        minute_seed = int(now.timestamp() // 60)
+        rng = np.random.default_rng(minute_seed + self.symbol_seed(symbol))
+        current_price = base_price * (1 + rng.normal(0, volatility) + day_trend)
+        
+        # Ensure reasonable bounds (±10% from base)
+        current_price = max(base_price * 0.90, min(base_price * 1.10, current_price))
+        return round(current_price, 2)
+    
+    def index_level(self, base_level=19500.0, now=None):
+        """Simulated index level and daily change, stable within the same hour"""
+        now = now or datetime.now()
+        rng = np.random.default_rng(int(now.timestamp() // 3600))
+        
+        daily_change = rng.normal(0, 120)  # ±120 points typical range
+        level = max(18000, min(21000, base_level + daily_change))
+        volume = int(rng.integers(3000000, 7000000))
+        return level, daily_change, volume
@@ -0,0 +1,526 @@
+# test_data_pipeline.py
+"""
+Tests for the data ingest pipeline (batched downloads, storage, caching)
+These tests run offline - network calls are replaced with local frames
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('src')
+
+import src.data_fetcher as data_fetcher_module
+from src.data_fetcher import DataFetcher
+from src.data_store import OHLCVStore
+from src.data_cache import DataCache
+from src.data_quality import sanitize_universe
+from src.synthetic_data import SyntheticMarketData
+from src.single_flight import SingleFlight
+from src.data_sources import CircuitBreaker
+from src.resampler import BarResampler
+from src.indicators.technical import TechnicalIndicators
+
+
+def make_ohlcv(days=30, start_price=1000.0, seed=1, start='2025-01-01'):
+    """Build a consistent OHLCV frame on business days"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=days)
+    close = start_price * np.cumprod(1 + rng.normal(0, 0.01, days))
+    open_ = close * (1 + rng.normal(0, 0.003, days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, days)))
+    volume = rng.integers(100000, 1000000, days)
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume
+    }, index=dates)
+
+
+def make_fetcher(tmp_path):
+    """DataFetcher with a private store and rate limiting disabled for offline tests"""
+    fetcher = DataFetcher(store_dir=str(tmp_path / 'ohlcv'))
+    fetcher.min_request_interval = 0
+    return fetcher
+
+
+def test_batched_download_splits_and_falls_back(monkeypatch, tmp_path):
+    """Batched fetch splits a multi-ticker frame and falls back only for missing tickers"""
+    print("📦 Testing batched multi-symbol download...")
+    
+    frames = {'TCS.NS': make_ohlcv(seed=1), 'INFY.NS': make_ohlcv(seed=2)}
+    download_calls = []
+    
+    def fake_download(tickers, **kwargs):
+        download_calls.append(list(tickers))
+        present = [t for t in tickers if t in frames]
+        return pd.concat({t: frames[t] for t in present}, axis=1)
+    
+    monkeypatch.setattr(data_fetcher_module.yf, 'download', fake_download)
+    
+    fetcher = make_fetcher(tmp_path)
+    fallback_calls = []
+    monkeypatch.setattr(fetcher, 'get_stock_data',
+                        lambda symbol, days=30: fallback_calls.append(symbol) or make_ohlcv(days, seed=3))
+    
+    result = fetcher.get_multiple_stocks_data(['TCS', 'INFY', 'NOPE'], days=20)
+    
+    assert list(result.keys()) == ['TCS', 'INFY', 'NOPE']
+    assert len(download_calls) == 1
+    assert fallback_calls == ['NOPE']
+    assert len(result['TCS']) == 20
+    assert (result['TCS']['High'] >= result['TCS'][['Open', 'Close']].max(axis=1)).all()
+    
+    stats = fetcher.get_batch_stats()
+    assert stats['batches'] == 1
+    assert stats['symbols_fetched'] == 2
+    
+    # Second call is served from cache without another download
+    fetcher.get_multiple_stocks_data(['TCS', 'INFY'], days=20)
+    assert len(download_calls) == 1
+
+
+def test_store_roundtrip_and_incremental_append(tmp_path):
+    """The OHLCV store slices windows and merges overlapping tail bars"""
+    print("💾 Testing persistent OHLCV store...")
+    
+    store = OHLCVStore(str(tmp_path / 'ohlcv'))
+    history = make_ohlcv(40).tz_localize('Asia/Kolkata')
+    store.write('TCS', history.iloc[:35])
+    
+    assert store.count('TCS') == 35
+    assert store.last_timestamp('TCS') == history.index[34]
+    
+    # Tail update overlapping the last stored bar is written in place, not by rewriting the symbol
+    close_inode = os.stat(tmp_path / 'ohlcv' / 'TCS' / 'Close.npy').st_ino
+    revised = history.iloc[34:].copy()
+    revised.iloc[0, revised.columns.get_loc('Close')] += 1.0  # the forming bar closed higher
+    added = store.append('TCS', revised)
+    assert added == 5
+    assert os.stat(tmp_path / 'ohlcv' / 'TCS' / 'Close.npy').st_ino == close_inode
+    window = store.get_window('TCS', 10)
+    pd.testing.assert_frame_equal(window, pd.concat([history.iloc[30:34], revised]), check_freq=False,
+                                  check_index_type=False)
+    assert len(np.load(tmp_path / 'ohlcv' / 'TCS' / 'Close.npy')) == 40
+    
+    # A fresh store instance reads the same data back from disk
+    reopened = OHLCVStore(str(tmp_path / 'ohlcv'))
+    assert reopened.count('TCS') == 40
+    assert reopened.symbols() == ['TCS']
+    
+    # A column cut short (crash mid-update) reads as no history rather than misaligned bars
+    close_path = tmp_path / 'ohlcv' / 'TCS' / 'Close.npy'
+    np.save(close_path, np.load(close_path)[:-2])
+    assert OHLCVStore(str(tmp_path / 'ohlcv')).load('TCS').empty
+
+
+def test_get_stock_data_fetches_only_the_tail(monkeypatch, tmp_path):
+    """With stored history, get_stock_data only asks Yahoo for bars after the last one"""
+    fetcher = make_fetcher(tmp_path)
+    history = make_ohlcv(40).tz_localize('Asia/Kolkata')
+    fetcher.store.write('TCS', history.iloc[:38])
+    
+    requested_starts = []
+    
+    def fake_fetch(symbol, days, start_date=None):
+        requested_starts.append(start_date)
+        return history.iloc[37:]
+    
+    monkeypatch.setattr(fetcher, '_fetch_from_yahoo_finance', fake_fetch)
+    monkeypatch.setattr(fetcher, '_is_store_current', lambda last_ts: False)
+    
+    data = fetcher.get_stock_data('TCS', days=30)
+    
+    assert requested_starts == [history.index[37]]
+    assert len(data) == 30
+    assert data.index[-1] == history.index[-1]
+    assert fetcher.store.count('TCS') == 40
+
+
+def test_cache_serves_smaller_windows_and_respects_budget():
+    """DataCache slices cached supersets, evicts LRU entries over budget and counts it all"""
+    print("🧠 Testing superset-aware data cache...")
+    
+    frame = make_ohlcv(40)
+    cache = DataCache(max_bytes=DataCache.estimate_size(frame) * 2 + 100, default_ttl=300)
+    
+    cache.set_window('stock_data:TCS', 40, frame)
+    window = cache.get_window('stock_data:TCS', 30)
+    assert len(window) == 30
+    assert window.index[-1] == frame.index[-1]
+    assert cache.get_window('stock_data:TCS', 60) is None
+    
+    # A smaller window never replaces a live larger one
+    cache.set_window('stock_data:TCS', 10, frame.tail(10))
+    assert len(cache.get_window('stock_data:TCS', 40)) == 40
+    
+    # Third frame pushes the least recently used one out
+    cache.set_window('stock_data:INFY', 40, make_ohlcv(40, seed=2))
+    cache.get_window('stock_data:TCS', 40)
+    cache.set_window('stock_data:SBIN', 40, make_ohlcv(40, seed=3))
+    assert cache.get_window('stock_data:INFY', 40) is None
+    assert cache.get_window('stock_data:TCS', 40) is not None
+    
+    # Expired entries are purged on the next insert, not only when read
+    cache.set('current_price:TCS', 3680.0, ttl=0)
+    cache.set('current_price:INFY', 1750.0)
+    assert 'current_price:TCS' not in cache.entries
+    
+    # Overwriting a key leaves dead expiry items behind, but the heap stays bounded
+    for price in range(500):
+        cache.set('current_price:INFY', float(price))
+    assert len(cache.expiry_heap) <= 2 * len(cache.entries) + 64
+    assert cache.get('current_price:INFY') == 499.0
+    
+    stats = cache.get_stats()
+    assert stats['superset_hits'] == 1
+    assert stats['evictions'] == 1
+    assert stats['expirations'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+
+def test_sanitize_universe_repairs_and_reports():
+    """Vectorized sanitation repairs duplicates, bad prices, gaps and High/Low per symbol"""
+    print("🧹 Testing vectorized OHLC sanitation...")
+    
+    dirty = make_ohlcv(10)
+    dirty.iloc[2, dirty.columns.get_loc('Close')] = -5.0
+    dirty.iloc[4, dirty.columns.get_loc('Open')] = np.nan
+    dirty.iloc[6, dirty.columns.get_loc('High')] = dirty['Low'].iloc[6] * 0.9
+    dirty = pd.concat([dirty, dirty.iloc[[9]]])
+    
+    leading_gap = make_ohlcv(5, seed=2)
+    leading_gap.iloc[0] = np.nan
+    
+    clean, reports = sanitize_universe({'DIRTY': dirty, 'GAP': leading_gap, 'OK': make_ohlcv(5, seed=3)})
+    
+    report = reports['DIRTY']
+    assert report['duplicates_removed'] == 1
+    assert report['non_positive_fixed'] == 1
+    assert report['gaps_filled'] == 1
+    assert report['high_low_repaired'] >= 1
+    assert report['rows_out'] == 10
+    
+    frame = clean['DIRTY']
+    assert frame.index.is_unique
+    assert (frame[['Open', 'High', 'Low', 'Close']] > 0).all().all()
+    assert (frame['High'] >= frame[['Open', 'Close']].max(axis=1)).all()
+    assert (frame['Low'] <= frame[['Open', 'Close']].min(axis=1)).all()
+    assert frame['Close'].iloc[2] == frame['Close'].iloc[1]
+    
+    assert reports['GAP']['rows_dropped'] == 1
+    assert len(clean['GAP']) == 4
+    assert reports['OK']['clean']
+
+
+def test_synthetic_generator_is_reproducible_and_isolated():
+    """Synthetic paths are per-symbol deterministic and leave the global RNG alone"""
+    print("🎲 Testing vectorized synthetic data engine...")
+    
+    generator = SyntheticMarketData({'TCS': 3680.0})
+    
+    np.random.seed(123)
+    expected_global = np.random.random()
+    np.random.seed(123)
+    
+    symbols = [f'SYM{i}' for i in range(500)] + ['TCS']
+    dates, arrays = generator.generate_arrays(symbols, 252, end_date='2025-06-30')
+    assert np.random.random() == expected_global
+    
+    assert arrays['Close'].shape == (501, 252)
+    assert len(dates) == 252 and dates[-1].date().isoformat() == '2025-06-30'
+    assert (arrays['High'] >= np.maximum(arrays['Open'], arrays['Close'])).all()
+    assert (arrays['Low'] <= np.minimum(arrays['Open'], arrays['Close'])).all()
+    
+    # A symbol's path does not depend on which other symbols are generated with it
+    alone = generator.generate('TCS', 252, end_date='2025-06-30')
+    np.testing.assert_array_equal(alone['Close'].to_numpy(), arrays['Close'][-1])
+    assert abs(alone['Close'].iloc[0] / 3680.0 - 1) < 0.1
+
+
+def test_async_fetch_runs_batches_concurrently_with_deadlines(monkeypatch, tmp_path):
+    """Async batches overlap, share the rate budget and fall back when a deadline is missed"""
+    print("⚡ Testing async concurrent fetch API...")
+    
+    import time
+    
+    fetcher = make_fetcher(tmp_path)
+    fetcher.batch_size = 2
+    
+    def fake_batch(symbols, days, start_date=None):
+        time.sleep(2.0 if 'SLOW' in symbols else 0.3)
+        return {symbol: make_ohlcv(days) for symbol in symbols}
+    
+    monkeypatch.setattr(fetcher, '_fetch_batch_from_yahoo', fake_batch)
+    monkeypatch.setattr(fetcher, 'get_stock_data', lambda symbol, days=30: make_ohlcv(days, seed=9))
+    
+    symbols = ['A', 'B', 'C', 'D', 'SLOW', 'E']
+    started = time.time()
+    result = fetcher.get_multiple_stocks_data_concurrent(symbols, days=20, max_concurrency=3, timeout=0.8)
+    elapsed = time.time() - started
+    
+    assert list(result.keys()) == symbols
+    assert elapsed < 1.5  # three batches overlapped, the slow one abandoned at its deadline
+    assert len(result['SLOW']) == 20
+    
+    # Current prices: cached ones are reused, the rest are looked up concurrently
+    fetcher._store_in_cache(fetcher._get_cache_key('current_price', 'TCS'), 3700.0)
+    monkeypatch.setattr(fetcher, '_get_yahoo_current_price', lambda symbol: 1500.0)
+    prices = fetcher.get_current_prices(['TCS', 'INFY', 'SBIN'])
+    assert prices == {'TCS': 3700.0, 'INFY': 1500.0, 'SBIN': 1500.0}
+
+
+def test_concurrent_callers_share_one_fetch(monkeypatch, tmp_path):
+    """Threads asking for the same symbol at once trigger a single Yahoo request"""
+    print("🔗 Testing in-flight request coalescing...")
+    
+    import threading
+    import time
+    
+    fetcher = make_fetcher(tmp_path)
+    fetch_calls = []
+    
+    def slow_fetch(symbol, days, start_date=None):
+        fetch_calls.append(symbol)
+        time.sleep(0.3)
+        return make_ohlcv(days)
+    
+    monkeypatch.setattr(fetcher, '_fetch_from_yahoo_finance', slow_fetch)
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.get_stock_data('TCS', 20)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert fetch_calls == ['TCS']
+    assert len(results) == 5 and all(len(data) == 20 for data in results)
+    assert fetcher.get_cache_stats()['coalesced_fetches'] == 4
+    
+    # Followers see the leader's exception too, and the key is released afterwards
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+    
+    def failing():
+        release.wait()
+        raise ValueError('boom')
+    
+    def call():
+        try:
+            flight.do('key', failing)
+        except ValueError as e:
+            errors.append(str(e))
+    
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.get_stats()['coalesced'] < 2:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == ['boom'] * 3
+    assert flight.in_flight() == []
+    assert flight.get_stats()['executions'] == 1
+
+
+def test_stale_quotes_are_served_immediately_and_refreshed(monkeypatch, tmp_path):
+    """Expired quotes within the staleness limit return at once and refresh in the background"""
+    print("♻️ Testing stale-while-revalidate quotes...")
+    
+    import threading
+    
+    fetcher = make_fetcher(tmp_path)
+    release = threading.Event()
+    live_calls = []
+    
+    def slow_live_price(symbol):
+        live_calls.append(symbol)
+        release.wait(5)
+        return 3750.0
+    
+    monkeypatch.setattr(fetcher, '_get_yahoo_current_price', slow_live_price)
+    
+    cache_key = fetcher._get_cache_key('current_price', 'TCS')
+    fetcher._store_in_cache(cache_key, 3700.0, ttl=fetcher.max_price_staleness)
+    fetcher.cache.get_entry(cache_key).stored_at -= 90  # past the 60s freshness window
+    
+    quote = fetcher.get_quote('TCS')
+    assert quote['price'] == 3700.0
+    assert quote['stale'] and quote['age_seconds'] >= 90
+    
+    # A second stale read does not start another refresh
+    fetcher.get_quote('TCS')
+    release.set()
+    fetcher.executor.shutdown(wait=True)
+    assert live_calls == ['TCS']
+    assert fetcher.get_cache_stats()['background_refreshes'] == 1
+    
+    fresh = fetcher.get_quote('TCS')
+    assert fresh['price'] == 3750.0 and not fresh['stale']
+    
+    # Beyond max_age the caller blocks for a fresh value instead
+    fetcher.cache.get_entry(cache_key).stored_at -= 200
+    monkeypatch.setattr(fetcher, '_get_yahoo_current_price', lambda symbol: 3800.0)
+    assert fetcher.get_quote('TCS', max_age=120)['price'] == 3800.0
+    
+    # max_age below the 60s cache TTL still refuses a price older than asked for
+    fetcher.cache.get_entry(cache_key).stored_at -= 30
+    monkeypatch.setattr(fetcher, '_get_yahoo_current_price', lambda symbol: 3810.0)
+    assert fetcher.get_quote('TCS')['price'] == 3800.0
+    tight = fetcher.get_quote('TCS', max_age=10)
+    assert tight['price'] == 3810.0 and tight['age_seconds'] <= 10
+    
+    monkeypatch.setattr(fetcher, '_fetch_nifty_data', lambda: None)
+    overview = fetcher.get_market_overview()
+    assert overview['age_seconds'] == 0.0 and not overview['stale']
+
+
+def test_market_events_invalidate_only_affected_data_classes(tmp_path):
+    """Quotes are invalidated at the open, daily history only when a new bar is due"""
+    print("🔔 Testing generation-based cache invalidation...")
+    
+    from datetime import datetime
+    
+    fetcher = make_fetcher(tmp_path)
+    history_key = fetcher._get_cache_key('stock_data', 'TCS')
+    price_key = fetcher._get_cache_key('current_price', 'TCS')
+    
+    def warm():
+        fetcher._store_history_in_cache('TCS', 30, make_ohlcv(30))
+        fetcher._store_in_cache(price_key, 3700.0, ttl=3600)
+    
+    warm()
+    assert fetcher.check_market_events(datetime(2025, 6, 30, 9, 0)) == []  # first check only records state
+    
+    events = fetcher.check_market_events(datetime(2025, 6, 30, 9, 20))
+    assert events == ['session_open']
+    assert fetcher.cache.get_window(history_key, 30) is not None
+    assert fetcher.cache.get(price_key) is None
+    
+    warm()
+    assert fetcher.check_market_events(datetime(2025, 6, 30, 12, 0)) == []
+    assert fetcher.check_market_events(datetime(2025, 6, 30, 15, 45)) == ['session_close']
+    assert fetcher.cache.get_window(history_key, 30) is None
+    
+    # Next morning's open after a missed close only needs quotes + a new bar
+    warm()
+    fetcher.market_state = (datetime(2025, 6, 30).date(), False)
+    assert fetcher.check_market_events(datetime(2025, 7, 1, 9, 30)) == ['new_bar', 'session_open']
+    
+    # Manual invalidation by data class leaves the others warm
+    warm()
+    fetcher.invalidate('quotes')
+    assert price_key in fetcher.cache.entries  # invalidation itself touches no entries
+    assert fetcher.cache.get(price_key) is None
+    assert price_key not in fetcher.cache.entries  # the lookup dropped the stale entry
+    assert fetcher.cache.get_window(history_key, 30) is not None
+    
+    stats = fetcher.get_cache_stats()
+    assert stats['generations'] == {'history': 2, 'quotes': 4, 'overview': 3}
+    assert stats['invalidations'] >= 3
+
+
+def test_source_chain_fails_over_and_trips_circuit(monkeypatch, tmp_path):
+    """A failing source is skipped without being called once its circuit opens"""
+    print("⚡ Testing data source chain with circuit breakers...")
+    
+    import time
+    
+    fetcher = make_fetcher(tmp_path)
+    fetcher.sources.breakers['yahoo'].recovery_timeout = 0.2
+    yahoo_calls = []
+    
+    def broken_yahoo(symbol):
+        yahoo_calls.append(symbol)
+        raise ConnectionError('Yahoo down')
+    
+    monkeypatch.setattr(fetcher, '_get_yahoo_current_price', broken_yahoo)
+    
+    class FakeInstruments:
+        def get_instrument_token(self, symbol):
+            return 1 if symbol == 'TCS' else None
+    
+    class FakeKite:
+        def quote(self, keys):
+            return {'NSE:TCS': {'last_price': 3712.5}}
+    
+    fetcher.add_zerodha_source(FakeKite(), FakeInstruments())
+    assert fetcher.sources.names() == ['zerodha', 'yahoo', 'store', 'synthetic']
+    
+    # Zerodha serves what it can; symbols it has no token for go down the chain
+    # (past the stored history, whose last close is no live price)
+    fetcher.store.write('INFY', make_ohlcv(30))
+    assert fetcher._fetch_live_price('TCS') == (3712.5, 'zerodha')
+    for symbol in ['INFY', 'SBIN', 'ITC', 'LT']:
+        price, source = fetcher._fetch_live_price(symbol)
+        assert source == 'synthetic' and price > 0
+    
+    stats = fetcher.get_source_stats()['yahoo']
+    assert yahoo_calls == ['INFY', 'SBIN', 'ITC']  # LT short-circuited
+    assert stats['state'] == CircuitBreaker.OPEN
+    assert stats['failures'] == 3 and stats['short_circuits'] == 1
+    assert stats['avg_latency_ms'] is not None
+    
+    # After the recovery timeout one probe is let through; success closes the circuit
+    time.sleep(0.25)
+    monkeypatch.setattr(fetcher, '_get_yahoo_current_price', lambda symbol: 1500.0)
+    assert fetcher._fetch_live_price('INFY') == (1500.0, 'yahoo')
+    assert fetcher.get_source_stats()['yahoo']['state'] == CircuitBreaker.CLOSED
+
+
+def test_resampler_builds_session_aligned_timeframes(monkeypatch, tmp_path):
+    """1m -> 5m/15m/60m in one pass, on 09:15-15:30 sessions, with the forming bar held back"""
+    print("🕐 Testing multi-timeframe resampler...")
+    
+    # Two sessions of minute bars including pre-open and post-close minutes; the second stops at 11:02
+    rng = np.random.default_rng(3)
+    minutes = pd.DatetimeIndex(list(pd.date_range('2025-01-06 09:00', '2025-01-06 15:59', freq='min')) +
+                               list(pd.date_range('2025-01-07 09:00', '2025-01-07 11:02', freq='min')),
+                               tz='Asia/Kolkata')
+    close = 1000 * np.cumprod(1 + rng.normal(0, 0.001, len(minutes)))
+    minute_bars = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.0005, len(minutes))),
+        'High': close * 1.001, 'Low': close * 0.999, 'Close': close,
+        'Volume': rng.integers(100, 1000, len(minutes))
+    }, index=minutes)
+    
+    bars = BarResampler().resample(minute_bars)
+    assert list(bars) == ['1m', '5m', '15m', '60m']
+    
+    session = minute_bars.between_time('09:15', '15:29')
+    for timeframe, rule in [('5m', '5min'), ('15m', '15min'), ('60m', '60min')]:
+        expected = session.resample(rule, offset='15min').agg(
+            {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+        expected = expected[:-1]  # the 11:00 / 10:15 bar is still forming at 11:03
+        if timeframe == '15m':
+            expected = expected[expected.index != pd.Timestamp('2025-01-07 11:00', tz='Asia/Kolkata')]
+        pd.testing.assert_frame_equal(bars[timeframe], expected, check_freq=False, check_dtype=False)
+        assert bars[timeframe].attrs['partial'] is False
+    
+    day_one = bars['60m'][bars['60m'].index.date == pd.Timestamp('2025-01-06').date()]
+    assert [ts.strftime('%H:%M') for ts in day_one.index] == ['09:15', '10:15', '11:15', '12:15', '13:15', '14:15', '15:15']
+    assert len(bars['1m']) == 375 + 108 and bars['1m']['Volume'].dtype == np.int64
+    
+    # The forming bar is kept (and flagged) on request
+    live = BarResampler(include_partial=True).resample(minute_bars)
+    assert live['5m'].index[-1].strftime('%H:%M') == '11:00' and live['5m'].attrs['partial']
+    
+    # Indicators per timeframe, cached apart per timeframe
+    indicators = TechnicalIndicators()
+    frames = BarResampler.add_indicators(indicators, bars, ['RSI'], symbol='TEST')
+    assert set(frames) == set(bars) and 'RSI' in frames['5m'].columns
+    many = BarResampler.add_indicators_many(indicators, BarResampler().resample_many({'TEST': minute_bars}), ['RSI'])
+    pd.testing.assert_series_equal(many['15m']['TEST']['RSI'], frames['15m']['RSI'])
+    
+    # DataFetcher downloads the minute bars once for all timeframes
+    fetcher = make_fetcher(tmp_path)
+    calls = []
+    monkeypatch.setattr(fetcher, '_fetch_minute_bars', lambda symbol, days: calls.append(symbol) or minute_bars)
+    assert fetcher.get_intraday_data('TEST')['15m'].equals(bars['15m'])
+    fetcher.get_intraday_data('TEST', include_partial=True)
+    assert calls == ['TEST']
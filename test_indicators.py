@@ -0,0 +1,350 @@
+# test_indicators.py
+"""
+Tests for the array-based technical indicator kernels
+Each kernel is checked against the original pandas implementation
+"""
+
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+sys.path.append('src')
+
+from src.indicators.technical import TechnicalIndicators
+from src.indicators import rolling
+from src.indicators.streaming import IndicatorState, StreamingIndicators
+from src.indicators.cache import IndicatorCache, parameter_hash
+from src.indicators.schema import memory_report
+from src.indicators.breadth import BreadthEngine
+from src.market_regime import MarketRegimeDetector
+from benchmark_indicators import (
+    make_bars, legacy_supertrend, legacy_cci, run_suite, compare_reports, compare_outputs, INDICATOR_CASES
+)
+
+
+def test_supertrend_kernel_matches_legacy_loop():
+    """The one-pass kernel reproduces the original Supertrend band and direction"""
+    print("⭐ Testing array-based Supertrend kernel...")
+    
+    indicators = TechnicalIndicators()
+    for seed in range(3):
+        bars = make_bars(600, seed=seed)
+        args = (bars['High'], bars['Low'], bars['Close'])
+        
+        result = indicators.supertrend(*args, return_direction=True)
+        expected_band, expected_direction = legacy_supertrend(indicators, *args)
+        
+        np.testing.assert_allclose(result['Supertrend'].to_numpy(), expected_band.to_numpy())
+        np.testing.assert_array_equal(result['Supertrend_Direction'].to_numpy(), expected_direction.to_numpy())
+        assert set(np.unique(result['Supertrend_Direction'])) <= {-1, 1}
+    
+    # Default call still returns just the band, aligned to the input index
+    band = indicators.supertrend(*args)
+    assert isinstance(band, pd.Series) and band.index.equals(bars.index)
+    
+    # Degenerate inputs
+    empty = pd.Series(dtype=float)
+    assert len(indicators.supertrend(empty, empty, empty)) == 0
+    short = make_bars(5)
+    assert (indicators.supertrend(short['High'], short['Low'], short['Close']) == short['Close'].iloc[0]).all()
+
+
+def test_rolling_mad_and_cci_match_pandas(monkeypatch):
+    """Sliding-window MAD (including block boundaries) matches the rolling().apply version"""
+    print("📐 Testing vectorized rolling MAD / CCI...")
+    
+    indicators = TechnicalIndicators()
+    bars = make_bars(300, seed=4)
+    bars.iloc[50, bars.columns.get_loc('Close')] = np.nan
+    args = (bars['High'], bars['Low'], bars['Close'])
+    
+    # Small blocks so the blocked reduction crosses several boundaries
+    monkeypatch.setattr(rolling, 'MAD_BLOCK_ROWS', 7)
+    
+    expected = legacy_cci(indicators, *args)
+    result = indicators.cci(*args)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9)
+    assert result.isna().sum() == expected.isna().sum()
+    
+    typical = (bars['High'] + bars['Low']) / 2
+    assert rolling.rolling_mad(typical, 400).isna().all()
+    assert rolling.rolling_mad(typical, 1).eq(0).all()
+    
+    # The oscillators built on the shared primitives are unchanged
+    stoch = indicators.stochastic(*args)
+    lowest, highest = bars['Low'].rolling(14).min(), bars['High'].rolling(14).max()
+    np.testing.assert_allclose(stoch['Stoch_K'], 100 * (bars['Close'] - lowest) / (highest - lowest))
+    np.testing.assert_allclose(indicators.williams_r(*args), -100 * (highest - bars['Close']) / (highest - lowest))
+    bands = indicators.bollinger_bands(bars['Close'])
+    np.testing.assert_allclose(bands['BB_Upper'] - bands['BB_Middle'], 2 * bars['Close'].rolling(20).std())
+
+
+def test_streaming_state_matches_batch_and_resumes(tmp_path):
+    """Bar-by-bar streaming reproduces add_all_indicators and survives a snapshot/restore"""
+    print("🔁 Testing streaming indicator state...")
+    
+    bars = make_bars(400, seed=5)
+    rng = np.random.default_rng(5)
+    bars['Open'] = bars['Close'].shift().fillna(bars['Close'].iloc[0])
+    bars['Volume'] = rng.integers(10_000, 100_000, len(bars)).astype(float)
+    expected = TechnicalIndicators().add_all_indicators(bars)
+    
+    # Seed on the first 300 bars, persist, restore in a fresh book and stream the rest
+    book = StreamingIndicators(snapshot_path=str(tmp_path / 'state.json'))
+    book.seed('TEST', bars.iloc[:300])
+    book.save()
+    
+    resumed = StreamingIndicators(snapshot_path=str(tmp_path / 'state.json'))
+    assert resumed.load() == 1
+    streamed = []
+    for timestamp, row in bars.iloc[300:].iterrows():
+        streamed.append(resumed.update('TEST', row, timestamp))
+    streamed = pd.DataFrame(streamed, index=bars.index[300:])
+    
+    for column in IndicatorState.COLUMNS:
+        np.testing.assert_allclose(streamed[column].to_numpy(dtype=float),
+                                   expected[column].iloc[300:].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9, err_msg=column)
+    
+    # Warm-up NaNs line up with the batch columns too
+    state = IndicatorState.from_history('TEST', bars.iloc[:60])
+    warmup = IndicatorState('TEST')
+    first_bars = pd.DataFrame([warmup.update(row, ts) for ts, row in bars.iloc[:60].iterrows()], index=bars.index[:60])
+    for column in IndicatorState.COLUMNS:
+        np.testing.assert_allclose(first_bars[column].to_numpy(dtype=float),
+                                   expected[column].iloc[:60].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9, err_msg=column)
+    
+    # A warm-up snapshot (NaNs everywhere) is strict JSON and resumes exactly
+    def reject_constant(token):
+        raise ValueError(f"non-standard JSON token {token}")
+    
+    early = IndicatorState.from_history('TEST', bars.iloc[:5])
+    text = json.dumps(early.snapshot(), allow_nan=False)
+    early = IndicatorState.from_snapshot(json.loads(text, parse_constant=reject_constant))
+    early.update_many(bars.iloc[5:60])
+    for column in IndicatorState.COLUMNS:
+        np.testing.assert_allclose(early.latest[column], state.latest[column], rtol=1e-12, err_msg=column)
+    
+    # Replayed (already applied) bars are ignored
+    before = dict(state.latest)
+    state.update_many(bars.iloc[50:60])
+    assert state.bars == 60 and state.latest == before
+    
+    # Running window sums stay exact over a long stream far from zero
+    from src.indicators.streaming import _Window
+    values = 25_000 + np.random.default_rng(9).normal(0, 0.5, 5000)
+    window = _Window(20)
+    for value in values:
+        window.push(value)
+    np.testing.assert_allclose([window.mean(), window.std()],
+                               [values[-20:].mean(), values[-20:].std(ddof=1)], rtol=1e-9)
+
+
+def test_panel_indicators_match_per_symbol_frames():
+    """One panel pass reproduces add_all_indicators for ragged and gapped symbols"""
+    print("🧮 Testing panel indicator computation...")
+    
+    indicators = TechnicalIndicators()
+    stocks_data = {}
+    for seed, length in enumerate([300, 220, 60, 12]):
+        bars = make_bars(300, seed=seed).iloc[300 - length:].copy()
+        bars['Open'] = bars['Close']
+        bars['Volume'] = np.random.default_rng(seed).integers(1_000, 9_000, len(bars)).astype(float)
+        stocks_data[f'S{seed}'] = bars
+    stocks_data['GAPPED'] = stocks_data['S0'].drop(stocks_data['S0'].index[[100, 150]])
+    stocks_data['STALE'] = stocks_data['S1'].iloc[:-7]
+    
+    panel = indicators.add_all_indicators_panel(stocks_data)
+    assert panel.symbols == list(stocks_data)
+    assert all(values.flags['C_CONTIGUOUS'] and values.shape == (300, 6) for values in panel.columns.values())
+    
+    for symbol, data in stocks_data.items():
+        expected = indicators.add_all_indicators(data)
+        result = panel.frame(symbol, data)
+        assert result.index.equals(expected.index) and list(result.columns) == list(expected.columns)
+        for column in expected.columns:
+            np.testing.assert_allclose(result[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-9, err_msg=f"{symbol} {column}")
+    
+    # Rows a symbol has no bar for stay empty; latest() reads each symbol's own last bar
+    gapped_column = panel.symbols.index('GAPPED')
+    assert np.isnan(panel['RSI'][100, gapped_column])
+    latest = panel.latest(['Close', 'RSI'])
+    assert latest.loc['STALE', 'Close'] == stocks_data['STALE']['Close'].iloc[-1]
+
+
+def test_indicator_cache_reuses_frames_across_consumers():
+    """Memoized frames are shared by symbol/last bar/bar count/parameters and stay bounded"""
+    print("🗃️ Testing indicator result cache...")
+    
+    indicators = TechnicalIndicators()
+    stocks_data = {f'S{seed}': make_bars(120, seed=seed).assign(Open=1.0, Volume=1.0) for seed in range(3)}
+    
+    first = indicators.add_all_indicators_many(stocks_data)
+    again = indicators.add_all_indicators_many(stocks_data)
+    single = indicators.add_all_indicators(stocks_data['S0'], symbol='S0')
+    stats = indicators.cache.get_stats()
+    assert stats['misses'] == 3 and stats['hits'] == 4 and stats['entries'] == 3
+    pd.testing.assert_frame_equal(again['S1'], first['S1'])
+    pd.testing.assert_frame_equal(single, indicators.add_all_indicators(stocks_data['S0']))
+    
+    # Consumers can't change what the next one sees
+    single['RSI'] = 0.0
+    assert not indicators.add_all_indicators(stocks_data['S0'], symbol='S0')['RSI'].eq(0).all()
+    
+    # A new bar (or a revised last bar) is a different key
+    extended = make_bars(121, seed=0).assign(Open=1.0, Volume=1.0)
+    indicators.add_all_indicators(extended, symbol='S0')
+    revised = stocks_data['S0'].copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] += 1
+    indicators.add_all_indicators(revised, symbol='S0')
+    assert indicators.cache.get_stats()['misses'] == 5
+    
+    # Byte budget evicts least recently used frames
+    small = TechnicalIndicators(cache=IndicatorCache(max_bytes=2 * IndicatorCache.estimate_size(first['S0'])))
+    small.add_all_indicators_many(stocks_data)
+    assert len(small.cache) == 2 and small.cache.get_stats()['evictions'] == 1
+    
+    # Parameter hashes are stable and parameter-sensitive
+    assert parameter_hash('rsi', {'window': 14}) == parameter_hash('rsi', {'window': 14})
+    assert parameter_hash('rsi', {'window': 14}) != parameter_hash('rsi', {'window': 21})
+
+
+def test_registry_computes_only_requested_columns_and_dependencies():
+    """Consumers get the columns they ask for plus inputs; extra indicators plug in without edits"""
+    print("🧩 Testing dependency-driven indicator evaluation...")
+    
+    indicators = TechnicalIndicators()
+    bars = make_bars(120, seed=6).assign(Open=1.0, Volume=1.0)
+    full = indicators.add_all_indicators(bars)
+    
+    subset = indicators.add_indicators(bars, ['RSI', 'BB_Upper'])
+    assert set(subset.columns) - set(bars.columns) == {'RSI', 'SMA_20', 'BB_Upper', 'BB_Middle', 'BB_Lower'}
+    pd.testing.assert_frame_equal(subset, full[list(subset.columns)])
+    
+    # A registered indicator may depend on built-in columns and joins the full set
+    indicators.register_indicator('ema_spread', ['EMA_Spread'], ['EMA_10', 'EMA_50'],
+                                  lambda ti, df: {'EMA_Spread': df['EMA_10'] - df['EMA_50']})
+    spread = indicators.add_indicators(bars, ['EMA_Spread'])
+    assert set(spread.columns) - set(bars.columns) == {'EMA_10', 'EMA_50', 'EMA_Spread'}
+    assert 'EMA_Spread' in indicators.add_all_indicators(bars).columns
+    
+    # The multi-symbol path runs built-ins in the panel and extras per frame
+    stocks_data = {'A': bars, 'B': make_bars(90, seed=7).assign(Open=1.0, Volume=1.0)}
+    frames = indicators.add_indicators_many(stocks_data, ['EMA_Spread', 'RSI'])
+    for symbol, data in stocks_data.items():
+        expected = indicators.add_indicators(data, ['EMA_Spread', 'RSI'])
+        pd.testing.assert_frame_equal(frames[symbol], expected[list(frames[symbol].columns)])
+    
+    # A cached full frame serves a later subset request
+    indicators.add_all_indicators(bars, symbol='A')
+    hits = indicators.cache.get_stats()['hits']
+    indicators.add_indicators(bars, ['MACD'], symbol='A')
+    assert indicators.cache.get_stats()['hits'] == hits + 1
+    
+    try:
+        indicators.add_indicators(bars, ['NOT_AN_INDICATOR'])
+        assert False, "unknown column should raise"
+    except KeyError:
+        pass
+
+
+def test_canonical_frames_are_not_copied_and_float32_is_opt_in():
+    """Canonical frames are shared, not copied; float32 storage halves indicator bytes"""
+    print("🗜️ Testing copy-free canonical frames and compact dtypes...")
+    
+    bars = make_bars(200, seed=8).assign(Open=1.0, Volume=1.0)
+    lower = bars.rename(columns=str.lower)
+    
+    indicators = TechnicalIndicators()
+    assert indicators.standardize_columns(bars) is bars
+    renamed = indicators.standardize_columns(lower)
+    assert list(renamed.columns) == list(bars.columns) and list(lower.columns)[0] == 'high'
+    assert np.shares_memory(renamed['Close'].to_numpy(), lower['close'].to_numpy())
+    
+    # Indicators go on a shallow copy: the caller's frame is untouched
+    full = indicators.add_all_indicators(lower)
+    assert list(lower.columns) == ['high', 'low', 'close', 'open', 'volume']
+    pd.testing.assert_frame_equal(full, indicators.add_all_indicators(bars))
+    
+    compact = TechnicalIndicators(dtype='float32')
+    small = compact.add_all_indicators(bars, symbol='S')
+    added = [column for column in small.columns if column not in bars.columns]
+    assert all(small[column].dtype == np.float32 for column in added if column != 'Supertrend_Direction')
+    np.testing.assert_allclose(small['RSI'], full['RSI'], rtol=1e-5)
+    panel_frames = compact.add_all_indicators_many({'A': bars})
+    assert panel_frames['A']['MACD'].dtype == np.float32
+    
+    report = compact.memory_report()
+    assert report['symbols'] == 2 and report['bytes_per_symbol'] < memory_report({'S': full})['bytes_per_symbol']
+    assert report['by_dtype']['float32'] > 0
+    
+    try:
+        TechnicalIndicators(dtype='float16')
+        assert False, "unsupported dtype should raise"
+    except ValueError:
+        pass
+
+
+def test_benchmark_suite_checks_references_and_compares_reports():
+    """The benchmark report validates every indicator and flags output changes between runs"""
+    print("⏱️ Testing indicator benchmark suite...")
+    
+    report = run_suite(sizes=(50, 300), universes=(3,), repeat=1)
+    assert report['ok'] and report['meta']['pandas'] == pd.__version__
+    checked = {entry['name'] for entry in report['results'] if entry['ok']}
+    assert set(INDICATOR_CASES) | {'add_all_indicators', 'add_all_indicators_many'} <= checked
+    assert json.loads(json.dumps(report)) == report
+    
+    # Same outputs: nothing flagged but timing; a changed output is reported
+    assert not [finding for finding in compare_reports(report, report) if finding[0] != 'faster']
+    changed = json.loads(json.dumps(report))
+    rsi = next(entry for entry in changed['results'] if entry['name'] == 'rsi')
+    rsi['checksum']['value'][0] += 1
+    assert ('changed', 'rsi 50 bars x 1 value', None) in compare_reports(changed, report)
+    
+    # A wrong kernel fails its reference check
+    ok, error = compare_outputs(pd.Series([1.0, 2.0, np.nan]), pd.Series([1.0, 2.5, np.nan]))
+    assert not ok and error == 0.5
+
+
+def test_breadth_engine_matches_per_symbol_statistics():
+    """Breadth history and the latest regime point from one panel pass"""
+    print("🌡️ Testing cross-sectional breadth engine...")
+    
+    stocks_data = {f'S{seed}': make_bars(80, seed=seed).iloc[80 - length:].assign(Open=1.0, Volume=float(seed + 1))
+                   for seed, length in enumerate([80, 60, 40, 15])}
+    stocks_data['STALE'] = make_bars(75, seed=9).assign(Open=1.0, Volume=1.0)
+    engine = BreadthEngine()
+    breadth = engine.compute(stocks_data)
+    history, latest = breadth['history'], breadth['latest']
+    
+    # Latest point: each symbol's own last bar, symbols with 20+ bars
+    frames = {symbol: TechnicalIndicators().add_indicators(data, ['EMA_20', 'RSI'])
+              for symbol, data in stocks_data.items() if len(data) >= 20}
+    above = sum(frame['Close'].iloc[-1] > frame['EMA_20'].iloc[-1] for frame in frames.values())
+    assert latest['stocks_above_ema'] == above and latest['market_breadth'] == above / 5 * 100
+    assert np.isclose(latest['average_rsi'], np.mean([frame['RSI'].iloc[-1] for frame in frames.values()]))
+    volatility = [frame['Close'].pct_change().rolling(20).std().iloc[-1] * 100 for frame in frames.values()]
+    assert np.isclose(latest['volatility'], np.mean(volatility))
+    momentum = [(frame['Close'].iloc[-1] / frame['Close'].iloc[-10] - 1) * 100 for frame in frames.values()]
+    assert np.isclose(latest['price_momentum'], np.mean(momentum)) and latest['volume_trend'] == 1.0
+    
+    # Every history row is the cross-section of the symbols trading on it
+    assert list(history.index) == list(stocks_data['S0'].index)
+    row = history.index[-1]
+    returns = {symbol: frame['Close'].pct_change().iloc[-1] for symbol, frame in frames.items() if frame.index[-1] == row}
+    assert history.loc[row, 'active'] == len(returns) == 3
+    assert history.loc[row, 'advances'] == sum(value > 0 for value in returns.values())
+    assert np.isclose(history.loc[row, 'dispersion'], np.std(list(returns.values())) * 100)
+    assert np.isclose(history.loc[row, 'mean_rsi'],
+                      np.mean([frames[symbol]['RSI'].iloc[-1] for symbol in returns]))
+    assert (history['ad_line'].diff().dropna() == (history['advances'] - history['declines']).iloc[1:]).all()
+    assert history['active'].iloc[:19].eq(0).all() and history['mean_rsi'].iloc[:19].isna().all()
+    
+    # MarketRegimeDetector keeps the history of its last detection
+    detector = MarketRegimeDetector(None)
+    assert detector._calculate_regime_indicators(stocks_data)['stocks_above_ema'] == above
+    pd.testing.assert_frame_equal(detector.get_breadth_history(), history)
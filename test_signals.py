@@ -0,0 +1,377 @@
+# test_signals.py
+"""
+Tests for the signal rules evaluated over full history and whole universes
+Each vectorized result is checked against a per-symbol reference of the default rules
+"""
+
+import io
+import sys
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+
+sys.path.append('src')
+
+from src.indicators.technical import TechnicalIndicators
+from src.strategies.signal_generator import SignalGenerator
+from benchmark_indicators import make_ohlcv_bars
+
+
+def make_generator():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SignalGenerator(TechnicalIndicators(), None)
+
+
+def make_universe():
+    """Ragged, gapped and stale symbols with varied volume"""
+    stocks_data = {}
+    for seed, length in enumerate([120, 90, 40, 12, 8]):
+        bars = make_ohlcv_bars(120, seed=seed).iloc[120 - length:].copy()
+        bars['Volume'] = np.random.default_rng(seed).integers(1_000, 20_000, len(bars)).astype(float)
+        stocks_data[f'S{seed}'] = bars
+    gapped = make_ohlcv_bars(120, seed=11)
+    stocks_data['GAPPED'] = gapped.drop(gapped.index[[30, 60]])
+    stocks_data['STALE'] = make_ohlcv_bars(110, seed=12)
+    return stocks_data
+
+
+def reference_signals(symbol, data):
+    """The hard-coded per-symbol rules the default rule file replaces, on data.iloc[-1]"""
+    latest, previous = data.iloc[-1], data.iloc[-2]
+    price = latest['Close']
+    signals = []
+    
+    def add(action, confidence, reason, stop, target):
+        signals.append({'symbol': symbol, 'action': action, 'confidence': confidence, 'reasons': [reason],
+                        'price': price, 'stop_loss': stop, 'target_price': target})
+    
+    rsi = latest['RSI']
+    if rsi <= 30:
+        add('BUY', 85.0, f'RSI oversold ({rsi:.1f})', price * 0.95, price * 1.08)
+    elif rsi >= 70:
+        add('SELL', 85.0, f'RSI overbought ({rsi:.1f})', price * 1.03, price * 0.92)
+    elif 35 <= rsi <= 45:
+        add('BUY', 70.0, f'RSI recovery ({rsi:.1f})', price * 0.96, price * 1.06)
+    elif 55 <= rsi <= 65:
+        add('SELL', 70.0, f'RSI weakness ({rsi:.1f})', price * 1.02, price * 0.94)
+    
+    fast, slow, fast_prev, slow_prev = latest['EMA_10'], latest['EMA_20'], previous['EMA_10'], previous['EMA_20']
+    if not any(pd.isna([fast, slow, fast_prev, slow_prev])):
+        if fast > slow and fast_prev <= slow_prev:
+            add('BUY', 80.0, 'EMA Golden Cross (10>20)', price * 0.95, price * 1.10)
+        elif fast < slow and fast_prev >= slow_prev:
+            add('SELL', 80.0, 'EMA Death Cross (10<20)', price * 1.03, price * 0.90)
+        elif price > fast > slow:
+            add('BUY', 65.0, 'Price above both EMAs', slow * 0.98, price * 1.05)
+        elif price < fast < slow:
+            add('SELL', 65.0, 'Price below both EMAs', slow * 1.02, price * 0.95)
+    
+    macd, signal, macd_prev, signal_prev = latest['MACD'], latest['MACD_Signal'], previous['MACD'], previous['MACD_Signal']
+    if not any(pd.isna([macd, signal, macd_prev, signal_prev])):
+        if macd > signal and macd_prev <= signal_prev:
+            add('BUY', 75.0, 'MACD bullish crossover', price * 0.96, price * 1.08)
+        elif macd < signal and macd_prev >= signal_prev:
+            add('SELL', 75.0, 'MACD bearish crossover', price * 1.02, price * 0.92)
+    
+    momentum = (price - data['Close'].iloc[-5]) / data['Close'].iloc[-5] * 100
+    if momentum > 4:
+        add('BUY', 70.0, f'Strong momentum (+{momentum:.1f}% in 5d)', price * 0.96, price * 1.06)
+    elif momentum < -4:
+        add('SELL', 70.0, f'Negative momentum ({momentum:.1f}% in 5d)', price * 1.02, price * 0.94)
+    if latest['Volume'] > data['Volume'].tail(10).mean() * 1.5 and momentum > 1:
+        add('BUY', 75.0, f'Volume spike + momentum (+{momentum:.1f}%)', price * 0.95, price * 1.08)
+    
+    if len(data) >= 20:
+        high_20, low_20 = data['High'].tail(20).max(), data['Low'].tail(20).min()
+        if price > high_20 * 1.01:
+            add('BUY', 80.0, f'Breakout above 20d high (₹{high_20:.2f})', high_20 * 0.98, price * 1.10)
+        elif price < low_20 * 0.99:
+            add('SELL', 80.0, f'Breakdown below 20d low (₹{low_20:.2f})', low_20 * 1.02, price * 0.90)
+    return signals
+
+
+def signal_fields(signals):
+    return [(s['symbol'], s['action'], s['confidence'], list(s['reasons']), round(float(s['price']), 9),
+             round(float(s['stop_loss']), 9), round(float(s['target_price']), 9)) for s in signals]
+
+
+def test_signal_matrix_matches_reference_rules_on_every_bar():
+    """signals_at(bar) equals the reference rules run on the data up to that bar"""
+    print("🧮 Testing full-history signal matrix...")
+    
+    generator = make_generator()
+    stocks_data = make_universe()
+    with contextlib.redirect_stdout(io.StringIO()):
+        matrix = generator.evaluate_history(stocks_data)
+        frames = generator._compute_indicator_frames(stocks_data)
+    
+    assert 'S4' not in matrix.symbols  # fewer than 10 bars, as generate_signals skips it
+    assert matrix.action.shape == (len(matrix.index), len(matrix.symbols), len(matrix.rules))
+    
+    expected_total = 0
+    for symbol, frame in frames.items():
+        rows = matrix.index.get_indexer(frame.index)
+        for length in range(10, len(frame) + 1):
+            expected = reference_signals(symbol, frame.iloc[:length])
+            expected_total += len(expected)
+            assert signal_fields(matrix.signals_at(int(rows[length - 1]), [symbol])) == signal_fields(expected)
+    assert len(matrix) == expected_total > 0
+    
+    # Latest bar of each symbol (generate_signals evaluates only the rules' lookback), and the long format
+    latest = [signal for symbol, frame in frames.items() for signal in reference_signals(symbol, frame)]
+    assert sorted(signal_fields(matrix.latest_signals())) == sorted(signal_fields(latest))
+    assert signal_fields(generator._latest_signals(frames)) == signal_fields(matrix.latest_signals())
+    table = matrix.to_frame()
+    assert len(table) == len(matrix) and set(table['action']) == {'BUY', 'SELL'}
+    assert (table['stop_loss'] < table['price']).eq(table['action'] == 'BUY').all()
+    assert matrix.counts().shape == (len(matrix.index), len(matrix.symbols))
+
+
+def test_declarative_rules_compile_and_evaluate_variants_together():
+    """Rule specs compile to array expressions; variants evaluated in one pass match separate passes"""
+    print("📜 Testing declarative signal rules...")
+    
+    from src.strategies.rules import RuleSet, compile_expression
+    from src.strategies.signal_matrix import evaluate_signal_matrix, evaluate_variants
+    
+    default = RuleSet.load()
+    assert [rule.name for rule in default.rules] == ['rsi', 'moving_average', 'macd', 'momentum',
+                                                     'volume_momentum', 'breakout']
+    assert default.indicator_columns == ['EMA_10', 'EMA_20', 'MACD', 'MACD_Signal', 'RSI']
+    assert default.lookback == 19  # 20-bar high/low
+    
+    # Chained comparisons, cross_above sharing its prev() terms, and definitions inlined
+    assert compile_expression('35 <= RSI <= 45')[0] == 'and'
+    tree = compile_expression('cross_above(fast, EMA_20)', {'fast': 'EMA_10'})
+    assert ('prev', ('column', 'EMA_10'), 1) in tree[2]
+    for bad in ['RSI <=', 'RSI ** 2', 'unknown(RSI)', 'prev(RSI, 0)', 'rolling_max(High)']:
+        try:
+            compile_expression(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} compiled")
+    
+    tight = {
+        'name': 'tight',
+        'define': {'band': 'rolling_max(High, 10) - rolling_min(Low, 10)'},
+        'rules': [
+            {'name': 'rsi', 'value': 'RSI', 'branches': [
+                {'when': 'RSI <= 25', 'action': 'BUY', 'confidence': 90, 'stop': 0.97, 'target': 1.05,
+                 'reason': 'RSI deeply oversold ({value:.1f})'}]},
+            {'name': 'squeeze', 'min_bars': 15, 'branches': [
+                {'when': 'band < Close * 0.08 and Close > prev(Close)', 'action': 'buy', 'confidence': 65,
+                 'stop': 'Close - band', 'target': 'Close + 2 * band', 'reason': 'Range squeeze'}]}
+        ]
+    }
+    generator = make_generator()
+    stocks_data = make_universe()
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = generator._compute_indicator_frames(stocks_data)
+        variants = generator.evaluate_variants(stocks_data, [default, tight])
+    
+    assert set(variants) == {'default', 'tight'}
+    for rule_set in (default, RuleSet.load(tight)):
+        alone = evaluate_signal_matrix(frames, rule_set)
+        together = variants[rule_set.name]
+        assert together.rules == alone.rules
+        assert np.array_equal(together.action, alone.action)
+        assert np.allclose(together.stop_loss, alone.stop_loss, equal_nan=True)
+        assert sorted(signal_fields(together.latest_signals())) == sorted(signal_fields(alone.latest_signals()))
+    
+    squeeze = variants['tight'].to_frame().query("rule == 'squeeze'")
+    assert len(squeeze) > 0 and (squeeze['action'] == 'BUY').all()
+    assert np.allclose(squeeze['target_price'] - squeeze['price'], 2 * (squeeze['price'] - squeeze['stop_loss']))
+    
+    # A generator built from a spec reads only the columns its rules need
+    with contextlib.redirect_stdout(io.StringIO()):
+        custom = SignalGenerator(TechnicalIndicators(), None, rules=tight)
+    assert custom.indicator_columns == ['RSI']
+    assert custom.rule_set.lookback == 9
+
+
+def test_parallel_generation_matches_in_process():
+    """Sharded process-pool generation gives the in-process signals; arrays round-trip exactly"""
+    print("⚡ Testing parallel signal generation...")
+    
+    from src.strategies.parallel import pack_shard, unpack_shard, shard_symbols
+    
+    stocks_data = make_universe()
+    stocks_data['NO_VOLUME'] = make_ohlcv_bars(60, seed=21).drop(columns=['Volume'])
+    for seed in range(30):
+        stocks_data[f'P{seed}'] = make_ohlcv_bars(80 + seed, seed=100 + seed)
+    
+    # Frames survive the trip as flat arrays: index (tz included), values, missing columns
+    aware = make_ohlcv_bars(60, freq='15min', seed=22)
+    aware.index = aware.index.tz_localize('Asia/Kolkata')
+    shipped = dict(stocks_data, AWARE=aware)
+    restored = unpack_shard(pack_shard(shipped))
+    for symbol, data in shipped.items():
+        pd.testing.assert_frame_equal(restored[symbol], data.astype(float), check_freq=False, check_like=True)
+    
+    groups = shard_symbols(stocks_data, 3)
+    assert sorted(s for group in groups for s in group) == sorted(stocks_data)
+    loads = [sum(len(stocks_data[s]) for s in group) for group in groups]
+    assert max(loads) - min(loads) <= max(len(data) for data in stocks_data.values())
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial = SignalGenerator(TechnicalIndicators(), None)
+        parallel = SignalGenerator(TechnicalIndicators(), None, workers=2, parallel_min_symbols=10)
+        small = SignalGenerator(TechnicalIndicators(), None, workers=2, parallel_min_symbols=1000)
+        expected, expected_count = serial._generate_in_process(stocks_data)
+        try:
+            signals, count = parallel.parallel.generate(stocks_data)
+            ranked = parallel.generate_signals(stocks_data)
+            small.generate_signals(stocks_data)
+        finally:
+            parallel.shutdown()
+        
+        # Once another thread is running, a fork pool is not rebuilt: generation stays in-process
+        blocker = threading.Event()
+        thread = threading.Thread(target=blocker.wait, daemon=True)
+        thread.start()
+        try:
+            late = SignalGenerator(TechnicalIndicators(), None, workers=2, parallel_min_symbols=10)
+            late.start_workers()
+            late_ranked = late.generate_signals(stocks_data)
+        finally:
+            blocker.set()
+            thread.join()
+    
+    if late.parallel.start_method == 'fork':
+        assert late.parallel._pool is None and not late.parallel.should_run(len(stocks_data))
+    late.shutdown()
+    assert signal_fields(late_ranked) == signal_fields(ranked)
+    
+    assert count == expected_count == len(stocks_data) - 1  # S4 has fewer than 10 bars
+    assert signal_fields(signals) == signal_fields(expected) and len(signals) > 0
+    assert signal_fields(ranked) == signal_fields(serial.rank_signals(expected))
+    assert small.parallel._pool is None  # short list stayed in-process
+
+
+def test_signal_reads_like_a_dict_and_serializes_compactly():
+    """Slotted Signals serve dict consumers, pickle, and batch to JSON and SQLite rows"""
+    print("🧾 Testing compact Signal type...")
+    
+    import json
+    import pickle
+    import sqlite3
+    import tracemalloc
+    from datetime import datetime
+    from src.strategies.signals import Signal, SignalBatch, ROW_COLUMNS, signal_to_dict
+    
+    stamp = datetime(2026, 1, 5, 10, 15)
+    batch = SignalBatch([Signal('RELIANCE', 'buy', 2450.0, 85.0, ['RSI oversold (28.1)'], 2327.5, 2646.0, stamp, 'rsi'),
+                         Signal('TCS', 'SELL', 3680.0, 70.0, ['RSI weakness (60.2)'], 3753.6, 3459.2, stamp, 'rsi')],
+                        stamp)
+    signal = batch[0]
+    
+    # The dict access patterns the engines, templates and API use
+    assert signal['action'] == 'BUY' and signal.get('stop_loss', 0) == 2327.5 and 'target_price' in signal
+    assert signal.get('risk_level', 'Medium') == 'Medium' and ', '.join(signal['reasons']) == 'RSI oversold (28.1)'
+    signal['price'] = 2460.0
+    signal['price_age_seconds'] = 3
+    assert signal['price_age_seconds'] == 3 and dict(signal)['price'] == 2460.0
+    assert not hasattr(signal, '__dict__') and signal.timestamp is batch[1].timestamp
+    assert Signal.from_mapping(dict(signal)) == signal
+    assert pickle.loads(pickle.dumps(signal)) == signal
+    
+    records = json.loads(batch.to_json())
+    assert records[0]['timestamp'] == '2026-01-05T10:15:00' and records[0]['price_age_seconds'] == 3
+    assert records[1] == signal_to_dict(batch[1])
+    assert signal_to_dict({'symbol': 'INFY', 'timestamp': stamp})['action'] == 'UNKNOWN'
+    
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE signals ({', '.join(ROW_COLUMNS)})")
+    conn.executemany(f"INSERT INTO signals VALUES ({', '.join('?' * len(ROW_COLUMNS))})", batch.to_rows())
+    assert conn.execute("SELECT symbol, action, price FROM signals ORDER BY symbol").fetchall() == [
+        ('RELIANCE', 'BUY', 2460.0), ('TCS', 'SELL', 3680.0)]
+    conn.close()
+    
+    # Smaller than the equivalent dicts
+    def allocated(make):
+        tracemalloc.start()
+        items = [make(i) for i in range(2000)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size, items
+    
+    as_dicts, _ = allocated(lambda i: {'symbol': 'RELIANCE', 'action': 'BUY', 'price': 2450.0 + i, 'confidence': 85.0,
+                                       'reasons': ['RSI oversold'], 'stop_loss': 2327.5, 'target_price': 2646.0,
+                                       'timestamp': stamp, 'rule': 'rsi'})
+    as_signals, _ = allocated(lambda i: Signal('RELIANCE', 'BUY', 2450.0 + i, 85.0, ('RSI oversold',), 2327.5,
+                                               2646.0, stamp, 'rsi'))
+    assert as_signals < as_dicts * 0.7
+    
+    # generate_signals hands out Signals
+    with contextlib.redirect_stdout(io.StringIO()):
+        generated = make_generator().generate_signals(make_universe())
+    assert isinstance(generated, SignalBatch) and all(isinstance(s, Signal) for s in generated)
+    assert len({id(s.timestamp) for s in generated}) == 1
+
+
+def test_signal_history_ring_rolling_stats_and_spill():
+    """Ring-buffer history keeps exact window stats, a per-symbol index, and survives a restart"""
+    print("📜 Testing signal history...")
+    
+    import os
+    import tempfile
+    from datetime import datetime, timedelta
+    from src.strategies.signals import Signal
+    from src.strategies.signal_history import SignalHistory
+    
+    now = datetime(2026, 3, 2, 15, 0)
+    rng = np.random.default_rng(5)
+    signals = []
+    for i in range(60):
+        stamp = now - timedelta(hours=float(60 - i) * 5)
+        signals.append(Signal(f'S{i % 7}', 'BUY' if rng.random() < 0.6 else 'SELL', 100.0 + i,
+                              float(rng.integers(60, 90)), [f'reason {i}'], 95.0, 110.0, stamp, 'rsi'))
+    
+    def scan(window, days):
+        recent = [s for s in window if s.timestamp >= now - timedelta(days=days)]
+        if not recent:
+            return {'total_signals': 0, 'message': 'No recent signals'}
+        return {'total_signals': len(recent),
+                'buy_signals': sum(s.action == 'BUY' for s in recent),
+                'sell_signals': sum(s.action == 'SELL' for s in recent),
+                'avg_confidence': round(sum(s.confidence for s in recent) / len(recent), 1),
+                'signals_per_day': round(len(recent) / days, 1)}
+    
+    history = SignalHistory(capacity=25)
+    for start in range(0, 60, 4):
+        history.extend(signals[start:start + 4])
+    assert len(history) == 25 and list(history) == signals[-25:]
+    assert history.recent(3) == signals[-3:]
+    assert history.for_symbol('S3') == [s for s in signals[-25:] if s.symbol == 'S3']
+    for days in (0.5, 1, 2, 4, 30):
+        assert history.stats(days, now=now) == scan(signals[-25:], days)
+    assert history.symbol_stats('S0')['total_signals'] == sum(s.symbol == 'S0' for s in signals)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history', 'signals.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            stored = SignalHistory(capacity=25, path=path)
+            stored.extend(signals)
+            reopened = SignalHistory(capacity=25, path=path)
+        # The ring reloads the newest rows; windows older than the ring are answered from disk
+        assert [s.symbol for s in reopened] == [s.symbol for s in signals[-25:]]
+        assert reopened.recent(1)[0]['reasons'] == ('reason 59',)
+        assert reopened.recent(1)[0]['timestamp'] == signals[-1].timestamp
+        for days in (1, 4, 30):
+            assert reopened.stats(days, now=now) == scan(signals, days)
+    
+        # The generator records ranked signals into the same store
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = SignalGenerator(TechnicalIndicators(), None, history_path=path)
+            ranked = generator.generate_signals(make_universe())
+        performance = generator.get_signal_performance(days=1)
+        assert performance['total_signals'] == len(ranked) > 0
+        
+        # Filling a returned signal at a trade price leaves the recorded snapshot alone
+        recorded_price = generator.signal_history.recent(1)[0]['price']
+        ranked[-1]['price'] = recorded_price + 1.0
+        ranked[-1]['price_age_seconds'] = 3.0
+        assert generator.signal_history.recent(1)[0]['price'] == recorded_price
+        assert 'price_age_seconds' not in generator.signal_history.recent(1)[0]
+        assert len(generator.signal_history) == len(signals) + len(ranked)